@@ -24,9 +24,13 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = os.getenv('DJANGO_SECRET_KEY')
 DEBUG = os.getenv('DEBUG') == 'True'
-EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+# Emails are queued in the outbox and sent by deliver_notifications through NOTIFICATIONS['EMAIL_BACKEND'].
+EMAIL_BACKEND = 'tournaments.notifications.OutboxEmailBackend'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Stream every upload to a temporary file instead of holding small ones in memory;
+# sponsor logos are hashed and moved into MEDIA_ROOT from there.
+FILE_UPLOAD_HANDLERS = ['django.core.files.uploadhandler.TemporaryFileUploadHandler']
 ALLOWED_HOSTS = []
 
 
@@ -40,6 +44,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'djoser',
     'corsheaders',
@@ -50,6 +55,8 @@ SITE_ID = 1
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'tournaments.compression.CompressionMiddleware',
+    'tournaments.profiling.ProfilingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     "corsheaders.middleware.CorsMiddleware",
     'django.middleware.common.CommonMiddleware',
@@ -93,6 +100,79 @@ DATABASES = {
     }
 }
 
+# Streaming replicas of `default`, e.g. DB_REPLICA_HOSTS=10.0.0.2,10.0.0.3 or localhost:5433. Only views
+# that opt in (tournaments.routers.ReplicaReadsMixin) read from them; everything else stays on the primary.
+for number, replica in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    host, _, port = replica.strip().partition(':')
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'], 'HOST': host, 'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['tournaments.routers.ReplicaRouter']
+
+DATABASE_REPLICAS = {
+    'ALIASES': [alias for alias in DATABASES if alias != 'default'],
+    # After writing, a user's reads stay on the primary this long (read-your-writes despite replication lag).
+    'PIN_SECONDS': 5,
+    'PIN_CACHE': 'default',  # must be shared between processes for pins to follow the user
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Shared tournament detail snapshots; point this at Redis/Memcached when running several processes.
+    'brackets': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'brackets',
+    },
+}
+
+# Per-request query/latency sampling, exposed at /api/metrics/ (staff only).
+PROFILING = {
+    'SAMPLE_RATE': float(os.getenv('PROFILING_SAMPLE_RATE', '0')),  # 0 disables it, 1 profiles every request
+    'DUPLICATE_THRESHOLD': 3,
+}
+
+# Sponsor logo variants (tournaments.images): WebP renditions per display height, rendered off-request.
+SPONSOR_IMAGES = {
+    'HEIGHTS': (60, 120, 240),
+    'QUALITY': 80,
+    'WORKERS': 2,
+}
+
+# Outbox delivery (tournaments.notifications); run `manage.py deliver_notifications` alongside the server.
+NOTIFICATIONS = {
+    'EMAIL_BACKEND': os.getenv('NOTIFICATION_EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend'),
+    'WEBHOOK_URLS': [url for url in os.getenv('NOTIFICATION_WEBHOOK_URLS', '').split(',') if url],
+    'WEBHOOK_SECRET': os.getenv('NOTIFICATION_WEBHOOK_SECRET', ''),
+    'BATCH_SIZE': 100,
+    'MAX_ATTEMPTS': 8,
+    'RETRY_BASE_SECONDS': 30,
+}
+
+# Finished tournaments' detail, rendered once and served as stored bytes (tournaments.snapshots).
+SNAPSHOTS = {
+    # Origin for absolute media URLs in snapshots; empty uses the request that triggers the render.
+    'BASE_URL': os.getenv('SNAPSHOT_BASE_URL', ''),
+    'COMPRESS': True,
+    'MAX_AGE': 86400,  # Cache-Control max-age for browsers and CDNs
+}
+
+# brotli/gzip for JSON responses of at least MIN_SIZE bytes (tournaments.compression); brotli needs the package.
+COMPRESSION = {
+    'MIN_SIZE': 1024,
+    'GZIP_LEVEL': 6,
+    'BROTLI_QUALITY': 5,
+}
+
+BRACKET_CACHE = {
+    'LOCAL_MAX_ENTRIES': 256,
+    'SHARED_ALIAS': 'brackets',  # None keeps snapshots in-process only
+    'TIMEOUT': 3600,
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -139,6 +219,10 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'tournaments.renderers.FastJSONRenderer',  # orjson when installed, the stock renderer otherwise
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,  
 }
@@ -471,7 +471,8 @@ function TournamentDetail() {
                 {tournament.sponsors.map(sponsor => (
                     <img 
                         key={sponsor.id} 
-                        src={sponsor.image} 
+                        src={sponsor.variants?.[0]?.url || sponsor.image} 
+                        srcSet={sponsor.srcset || undefined}
                         alt="Sponsor" 
                         style={{
                             height: '60px', 
@@ -9,7 +9,7 @@ function TournamentList() {
   
   const [nextPage, setNextPage] = useState(null);
   const [prevPage, setPrevPage] = useState(null);
-  const [count, setCount] = useState(0);
+  const [count, setCount] = useState(null);
 
   useEffect(() => {
     fetchTournaments();
@@ -25,7 +25,7 @@ function TournamentList() {
         setTournaments(res.data.results);
         setNextPage(res.data.next);      
         setPrevPage(res.data.previous);  
-        setCount(res.data.count);        
+        setCount(res.data.count ?? null); // cursor pages carry no count
       } else {
         setTournaments(res.data);
       }
@@ -108,9 +108,11 @@ function TournamentList() {
                 &laquo; Previous
             </button>
 
-            <span style={{color: '#a09b8c', fontSize: '0.9rem'}}>
-               {count} Results
-            </span>
+            {count != null && (
+              <span style={{color: '#a09b8c', fontSize: '0.9rem'}}>
+                 {count} Results
+              </span>
+            )}
 
             <button 
                 onClick={() => fetchTournaments(search, nextPage)} 
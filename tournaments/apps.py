@@ -1,5 +1,13 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete
 
 
 class TournamentsConfig(AppConfig):
     name = 'tournaments'
+
+    def ready(self):
+        from .models import Participant, release_seat
+        from .profiling import install_query_hook
+        connection_created.connect(install_query_hook, dispatch_uid='tournaments.profiling')
+        post_delete.connect(release_seat, sender=Participant, dispatch_uid='tournaments.release_seat')
@@ -0,0 +1,128 @@
+"""
+Archival of finished tournaments (manage.py archive_tournaments).
+
+Finished brackets never change, yet their Match and Participant rows are most
+of those tables. Archiving a tournament moves them into one ArchivedBracket
+row per tournament: the rendered `matches` / `participants` payload, the raw
+rows, and the seeding order. One ArchivedParticipation row is also written per
+player. The Tournament row stays where it is, with archived_at set, so ids,
+listing, search and sponsors are untouched. Reads stay transparent:
+TournamentSerializer swaps the stored payload in, with_player_stats() reads the
+stored figures, and user_history finds archived entries through
+ArchivedParticipation. The live tables keep only open, ongoing and recently
+finished brackets, which keeps them small enough to stay cached.
+"""
+from datetime import datetime
+
+from django.db import models, transaction
+from django.utils import timezone
+
+from .transfer import COLUMNS
+from .models import BULK_BATCH_SIZE, ArchivedBracket, ArchivedParticipation, Match, Participant, Tournament, seats_kept
+from .serializers import TournamentSerializer
+
+# The relations moved out of the live tables.
+ARCHIVED = ('match', 'participant')
+
+
+def candidates(older_than):
+    """Finished, not yet archived tournaments untouched for `older_than` (a timedelta)."""
+    return Tournament.objects.filter(
+        status='finished', archived_at__isnull=True, updated_at__lt=timezone.now() - older_than,
+    )
+
+
+def _json(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def participations(tournament_id, matches):
+    """ArchivedParticipation rows for one tournament from its (player1_id, player2_id, winner_id, round_number) matches."""
+    rounds = max((round_number for *_, round_number in matches), default=0)
+    players = {}
+    for player1, player2, winner, round_number in matches:
+        contested = player1 is not None and player2 is not None and winner is not None
+        for player in (player1, player2):
+            if player is None:
+                continue
+            row = players.setdefault(player, ArchivedParticipation(user_id=player, tournament_id=tournament_id, rounds=rounds))
+            row.final_round = max(row.final_round, round_number)
+            if contested:
+                if winner == player:
+                    row.wins += 1
+                else:
+                    row.losses += 1
+    return players
+
+
+def archive(tournament_ids):
+    """
+    Archives the given tournaments that are finished and not archived yet, in
+    one transaction. Returns how many were archived.
+    """
+    with transaction.atomic():
+        ids = list(
+            Tournament.objects.select_for_update()
+            .filter(pk__in=tournament_ids, status='finished', archived_at__isnull=True)
+            .values_list('id', flat=True)
+        )
+        if not ids:
+            return 0
+        tournaments = Tournament.objects.filter(pk__in=ids).with_bracket()
+
+        rows = {tournament_id: {kind: [] for kind in ARCHIVED} for tournament_id in ids}
+        for row in Match.objects.filter(tournament_id__in=ids).order_by('id').values_list(*COLUMNS['match']):
+            rows[row[1]]['match'].append(list(row))
+        # In seeding order (Tournament._seeds()), so `seeds` can be read off the rows.
+        for row in (
+            Participant.objects.filter(tournament_id__in=ids)
+            .order_by('-ranking_points', 'registered_at', 'id').values_list(*COLUMNS['participant'])
+        ):
+            rows[row[1]]['participant'].append([_json(value) for value in row])
+        user_column = COLUMNS['participant'].index('user_id')
+
+        brackets, entries = [], []
+        for tournament in tournaments:
+            data = TournamentSerializer(tournament).data
+            seeds = [row[user_column] for row in rows[tournament.pk]['participant']]
+            played = [
+                (match.player1_id, match.player2_id, match.winner_id, match.round_number)
+                for match in tournament.matches.all()
+            ]
+            players = participations(tournament.pk, played)
+            # Registered players who never got a match (a cancelled entry, say) still have history.
+            for user_id in seeds:
+                players.setdefault(user_id, ArchivedParticipation(user_id=user_id, tournament_id=tournament.pk))
+            entries += players.values()
+            brackets.append(ArchivedBracket(
+                tournament=tournament,
+                payload={'matches': data['matches'], 'participants': data['participants']},
+                rows={'columns': {kind: COLUMNS[kind] for kind in ARCHIVED}, **rows[tournament.pk]},
+                seeds=seeds,
+            ))
+
+        ArchivedBracket.objects.bulk_create(brackets, batch_size=BULK_BATCH_SIZE)
+        ArchivedParticipation.objects.bulk_create(entries, batch_size=BULK_BATCH_SIZE)
+        Match.objects.filter(tournament_id__in=ids).delete()
+        with seats_kept():
+            Participant.objects.filter(tournament_id__in=ids).delete()
+        # The rendered detail now carries archived_at, so cached snapshots go stale.
+        now = timezone.now()
+        Tournament.objects.filter(pk__in=ids).update(
+            archived_at=now, bracket_version=models.F('bracket_version') + 1, updated_at=now,
+        )
+    return len(ids)
+
+
+def archive_finished(older_than, batch_size=100, log=None):
+    """Archives every candidate, `batch_size` tournaments per transaction, by id keyset. Returns the total."""
+    total = 0
+    last_id = 0
+    while True:
+        batch = list(candidates(older_than).filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not batch:
+            return total
+        last_id = batch[-1]
+        total += archive(batch)
+        if log:
+            log(f"{total} tournaments archived")
@@ -0,0 +1,354 @@
+"""
+In-memory bracket layout.
+
+Everything here works on plain user ids so a whole tree (players, byes,
+bye auto-advances and next_match links) can be computed before touching
+the database. Tournament.start_tournament then writes the result with one
+bulk insert per round instead of several round trips per match.
+"""
+import math
+from collections import deque
+from functools import lru_cache
+
+
+class MatchSpec:
+    """
+    An unsaved match. next_index / loser_index point at the matches the winner
+    and loser move on to (positions in the spec list), into next_slot / loser_slot.
+    """
+
+    __slots__ = (
+        'round_number', 'match_number', 'stage', 'group', 'player1', 'player2', 'winner',
+        'next_index', 'next_slot', 'loser_index', 'loser_slot', 'void',
+    )
+
+    def __init__(self, round_number, match_number, next_index=None, stage='bracket', group=None):
+        self.round_number = round_number
+        self.match_number = match_number
+        self.stage = stage
+        self.group = group
+        self.player1 = None
+        self.player2 = None
+        self.winner = None
+        self.next_index = next_index
+        self.next_slot = None if next_index is None else ('player1' if match_number % 2 == 0 else 'player2')
+        self.loser_index = None
+        self.loser_slot = None
+        # Set by resolve() for matches that can never have a player; they are not persisted.
+        self.void = False
+
+
+def advance(specs, spec):
+    """Moves spec.winner into its slot of the next match."""
+    if spec.next_index is None:
+        return
+    setattr(specs[spec.next_index], spec.next_slot, spec.winner)
+
+
+def resolve(specs):
+    """
+    Settles everything that byes decide before a ball is played, entirely in memory.
+
+    A match whose inputs are all known and holds one player is a bye: that player
+    wins it and moves on. A match that can only ever get one player (the other
+    side received nobody) is skipped: its remaining feeder is rewired straight to
+    where this match's winner would go. Matches that end up with nobody are void.
+    """
+    incoming = [[] for _ in specs]
+    for i, spec in enumerate(specs):
+        if spec.next_index is not None:
+            incoming[spec.next_index].append((i, 'next'))
+        if spec.loser_index is not None:
+            incoming[spec.loser_index].append((i, 'loser'))
+    settled = [False] * len(specs)
+    queue = deque(i for i in range(len(specs)) if not incoming[i])
+
+    def deliver(source, edge, player):
+        target = getattr(specs[source], f'{edge}_index')
+        if target is None:
+            return
+        setattr(specs[target], getattr(specs[source], f'{edge}_slot'), player)
+        incoming[target].remove((source, edge))
+        queue.append(target)
+
+    while queue:
+        i = queue.popleft()
+        spec = specs[i]
+        if settled[i]:
+            continue
+        players = [p for p in (spec.player1, spec.player2) if p is not None]
+        pending = len(incoming[i])
+        empty = 2 - pending - len(players)
+
+        if pending == 0 and len(players) == 2:
+            settled[i] = True
+        elif pending == 0:
+            settled[i] = True
+            spec.winner = players[0] if players else None
+            spec.void = not players
+            deliver(i, 'next', spec.winner)
+            deliver(i, 'loser', None)
+        elif pending == 1 and empty == 1:
+            # Only one player can ever arrive: skip this match.
+            settled[i] = True
+            spec.void = True
+            source, edge = incoming[i].pop()
+            setattr(specs[source], f'{edge}_index', spec.next_index)
+            setattr(specs[source], f'{edge}_slot', spec.next_slot)
+            if spec.next_index is not None:
+                incoming[spec.next_index].remove((i, 'next'))
+                incoming[spec.next_index].append((source, edge))
+            deliver(i, 'loser', None)
+    return specs
+
+
+def play_out(specs, pick):
+    """
+    Decides every open match with pick(player1, player2) -> winner, routing
+    winners and losers on. Specs must be in play order (every layout here is);
+    used to generate finished brackets for demo and staging data.
+    """
+    for spec in specs:
+        if spec.void or spec.winner is not None:
+            continue
+        spec.winner = pick(spec.player1, spec.player2)
+        advance(specs, spec)
+        if spec.loser_index is not None:
+            loser = spec.player2 if spec.winner == spec.player1 else spec.player1
+            setattr(specs[spec.loser_index], spec.loser_slot, loser)
+    return specs
+
+
+@lru_cache(maxsize=None)
+def seed_order(bracket_size):
+    """
+    Seed positions (0-based) in bracket order for a power-of-two bracket: seed
+    0 meets seed size-1, and the top two seeds sit in opposite halves, the top
+    four in opposite quarters, and so on. Each doubling mirrors the previous order.
+    """
+    order = [0]
+    while len(order) < bracket_size:
+        mirror = 2 * len(order) - 1
+        order = [position for seed in order for position in (seed, mirror - seed)]
+    return tuple(order)
+
+
+def first_round_slots(seeds):
+    """
+    Round-one slot list for `seeds` (best first) in standard seeding order. The
+    missing seeds at the bottom are None byes, so byes go to the top seeds and
+    never meet each other.
+    """
+    bracket_size = 2 ** math.ceil(math.log2(len(seeds)))
+    count = len(seeds)
+    return [seeds[position] if position < count else None for position in seed_order(bracket_size)]
+
+
+def _elimination_tree(slots, stage='bracket', first_index=0):
+    """Winners-bracket rounds for `slots`, players placed in round one. Returns (specs, rounds)."""
+    bracket_size = len(slots)
+    rounds = int(math.log2(bracket_size))
+    specs = []
+    round_start = first_index
+    for round_num in range(1, rounds + 1):
+        matches_in_round = bracket_size >> round_num
+        next_start = round_start + matches_in_round
+        for i in range(matches_in_round):
+            next_index = next_start + i // 2 if round_num < rounds else None
+            specs.append(MatchSpec(round_num, i, next_index, stage=stage))
+        round_start = next_start
+
+    for i in range(bracket_size // 2):
+        specs[i].player1 = slots[i * 2]
+        specs[i].player2 = slots[i * 2 + 1]
+    return specs, rounds
+
+
+def single_elimination(seeds):
+    """
+    Lays out a single-elimination bracket for `seeds` (user ids, best first).
+    Returns MatchSpecs ordered by round then match number.
+    """
+    specs, _ = _elimination_tree(first_round_slots(seeds))
+    return resolve(specs)
+
+
+def double_elimination(seeds):
+    """
+    Winners bracket, losers bracket and a grand final (no bracket reset).
+
+    Losers bracket round 2j-1 pairs up the survivors of the previous losers round
+    (round 1 takes the winners-bracket round 1 losers); round 2j sets those
+    survivors against the losers dropping from winners-bracket round j+1, in
+    reverse order to delay rematches.
+    """
+    specs, rounds = _elimination_tree(first_round_slots(seeds))
+    bracket_size = 2 ** rounds
+    winners_round_start = [0]
+    for round_num in range(1, rounds + 1):
+        winners_round_start.append(winners_round_start[-1] + (bracket_size >> round_num))
+
+    def winners_match(round_num, i):
+        return winners_round_start[round_num - 1] + i
+
+    previous = []
+    for losers_round in range(1, 2 * (rounds - 1) + 1):
+        j = (losers_round + 1) // 2
+        current = []
+        if losers_round == 1:
+            for i in range(bracket_size >> 2):
+                spec = MatchSpec(losers_round, i, stage='losers')
+                specs.append(spec)
+                current.append(len(specs) - 1)
+                for side, source in enumerate((winners_match(1, 2 * i), winners_match(1, 2 * i + 1))):
+                    specs[source].loser_index = len(specs) - 1
+                    specs[source].loser_slot = ('player1', 'player2')[side]
+        elif losers_round % 2 == 1:
+            for i in range(len(previous) // 2):
+                spec = MatchSpec(losers_round, i, stage='losers')
+                specs.append(spec)
+                current.append(len(specs) - 1)
+                for side, source in enumerate(previous[2 * i:2 * i + 2]):
+                    specs[source].next_index = len(specs) - 1
+                    specs[source].next_slot = ('player1', 'player2')[side]
+        else:
+            dropping = bracket_size >> (j + 1)
+            for i in range(len(previous)):
+                spec = MatchSpec(losers_round, i, stage='losers')
+                specs.append(spec)
+                current.append(len(specs) - 1)
+                specs[previous[i]].next_index = len(specs) - 1
+                specs[previous[i]].next_slot = 'player1'
+                source = winners_match(j + 1, dropping - 1 - i if j % 2 else i)
+                specs[source].loser_index = len(specs) - 1
+                specs[source].loser_slot = 'player2'
+        previous = current
+
+    specs.append(MatchSpec(1, 0, stage='grand_final'))
+    final = len(specs) - 1
+    winners_final = winners_match(rounds, 0)
+    specs[winners_final].next_index, specs[winners_final].next_slot = final, 'player1'
+    if previous:
+        specs[previous[0]].next_index, specs[previous[0]].next_slot = final, 'player2'
+    else:
+        specs[winners_final].loser_index, specs[winners_final].loser_slot = final, 'player2'
+    return resolve(specs)
+
+
+def round_robin(seeds, group_size):
+    """
+    Snake-seeded groups of at most `group_size`, each a full round robin
+    (circle method). Odd groups rest one player per round; no match is created for the rest.
+    """
+    group_count = max(1, math.ceil(len(seeds) / group_size))
+    groups = [[] for _ in range(group_count)]
+    for position, seed in enumerate(seeds):
+        lap, offset = divmod(position, group_count)
+        groups[offset if lap % 2 == 0 else group_count - 1 - offset].append(seed)
+
+    specs = []
+    for group_number, players in enumerate(groups, start=1):
+        ring = players + [None] if len(players) % 2 else list(players)
+        half = len(ring) // 2
+        for round_num in range(1, len(ring)):
+            match_number = 0
+            for k in range(half):
+                a, b = ring[k], ring[-1 - k]
+                if a is None or b is None:
+                    continue
+                spec = MatchSpec(round_num, match_number, stage='group', group=group_number)
+                spec.player1, spec.player2 = a, b
+                specs.append(spec)
+                match_number += 1
+            ring = [ring[0], ring[-1]] + ring[1:-1]
+    return specs
+
+
+def swiss_standings(seeds, history):
+    """
+    Scores from finished matches. `history` rows are (player1, player2, winner) ids;
+    a bye is a row with player2 None. Returns (score, opponents, had_bye) dicts.
+    """
+    score = {seed: 0 for seed in seeds}
+    opponents = {seed: set() for seed in seeds}
+    had_bye = set()
+    for player1, player2, winner in history:
+        if winner is not None and winner in score:
+            score[winner] += 1
+        if player2 is None:
+            had_bye.add(player1)
+        elif player1 is not None:
+            opponents[player1].add(player2)
+            opponents[player2].add(player1)
+    return score, opponents, had_bye
+
+
+MAX_PAIRING_STEPS = 200000
+
+
+def _pair_without_rematches(order, opponents):
+    """
+    Pairs `order` top-down, each player with the highest-placed opponent not met yet,
+    backtracking when stuck. Iterative, so depth is not bound by the recursion limit.
+    Returns index pairs, or None if no rematch-free pairing was found within the step budget.
+    """
+    n = len(order)
+    partner = [None] * n
+    stack = []
+    i, j = 0, 0
+    for _ in range(MAX_PAIRING_STEPS):
+        while i < n and partner[i] is not None:
+            i += 1
+        if i == n:
+            return stack
+        j = max(j, i + 1)
+        met = opponents[order[i]]
+        while j < n and (partner[j] is not None or order[j] in met):
+            j += 1
+        if j < n:
+            partner[i] = j
+            partner[j] = i
+            stack.append((i, j))
+            i, j = i + 1, 0
+        elif stack:
+            i, j = stack.pop()
+            partner[i] = partner[j] = None
+            j += 1
+        else:
+            return None
+    return None
+
+
+def swiss_round(seeds, history, round_number):
+    """
+    Pairings for one Swiss round. Players are ranked by score (seed order breaks
+    ties) and paired top-down without rematches; with an odd field the
+    lowest-ranked player without a bye yet gets one (a match that is already won).
+    Once no rematch-free pairing exists (n players run out of fresh opponents
+    after n - 1 rounds, sooner with unlucky results), the round pairs neighbours
+    in the standings instead, 1st v 2nd, 3rd v 4th..., rematches included.
+    """
+    score, opponents, had_bye = swiss_standings(seeds, history)
+    rank = {seed: position for position, seed in enumerate(seeds)}
+    order = sorted(seeds, key=lambda seed: (-score[seed], rank[seed]))
+
+    bye = None
+    if len(order) % 2:
+        bye = next((p for p in reversed(order) if p not in had_bye), order[-1])
+        order.remove(bye)
+
+    pairs = _pair_without_rematches(order, opponents)
+    if pairs is None:
+        # Small fields run out of fresh opponents; fall back to adjacent pairing (see the docstring).
+        pairs = [(i, i + 1) for i in range(0, len(order), 2)]
+
+    specs = []
+    for match_number, (a, b) in enumerate(sorted(pairs)):
+        spec = MatchSpec(round_number, match_number, stage='swiss')
+        spec.player1, spec.player2 = order[a], order[b]
+        specs.append(spec)
+    if bye is not None:
+        spec = MatchSpec(round_number, len(specs), stage='swiss')
+        spec.player1 = spec.winner = bye
+        specs.append(spec)
+    return specs
@@ -0,0 +1,84 @@
+"""
+Snapshot cache for tournament detail payloads.
+
+Entries are keyed by (tournament id, bracket_version). Anything that changes
+what TournamentSerializer renders bumps the version (Tournament.bump_version),
+so stale snapshots are never invalidated explicitly: they just stop being
+asked for and age out of the LRU.
+
+Lookups go to a small in-process LRU first and then, if configured, to a
+shared Django cache alias (LocMemCache locally, Redis/Memcached in production).
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class LRUCache:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return None
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class BracketCache:
+    def __init__(self, max_entries=256, shared_alias=None, timeout=3600):
+        self.local = LRUCache(max_entries)
+        self.shared_alias = shared_alias
+        self.timeout = timeout
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias] if self.shared_alias else None
+
+    def key(self, tournament_id, version):
+        return f"bracket:{tournament_id}:{version}"
+
+    def get(self, tournament_id, version):
+        key = self.key(tournament_id, version)
+        data = self.local.get(key)
+        if data is None and self.shared is not None:
+            data = self.shared.get(key)
+            if data is not None:
+                self.local.set(key, data)
+        return data
+
+    def set(self, tournament_id, version, data):
+        key = self.key(tournament_id, version)
+        self.local.set(key, data)
+        if self.shared is not None:
+            self.shared.set(key, data, self.timeout)
+
+    def clear(self):
+        self.local.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+
+_config = getattr(settings, 'BRACKET_CACHE', {})
+bracket_cache = BracketCache(
+    max_entries=_config.get('LOCAL_MAX_ENTRIES', 256),
+    shared_alias=_config.get('SHARED_ALIAS'),
+    timeout=_config.get('TIMEOUT', 3600),
+)
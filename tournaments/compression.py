@@ -0,0 +1,106 @@
+"""
+Negotiated response compression.
+
+CompressionMiddleware compresses JSON responses of at least MIN_SIZE bytes
+with brotli when the client accepts it and the brotli package is installed,
+and with gzip otherwise. Bracket payloads repeat the same keys and emails in
+every match, so they shrink by an order of magnitude. Smaller responses are
+left alone because compressing them costs more than it saves. So are streams
+(the live events feed must not be buffered) and responses that are already
+encoded, such as the stored gzip snapshots of finished tournaments.
+"""
+import gzip
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli
+    brotli = None
+
+DEFAULTS = {
+    'MIN_SIZE': 1024,
+    'CONTENT_TYPES': ('application/json',),
+    'GZIP_LEVEL': 6,
+    # 0-11; 5 compresses about as fast as gzip -6 and noticeably smaller.
+    'BROTLI_QUALITY': 5,
+}
+
+
+def config():
+    return {**DEFAULTS, **getattr(settings, 'COMPRESSION', {})}
+
+
+def negotiate(accept_encoding, encodings=('br', 'gzip')):
+    """The first of `encodings` (br only with brotli installed) the Accept-Encoding header allows, or None."""
+    accepted = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in encodings:
+        if encoding == 'br' and brotli is None:
+            continue
+        if accepted.get(encoding, accepted.get('*', 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compress(content, encoding, conf):
+    if encoding == 'br':
+        return brotli.compress(content, quality=conf['BROTLI_QUALITY'])
+    # mtime=0 keeps the output (and anything keyed on it) stable across requests.
+    return gzip.compress(content, conf['GZIP_LEVEL'], mtime=0)
+
+
+class CompressionMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.conf = config()
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self._compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self._compress(request, await self.get_response(request))
+
+    def _compress(self, request, response):
+        # Whatever the outcome, caches must key this URL on Accept-Encoding.
+        if not response.streaming and self._compressible(response):
+            patch_vary_headers(response, ['Accept-Encoding'])
+            if len(response.content) >= self.conf['MIN_SIZE']:
+                encoding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+                if encoding is not None:
+                    response.content = compress(response.content, encoding, self.conf)
+                    response['Content-Length'] = str(len(response.content))
+                    response['Content-Encoding'] = encoding
+                    # The bytes differ from the uncompressed representation, so a strong ETag must become weak.
+                    etag = response.get('ETag')
+                    if etag and etag.startswith('"'):
+                        response['ETag'] = 'W/' + etag
+        return response
+
+    def _compressible(self, response):
+        content_type = response.get('Content-Type', '').split(';')[0].strip()
+        return (
+            response.status_code == 200
+            and not response.has_header('Content-Encoding')
+            and content_type in self.conf['CONTENT_TYPES']
+            and 'no-transform' not in response.get('Cache-Control', '')
+        )
@@ -0,0 +1,94 @@
+"""
+Live bracket events.
+
+report_match publishes small diffs (match finished, player advanced,
+tournament finished) once its transaction commits; tournament_events streams
+them to browsers as server-sent events. Each event is encoded once and handed
+to every viewer's queue, so fan-out costs no database work per viewer.
+
+The broker is in-memory, i.e. scoped to one process. Viewers connected to a
+different worker process than the reporter will not see the event.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+
+class Subscription:
+    def __init__(self, broker, tournament_id, max_queue):
+        self.broker = broker
+        self.tournament_id = tournament_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.lagging = False
+
+    def push(self, frame):
+        # Always runs on self.loop.
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            # Slow consumer: drop instead of buffering without bound; the stream
+            # tells the client to refetch the bracket.
+            self.lagging = True
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InMemoryBroker:
+    def __init__(self, max_queue=100):
+        self.max_queue = max_queue
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, tournament_id):
+        """Must be called from the event loop that will consume the subscription."""
+        subscription = Subscription(self, tournament_id, self.max_queue)
+        with self._lock:
+            self._subscribers[tournament_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.tournament_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.tournament_id]
+
+    def viewer_count(self, tournament_id):
+        with self._lock:
+            return len(self._subscribers.get(tournament_id, ()))
+
+    def publish(self, tournament_id, events):
+        """Thread-safe; callable from sync views. Returns the number of viewers reached."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(tournament_id, ()))
+        if not subscribers:
+            return 0
+
+        frame = encode(events)
+        by_loop = defaultdict(list)
+        for subscription in subscribers:
+            by_loop[subscription.loop].append(subscription)
+        # One callback per event loop, not per viewer.
+        for loop, group in by_loop.items():
+            loop.call_soon_threadsafe(_deliver, group, frame)
+        return len(subscribers)
+
+
+def _deliver(subscriptions, frame):
+    for subscription in subscriptions:
+        subscription.push(frame)
+
+
+def encode(events):
+    """Renders a batch of events as one server-sent events chunk."""
+    return "".join(
+        f"event: {event['type']}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+        for event in events
+    ).encode()
+
+
+broker = InMemoryBroker()
@@ -0,0 +1,14 @@
+class TournamentError(ValueError):
+    """Base for rule violations raised by Tournament methods. Subclasses ValueError so existing callers keep working."""
+
+
+class TournamentNotOpen(TournamentError):
+    pass
+
+
+class NotEnoughParticipants(TournamentError):
+    pass
+
+
+class InvalidSponsorImage(ValueError):
+    """An uploaded sponsor logo that Pillow can't read."""
@@ -0,0 +1,93 @@
+"""
+Tournament list filters.
+
+TournamentSearchFilter ranks ?search= matches with PostgreSQL full-text search
+over Tournament.search_vector (name, then discipline, then description; kept
+current by a trigger and GIN-indexed, see migration 0013). It is OR-ed with a
+trigram word-similarity match on the name so typos still find the tournament.
+On other databases it falls back to the old icontains match on name and
+discipline, unranked.
+
+TournamentFilter narrows the list by ?status=, ?discipline= (comma-separated)
+and a start_time range (?start_after= / ?start_before=, ISO dates or datetimes).
+"""
+from datetime import datetime, time
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db import connections
+from django.db.models import DecimalField, ExpressionWrapper, F, Q, Value
+from django.db.models.functions import Cast
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+SEARCH_CONFIG = 'english'
+
+# Search cursor keys: rank * ID_SPAN + id, exact in numeric.
+POSITION = DecimalField(max_digits=40, decimal_places=6)
+ID_SPAN = 10 ** 18
+
+
+def _is_postgres(queryset):
+    return connections[queryset.db].vendor == 'postgresql'
+
+
+class TournamentSearchFilter(BaseFilterBackend):
+    search_param = 'search'
+
+    def get_search_term(self, request):
+        return request.query_params.get(self.search_param, '').strip()
+
+    def filter_queryset(self, request, queryset, view):
+        term = self.get_search_term(request)
+        if not term:
+            return queryset
+        if not _is_postgres(queryset):
+            return queryset.filter(Q(name__icontains=term) | Q(discipline__icontains=term))
+
+        query = SearchQuery(term, config=SEARCH_CONFIG, search_type='websearch')
+        return (
+            queryset.annotate(search_rank=SearchRank(F('search_vector'), query) + TrigramWordSimilarity(term, 'name'))
+            # CursorPagination only keys on the first ordering column, and a float rank neither round-trips
+            # exactly nor is unique. The rank, fixed to 6 decimals, shifted above the id gives one exact,
+            # unique numeric key: best match first, newest first among equal ranks.
+            .annotate(search_position=ExpressionWrapper(
+                Cast('search_rank', POSITION) * Value(ID_SPAN, output_field=POSITION) + F('id'), output_field=POSITION,
+            ))
+            .filter(Q(search_vector=query) | Q(name__trigram_word_similar=term))
+            .order_by('-search_position')
+        )
+
+    def get_ordering(self, request, queryset, view):
+        """Picked up by CursorPagination: best match first while searching, otherwise the view's order."""
+        if self.get_search_term(request) and _is_postgres(queryset):
+            return ('-search_position',)
+        return view.pagination_class.ordering
+
+
+class TournamentFilter(BaseFilterBackend):
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        for param in ('status', 'discipline'):
+            if params.get(param):
+                queryset = queryset.filter(**{f'{param}__in': params[param].split(',')})
+        for param, lookup in (('start_after', 'start_time__gte'), ('start_before', 'start_time__lt')):
+            if params.get(param):
+                queryset = queryset.filter(**{lookup: self._moment(param, params[param])})
+        return queryset
+
+    def _moment(self, param, value):
+        # The parsers return None for a malformed value but raise ValueError for an impossible one (2026-02-30).
+        try:
+            moment = parse_datetime(value)
+            day = parse_date(value) if moment is None else None
+        except ValueError:
+            moment = day = None
+        if moment is None:
+            if day is None:
+                raise ValidationError({param: ["Expected an ISO date or datetime."]})
+            moment = datetime.combine(day, time.min)
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment
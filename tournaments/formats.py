@@ -0,0 +1,82 @@
+"""
+Format engines behind Tournament.start_tournament.
+
+build() lays out the matches to create when the tournament starts. Round-based
+formats also implement next_round(), which Tournament.complete_stage() calls
+once every match so far has a winner; returning no specs finishes the tournament.
+champion() names the winner of a finished tournament from its match rows
+(round_number, player1, player2, winner, next_match).
+"""
+import math
+
+from . import bracket
+
+
+def _last_match_winner(history):
+    # Every elimination match feeds another one except the final (or grand final).
+    return next((row[3] for row in history if row[4] is None), None)
+
+
+def _standings_leader(seeds, history):
+    score, _, _ = bracket.swiss_standings(seeds, [row[1:4] for row in history])
+    return max(seeds, key=score.get, default=None)
+
+
+class SingleElimination:
+    round_based = False
+
+    def build(self, seeds, tournament):
+        return bracket.single_elimination(seeds)
+
+    def champion(self, seeds, history):
+        return _last_match_winner(history)
+
+
+class DoubleElimination:
+    round_based = False
+
+    def build(self, seeds, tournament):
+        return bracket.double_elimination(seeds)
+
+    def champion(self, seeds, history):
+        return _last_match_winner(history)
+
+
+class Swiss:
+    round_based = True
+
+    def rounds(self, count):
+        return max(1, math.ceil(math.log2(count)))
+
+    def build(self, seeds, tournament):
+        return bracket.swiss_round(seeds, [], 1)
+
+    def next_round(self, seeds, history):
+        played = max((row[0] for row in history), default=0)
+        if played >= self.rounds(len(seeds)):
+            return []
+        return bracket.swiss_round(seeds, [row[1:] for row in history], played + 1)
+
+    def champion(self, seeds, history):
+        return _standings_leader(seeds, history)
+
+
+class RoundRobin:
+    round_based = True
+
+    def build(self, seeds, tournament):
+        return bracket.round_robin(seeds, tournament.group_size)
+
+    def next_round(self, seeds, history):
+        return []
+
+    def champion(self, seeds, history):
+        return _standings_leader(seeds, history)
+
+
+FORMATS = {
+    'single_elimination': SingleElimination(),
+    'double_elimination': DoubleElimination(),
+    'swiss': Swiss(),
+    'round_robin': RoundRobin(),
+}
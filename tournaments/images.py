@@ -0,0 +1,152 @@
+"""
+Sponsor logo pipeline.
+
+Uploads reach the view as temporary files (settings.FILE_UPLOAD_HANDLERS), are
+hashed chunk by chunk and stored under their content hash, so a logo uploaded
+for several tournaments is written and processed once. Resized WebP variants
+are rendered off the request by a small thread pool after the transaction
+commits; until they exist, SponsorSerializer falls back to the original.
+Sponsors left without variants (e.g. the process stopped before the pool got to
+them) are picked up by the process_sponsor_images command.
+"""
+import hashlib
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from PIL import Image
+
+from .exceptions import InvalidSponsorImage
+from .models import Sponsor, Tournament
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    # Display heights to render; the first one is the 1x size in the srcset.
+    'HEIGHTS': (60, 120, 240),
+    'QUALITY': 80,
+    # 0 renders inline when the transaction commits (tests, one-off scripts).
+    'WORKERS': 2,
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def config():
+    return {**DEFAULTS, **getattr(settings, 'SPONSOR_IMAGES', {})}
+
+
+def content_hash(upload):
+    digest = hashlib.sha256()
+    for chunk in upload.chunks():
+        digest.update(chunk)
+    upload.seek(0)
+    return digest.hexdigest()
+
+
+def _check_image(upload):
+    try:
+        with Image.open(upload) as image:
+            image.verify()
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        raise InvalidSponsorImage(f"{upload.name} is not a supported image.")
+    finally:
+        upload.seek(0)
+
+
+def add_sponsors(tournament, uploads):
+    """
+    Stores `uploads` as sponsors of `tournament` with one INSERT and queues their
+    variants for after commit. Every file is checked before anything is written;
+    raises InvalidSponsorImage for the first unreadable one.
+    """
+    if not uploads:
+        return []
+    prepared = []
+    for upload in uploads:
+        _check_image(upload)
+        prepared.append((content_hash(upload), os.path.splitext(upload.name)[1].lower(), upload))
+
+    known = {
+        digest: (name, variants)
+        for digest, name, variants in Sponsor.objects.filter(content_hash__in=[p[0] for p in prepared])
+        .values_list('content_hash', 'image', 'variants')
+    }
+    sponsors = []
+    for digest, extension, upload in prepared:
+        if digest not in known:
+            name = default_storage.save(f"sponsor_logos/{digest[:2]}/{digest}{extension}", upload)
+            known[digest] = (name, [])
+        name, variants = known[digest]
+        sponsors.append(Sponsor(tournament=tournament, image=name, content_hash=digest, variants=variants))
+    Sponsor.objects.bulk_create(sponsors)
+
+    pending = sorted({sponsor.content_hash for sponsor in sponsors if not sponsor.variants})
+    if pending:
+        transaction.on_commit(partial(schedule_variants, pending))
+    return sponsors
+
+
+def schedule_variants(digests):
+    global _executor
+    workers = config()['WORKERS']
+    if not workers:
+        for digest in digests:
+            render_variants(digest)
+        return
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sponsor-images')
+    for digest in digests:
+        _executor.submit(_render_in_worker, digest)
+
+
+def _render_in_worker(digest):
+    try:
+        render_variants(digest)
+    except Exception:
+        logger.exception("Rendering sponsor image variants failed for %s", digest)
+    finally:
+        connection.close()
+
+
+def render_variants(digest):
+    """
+    Renders the WebP variants of one stored logo, records them on every sponsor
+    sharing it and bumps those tournaments so cached details pick them up.
+    """
+    name = Sponsor.objects.filter(content_hash=digest).values_list('image', flat=True).first()
+    if name is None:
+        return []
+    options = config()
+    variants = []
+    with default_storage.open(name) as f, Image.open(f) as image:
+        image.load()
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or 'A' in image.getbands() else 'RGB')
+        for height in options['HEIGHTS']:
+            variant = image.copy()
+            # Bounded by height only, never upscaled.
+            variant.thumbnail((image.width, height), Image.Resampling.LANCZOS)
+            path = f"sponsor_logos/variants/{digest[:2]}/{digest}-{height}.webp"
+            if not default_storage.exists(path):
+                buffer = io.BytesIO()
+                variant.save(buffer, 'WEBP', quality=options['QUALITY'])
+                path = default_storage.save(path, ContentFile(buffer.getvalue()))
+            variants.append({'name': path, 'width': variant.width, 'height': variant.height})
+
+    with transaction.atomic():
+        sponsors = Sponsor.objects.filter(content_hash=digest)
+        tournament_ids = set(sponsors.values_list('tournament_id', flat=True))
+        sponsors.update(variants=variants)
+        for tournament_id in tournament_ids:
+            Tournament.bump_version(tournament_id)
+    return variants
@@ -0,0 +1,31 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from tournaments.archival import archive_finished, candidates
+
+
+class Command(BaseCommand):
+    help = (
+        'Moves the matches and participants of finished tournaments untouched for --older-than days out of the '
+        'live tables into per-tournament archive rows. Archived tournaments keep being served as before.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=90, help='Days since the tournament last changed.')
+        parser.add_argument('--batch-size', type=int, default=100, help='Tournaments archived per transaction.')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the tournaments that would be archived.')
+
+    def handle(self, *args, **options):
+        if options['older_than'] < 0 or options['batch_size'] < 1:
+            raise CommandError("--older-than must be at least 0 and --batch-size at least 1.")
+        older_than = timedelta(days=options['older_than'])
+        if options['dry_run']:
+            self.stdout.write(f"{candidates(older_than).count()} tournaments would be archived.")
+            return
+        started = time.perf_counter()
+        log = (lambda line: self.stdout.write(f"   - {line}")) if options['verbosity'] > 1 else None
+        archived = archive_finished(older_than, options['batch_size'], log=log)
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {archived} tournaments in {time.perf_counter() - started:.1f}s."
+        ))
@@ -1,26 +1,107 @@
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
 from django.core.management.base import BaseCommand
+from django.db import connection, transaction
 from django.utils import timezone
+from tournaments.exceptions import NotEnoughParticipants, TournamentError
 from tournaments.models import Tournament
 
+logger = logging.getLogger(__name__)
+
+
 class Command(BaseCommand):
     help = 'Auto-starts tournaments whose deadline has passed.'
 
-    def handle(self, *args, **kwargs):
-        now = timezone.now()
-        # Find Open tournaments where Deadline < Now
-        tournaments = Tournament.objects.filter(status='open', deadline__lte=now)
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Threads claiming and starting tournaments.')
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many claims.')
+
+    def handle(self, *args, **options):
+        # Rows are claimed one at a time with SELECT ... FOR UPDATE SKIP LOCKED and
+        # started inside the claiming transaction, so overlapping runs (or several
+        # copies of this command) never pick the same tournament twice.
+        self.now = timezone.now()
+        self.remaining = options['limit']
+        self.outcomes = Counter()
+        # Tournaments that failed to start stay open and due; they are not claimed again in this run.
+        self.failed = set()
+        self._lock = threading.Lock()
+        workers = max(1, options['workers'])
+        if workers > 1 and not connection.features.has_select_for_update_skip_locked:
+            self.stdout.write(self.style.WARNING("Database has no SKIP LOCKED support; running with 1 worker."))
+            workers = 1
+
+        started = time.perf_counter()
+        if workers == 1:
+            self._work()
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for future in [pool.submit(self._threaded_work) for _ in range(workers)]:
+                    future.result()
+        elapsed = time.perf_counter() - started
+
+        claimed = sum(self.outcomes.values())
+        self.stdout.write(
+            f"Claimed {claimed} tournaments in {elapsed:.2f}s with {workers} workers "
+            f"({claimed / elapsed if elapsed else 0:.1f}/s): "
+            f"{self.outcomes['started']} started, {self.outcomes['cancelled']} cancelled, "
+            f"{self.outcomes['failed']} failed."
+        )
+
+    def _threaded_work(self):
+        try:
+            self._work()
+        finally:
+            connection.close()
+
+    def _work(self):
+        while self._take_slot():
+            with self._lock:
+                failed = list(self.failed)
+            with transaction.atomic():
+                t = (
+                    Tournament.objects.select_for_update(skip_locked=True)
+                    .filter(status='open', deadline__lte=self.now)
+                    .exclude(pk__in=failed)
+                    .order_by('deadline', 'id')
+                    .first()
+                )
+                if t is None:
+                    return
+                outcome = self._start(t)
+            with self._lock:
+                self.outcomes[outcome] += 1
+                if outcome == 'failed':
+                    self.failed.add(t.pk)
 
-        self.stdout.write(f"Checking {len(tournaments)} tournaments due for start...")
+    def _take_slot(self):
+        if self.remaining is None:
+            return True
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
 
-        for t in tournaments:
-            try:
-                self.stdout.write(f"Attempting to start: {t.name}...")
+    def _start(self, t):
+        try:
+            with transaction.atomic():
                 t.start_tournament()
-                self.stdout.write(self.style.SUCCESS(f"Successfully started: {t.name}"))
-            except ValueError as e:
-                # If start fails (e.g. < 2 players), we might want to cancel it
-                self.stdout.write(self.style.WARNING(f"Failed to start {t.name}: {e}"))
-                if "least 2 teams" in str(e):
-                     t.status = 'cancelled'
-                     t.save()
-                     self.stdout.write(self.style.ERROR(f"Cancelled {t.name} due to lack of players."))
\ No newline at end of file
+        except NotEnoughParticipants as e:
+            Tournament.bump_version(t.pk, expected_status='open', status='cancelled')
+            self.stdout.write(self.style.WARNING(f"Cancelled {t.name}: {e}"))
+            return 'cancelled'
+        except TournamentError as e:
+            self.stdout.write(self.style.ERROR(f"Failed to start {t.name}: {e}"))
+            return 'failed'
+        except Exception as e:
+            # A bad row must not stop the run; its changes were rolled back with the savepoint.
+            logger.exception("Auto-starting tournament %s failed", t.pk)
+            self.stdout.write(self.style.ERROR(f"Failed to start {t.name}: {e!r}"))
+            return 'failed'
+        self.stdout.write(self.style.SUCCESS(f"Started {t.name}"))
+        return 'started'
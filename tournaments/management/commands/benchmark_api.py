@@ -0,0 +1,241 @@
+import json
+import platform
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from tournaments.cache import bracket_cache
+from tournaments.models import BULK_BATCH_SIZE, Tournament, Participant, Match
+from tournaments.views import TournamentViewSet
+
+
+class Rollback(Exception):
+    pass
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Times the list, detail, join, start, report and history endpoints against the current database '
+        'and writes p50/p99 latency and query counts as JSON. Its own fixtures are rolled back.'
+    )
+
+    ENDPOINTS = ('list', 'detail', 'join', 'start', 'report', 'history')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help='Requests per endpoint.')
+        parser.add_argument('--bracket-size', type=int, default=64)
+        parser.add_argument('--endpoints', nargs='+', choices=self.ENDPOINTS, default=list(self.ENDPOINTS))
+        parser.add_argument('--cold', action='store_true', help='Clear the detail snapshot cache before every detail request.')
+        parser.add_argument('--output', help='Write the results to this JSON file.')
+        parser.add_argument('--compare', help='A previous --output file to print p50/p99 changes against.')
+
+    def handle(self, *args, **options):
+        if options['bracket_size'] < 2:
+            raise CommandError("--bracket-size must be at least 2.")
+        self.factory = APIRequestFactory()
+        self.iterations = options['iterations']
+        self.bracket_size = options['bracket_size']
+        self.cold = options['cold']
+
+        results = {}
+        try:
+            # Requests are built by APIRequestFactory (host "testserver"); pagination links need it allowed.
+            with override_settings(ALLOWED_HOSTS=['testserver']), transaction.atomic():
+                self._setup()
+                for endpoint in options['endpoints']:
+                    samples = getattr(self, f'_bench_{endpoint}')()
+                    results[endpoint] = self._summarize(samples)
+                raise Rollback()
+        except Rollback:
+            pass
+        finally:
+            bracket_cache.clear()
+
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'iterations': self.iterations,
+            'bracket_size': self.bracket_size,
+            'dataset': {
+                'users': get_user_model().objects.count(),
+                'tournaments': Tournament.objects.count(),
+                'participants': Participant.objects.count(),
+                'matches': Match.objects.count(),
+            },
+            'endpoints': results,
+        }
+        self._print(report, options['compare'])
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    # --- fixtures -----------------------------------------------------------
+
+    def _setup(self):
+        User = get_user_model()
+        prefix = f"bench_{int(time.time())}"
+        count = max(self.iterations, self.bracket_size)
+        self.users = User.objects.bulk_create([
+            User(username=f"{prefix}_{i}", email=f"{prefix}_{i}@bench.local", password='!')
+            for i in range(count)
+        ], batch_size=BULK_BATCH_SIZE)
+        self.organizer = self.users[0]
+        self.prefix = prefix
+
+    def _tournament(self, name, players=(), **kwargs):
+        defaults = {
+            'name': f"{self.prefix} {name}",
+            'organizer': self.organizer,
+            'start_time': timezone.now() + timedelta(days=1),
+            'deadline': timezone.now() + timedelta(hours=1),
+            'max_participants': self.bracket_size,
+            'participant_count': len(players),
+        }
+        defaults.update(kwargs)
+        tournament = Tournament.objects.create(**defaults)
+        Participant.objects.bulk_create([
+            Participant(tournament=tournament, user=user, team_name=user.username,
+                        license_number=user.username, ranking_points=i)
+            for i, user in enumerate(players)
+        ], batch_size=BULK_BATCH_SIZE)
+        return tournament
+
+    def _started(self, name):
+        tournament = self._tournament(name, self.users[:self.bracket_size])
+        tournament.start_tournament()
+        return tournament
+
+    # --- measurement --------------------------------------------------------
+
+    def _call(self, actions, method, path, user=None, data=None, **kwargs):
+        if method == 'post':
+            request = self.factory.post(path, data, format='json')
+        else:
+            request = self.factory.get(path)
+        if user is not None:
+            force_authenticate(request, user=user)
+        view = TournamentViewSet.as_view(actions)
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            response = view(request, **kwargs)
+            response.render()
+            elapsed = time.perf_counter() - started
+        if response.status_code >= 400:
+            raise CommandError(f"{method.upper()} {path} returned {response.status_code}: {response.content[:200]!r}")
+        return elapsed, len(ctx.captured_queries)
+
+    def _bench_list(self):
+        return [
+            self._call({'get': 'list'}, 'get', '/api/tournaments/')
+            for _ in range(self.iterations)
+        ]
+
+    def _bench_detail(self):
+        tournament = self._started('detail')
+        samples = []
+        for _ in range(self.iterations):
+            if self.cold:
+                bracket_cache.clear()
+            samples.append(self._call({'get': 'retrieve'}, 'get', f'/api/tournaments/{tournament.id}/', pk=tournament.id))
+        return samples
+
+    def _bench_join(self):
+        tournament = self._tournament('join', max_participants=self.iterations)
+        return [
+            self._call({'post': 'join'}, 'post', f'/api/tournaments/{tournament.id}/join/', user=user, pk=tournament.id, data={
+                'team_name': user.username, 'license_number': user.username,
+                'ranking_points': 0, 'teammates_names': '',
+            })
+            for user in self.users[:self.iterations]
+        ]
+
+    def _bench_start(self):
+        samples = []
+        for i in range(self.iterations):
+            tournament = self._tournament(f'start {i}', self.users[:self.bracket_size])
+            samples.append(self._call({'post': 'start'}, 'post', f'/api/tournaments/{tournament.id}/start/',
+                                      user=self.organizer, pk=tournament.id))
+        return samples
+
+    def _bench_report(self):
+        # Both captains vote, so every match costs two timed requests.
+        samples = []
+        tournament = None
+        while len(samples) < self.iterations:
+            if tournament is None:
+                tournament = self._started(f'report {len(samples)}')
+            match = (
+                tournament.matches.filter(winner__isnull=True, player1__isnull=False, player2__isnull=False)
+                .select_related('player1', 'player2').order_by('round_number', 'match_number').first()
+            )
+            if match is None:
+                tournament = None
+                continue
+            path = f'/api/tournaments/{tournament.id}/matches/{match.id}/report/'
+            for voter in (match.player1, match.player2):
+                samples.append(self._call({'post': 'report_match'}, 'post', path, user=voter,
+                                          data={'winner_slot': 'player1'}, pk=tournament.id, match_id=match.id))
+        return samples[:self.iterations]
+
+    def _bench_history(self):
+        self._started('history')
+        user = self.users[0]
+        return [
+            self._call({'get': 'user_history'}, 'get', f'/api/tournaments/history/?username={user.username}')
+            for _ in range(self.iterations)
+        ]
+
+    # --- reporting ----------------------------------------------------------
+
+    def _summarize(self, samples):
+        latencies = [elapsed * 1000 for elapsed, _ in samples]
+        queries = [count for _, count in samples]
+        return {
+            'requests': len(samples),
+            'p50_ms': round(percentile(latencies, 0.50), 2),
+            'p90_ms': round(percentile(latencies, 0.90), 2),
+            'p99_ms': round(percentile(latencies, 0.99), 2),
+            'max_ms': round(max(latencies), 2),
+            'mean_ms': round(sum(latencies) / len(latencies), 2),
+            'queries_p50': percentile(queries, 0.50),
+            'queries_max': max(queries),
+        }
+
+    def _print(self, report, compare):
+        baseline = {}
+        if compare:
+            with open(compare) as f:
+                baseline = json.load(f).get('endpoints', {})
+
+        self.stdout.write(
+            f"{'endpoint':<10} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'queries':>8}"
+            + (f" {'Δp50':>8} {'Δp99':>8}" if baseline else "")
+        )
+        for endpoint, row in report['endpoints'].items():
+            line = (
+                f"{endpoint:<10} {row['p50_ms']:>9.2f} {row['p99_ms']:>9.2f} {row['max_ms']:>9.2f} "
+                f"{row['queries_p50']:>4}/{row['queries_max']:<3}"
+            )
+            previous = baseline.get(endpoint)
+            if previous:
+                line += f" {self._change(row['p50_ms'], previous['p50_ms']):>8} {self._change(row['p99_ms'], previous['p99_ms']):>8}"
+            self.stdout.write(line)
+
+    @staticmethod
+    def _change(current, previous):
+        if not previous:
+            return 'n/a'
+        return f"{(current - previous) / previous * 100:+.0f}%"
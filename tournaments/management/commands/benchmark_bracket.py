@@ -0,0 +1,59 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from datetime import timedelta
+from tournaments.models import Tournament, Participant
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Measures query count and wall time of start_tournament for growing bracket sizes. Nothing is kept in the database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[8, 16, 64, 256, 1024, 4096])
+        parser.add_argument('--format', default='single_elimination', choices=[key for key, _ in Tournament.FORMAT_CHOICES])
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'participants':>12} {'matches':>8} {'queries':>8} {'ms':>10}")
+        for size in options['sizes']:
+            try:
+                with transaction.atomic():
+                    matches, queries, elapsed = self._run(size, options['format'])
+                    raise Rollback()
+            except Rollback:
+                pass
+            self.stdout.write(f"{size:>12} {matches:>8} {queries:>8} {elapsed * 1000:>10.1f}")
+
+    def _run(self, size, format):
+        User = get_user_model()
+        users = User.objects.bulk_create([
+            User(username=f"bench_{size}_{i}", email=f"bench_{size}_{i}@bench.local", password='!')
+            for i in range(size)
+        ])
+        organizer = users[0]
+        tournament = Tournament.objects.create(
+            name=f"Benchmark {size}",
+            organizer=organizer,
+            start_time=timezone.now() + timedelta(days=1),
+            deadline=timezone.now(),
+            max_participants=size,
+            format=format,
+        )
+        Participant.objects.bulk_create([
+            Participant(tournament=tournament, user=user, team_name=user.username, license_number=user.username, ranking_points=i)
+            for i, user in enumerate(users)
+        ])
+
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            tournament.start_tournament()
+            elapsed = time.perf_counter() - started
+
+        return tournament.matches.count(), len(ctx.captured_queries), elapsed
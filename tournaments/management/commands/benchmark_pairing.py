@@ -0,0 +1,35 @@
+import math
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from tournaments.bracket import swiss_round
+
+
+class Command(BaseCommand):
+    help = 'Times Swiss pairing generation per round for growing field sizes (in memory, no database).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[16, 64, 256, 512, 1024, 2048])
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for simulated results.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        self.stdout.write(f"{'players':>8} {'rounds':>7} {'avg ms':>9} {'max ms':>9} {'rematches':>10}")
+        for size in options['sizes']:
+            seeds = list(range(1, size + 1))
+            history = []
+            timings = []
+            for round_number in range(1, math.ceil(math.log2(size)) + 1):
+                started = time.perf_counter()
+                specs = swiss_round(seeds, history, round_number)
+                timings.append(time.perf_counter() - started)
+                for spec in specs:
+                    winner = spec.winner or rng.choice((spec.player1, spec.player2))
+                    history.append((spec.player1, spec.player2, winner))
+
+            pairs = [frozenset((p1, p2)) for p1, p2, _ in history if p2 is not None]
+            self.stdout.write(
+                f"{size:>8} {len(timings):>7} {sum(timings) / len(timings) * 1000:>9.1f} "
+                f"{max(timings) * 1000:>9.1f} {len(pairs) - len(set(pairs)):>10}"
+            )
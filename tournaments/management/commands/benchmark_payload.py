@@ -0,0 +1,115 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from tournaments import compression
+from tournaments.models import BULK_BATCH_SIZE, Match, Participant, Tournament
+from tournaments.renderers import FastJSONRenderer, orjson
+from tournaments.serializers import TournamentSerializer, normalize_bracket
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures the size and encode time of a finished single-elimination bracket detail for each payload shape, '
+        'renderer and content encoding. Nothing is kept in the database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=256, help='Players in the bracket.')
+        parser.add_argument('--iterations', type=int, default=20, help='Runs per measurement; the median is reported.')
+        parser.add_argument('--bandwidth', type=float, default=10.0, help='Link speed in Mbit/s for the transfer estimate.')
+
+    def handle(self, *args, **options):
+        if options['size'] < 2 or options['iterations'] < 1:
+            raise CommandError("--size must be at least 2 and --iterations at least 1.")
+        self.iterations = options['iterations']
+        try:
+            with transaction.atomic():
+                data = self._bracket(options['size'])
+                raise Rollback()
+        except Rollback:
+            pass
+
+        shapes = {'standard': data, 'normalized': normalize_bracket(data)}
+        renderers = {'json': JSONRenderer()}
+        if orjson is not None:
+            renderers['orjson'] = FastJSONRenderer()
+        encodings = ['identity', 'gzip'] + (['br'] if compression.brotli is not None else [])
+        conf = compression.config()
+
+        rows = []
+        for shape, payload in shapes.items():
+            for renderer_name, renderer in renderers.items():
+                body, render_ms = self._time(renderer.render, payload)
+                for encoding in encodings:
+                    if encoding == 'identity':
+                        sent, encode_ms = body, 0.0
+                    else:
+                        sent, encode_ms = self._time(compression.compress, body, encoding, conf)
+                    transfer_ms = len(sent) * 8 / (options['bandwidth'] * 1000)
+                    rows.append((shape, renderer_name, encoding, len(sent), render_ms, encode_ms, transfer_ms))
+
+        baseline = rows[0]
+        self.stdout.write(
+            f"{options['size']} players, {len(data['matches'])} matches; transfer at {options['bandwidth']:g} Mbit/s\n"
+            f"{'shape':<11} {'renderer':<8} {'encoding':<9} {'bytes':>9} {'render ms':>10} {'encode ms':>10} "
+            f"{'transfer ms':>12} {'total ms':>9} {'bytes saved':>12}"
+        )
+        for shape, renderer_name, encoding, size, render_ms, encode_ms, transfer_ms in rows:
+            total = render_ms + encode_ms + transfer_ms
+            saved = 1 - size / baseline[3]
+            self.stdout.write(
+                f"{shape:<11} {renderer_name:<8} {encoding:<9} {size:>9} {render_ms:>10.2f} {encode_ms:>10.2f} "
+                f"{transfer_ms:>12.1f} {total:>9.1f} {saved:>11.0%}"
+            )
+        if orjson is None or compression.brotli is None:
+            self.stdout.write("Install orjson and brotli to include them in the comparison.")
+
+    def _time(self, function, *args):
+        """Median wall time in ms of `iterations` calls, and the last result."""
+        timings = []
+        for _ in range(self.iterations):
+            started = time.perf_counter()
+            result = function(*args)
+            timings.append((time.perf_counter() - started) * 1000)
+        return result, sorted(timings)[len(timings) // 2]
+
+    def _bracket(self, size):
+        """Serialized detail of a finished bracket: every match decided, the higher seed always winning."""
+        User = get_user_model()
+        prefix = f"payload_{int(time.time())}"
+        users = User.objects.bulk_create([
+            User(username=f"{prefix}_{i}", email=f"{prefix}_{i}@bench.local", password='!')
+            for i in range(size)
+        ], batch_size=BULK_BATCH_SIZE)
+        tournament = Tournament.objects.create(
+            name=f"Payload {size}", organizer=users[0],
+            start_time=timezone.now() + timedelta(days=1), deadline=timezone.now(),
+            max_participants=size, participant_count=size,
+        )
+        Participant.objects.bulk_create([
+            Participant(tournament=tournament, user=user, team_name=user.username,
+                        license_number=user.username, ranking_points=size - i)
+            for i, user in enumerate(users)
+        ], batch_size=BULK_BATCH_SIZE)
+        tournament.start_tournament()
+
+        matches = {match.id: match for match in tournament.matches.order_by('round_number', 'match_number')}
+        for match in matches.values():
+            if match.winner_id is None:
+                match.winner_id = min(match.player1_id, match.player2_id)
+            if match.next_match_id:
+                setattr(matches[match.next_match_id], f'{match.next_slot}_id', match.winner_id)
+        Match.objects.bulk_update(list(matches.values()), ['player1', 'player2', 'winner'], batch_size=BULK_BATCH_SIZE)
+        Tournament.objects.filter(pk=tournament.pk).update(status='finished')
+
+        tournament = Tournament.objects.defer('search_vector').with_bracket().get(pk=tournament.pk)
+        return TournamentSerializer(tournament).data
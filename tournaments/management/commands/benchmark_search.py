@@ -0,0 +1,120 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from tournaments.filters import TournamentSearchFilter
+from tournaments.models import Tournament
+from tournaments.views import TournamentViewSet
+
+
+class Rollback(Exception):
+    pass
+
+
+ADJECTIVES = ['Winter', 'Summer', 'Spring', 'Autumn', 'Midnight', 'Hextech', 'Legendary', 'Grand', 'Rookie', 'Masters']
+NOUNS = ['Clash', 'Cup', 'Invitational', 'Open', 'Finals', 'Showdown', 'Brawl', 'Championship', 'Series', 'Arena']
+REGIONS = ['EUW', 'NA', 'KR', 'BR', 'OCE', 'LAN', 'EUNE', 'JP', 'TR', 'VN']
+BLURBS = [
+    'Best of one until the semifinals.', 'Captains report results.', 'Streamed on the main channel.',
+    'Amateur teams only.', 'Prize pool for the top four.', 'Draft pick with bans.',
+]
+
+DEFAULT_TERMS = ['clash', 'hextech finals', 'invitational kr', 'howling abyss', 'champoinship']
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the old icontains search with the full-text search on a large generated tournament table. '
+        'PostgreSQL only; the generated rows are rolled back unless --keep is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000)
+        parser.add_argument('--terms', nargs='+', default=DEFAULT_TERMS)
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per term; the median is reported.')
+        parser.add_argument('--explain', action='store_true', help='Print EXPLAIN ANALYZE for both plans.')
+        parser.add_argument('--keep', action='store_true', help="Keep the generated rows.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("Full-text search only exists on PostgreSQL.")
+        try:
+            with transaction.atomic():
+                self._generate(options['rows'])
+                self._compare(options['terms'], options['repeat'], options['explain'])
+                if not options['keep']:
+                    raise Rollback()
+        except Rollback:
+            pass
+
+    def _generate(self, rows):
+        organizer = get_user_model().objects.order_by('id').first()
+        if organizer is None:
+            raise CommandError("Create a user first (e.g. run seed_data).")
+        self.stdout.write(f"Generating {rows} tournaments...")
+        started = time.perf_counter()
+        with connection.cursor() as cursor:
+            # Set-based insert; the search trigger fills search_vector for every row.
+            cursor.execute(
+                f"""
+                INSERT INTO {Tournament._meta.db_table}
+                    (name, description, discipline, format, group_size, organizer_id, start_time, deadline,
+                     max_participants, participant_count, location_url, status, created_at, updated_at, bracket_version)
+                SELECT
+                    (%(adjectives)s::text[])[1 + i %% 10] || ' ' || (%(nouns)s::text[])[1 + (i / 10) %% 10]
+                        || ' ' || (%(regions)s::text[])[1 + (i / 100) %% 10] || ' #' || i,
+                    (%(blurbs)s::text[])[1 + i %% 6],
+                    CASE WHEN i %% 3 = 0 THEN '1v1_howling_abyss' ELSE '5v5_summoners_rift' END,
+                    'single_elimination', 4, %(organizer)s,
+                    now() + (i %% 720 - 360) * interval '1 day',
+                    now() + (i %% 720 - 361) * interval '1 day',
+                    16, 0, NULL,
+                    (ARRAY['open', 'ongoing', 'finished', 'cancelled'])[1 + i %% 4],
+                    now() - i * interval '1 minute', now(), 0
+                FROM generate_series(1, %(rows)s) AS i
+                """,
+                {
+                    'adjectives': ADJECTIVES, 'nouns': NOUNS, 'regions': REGIONS, 'blurbs': BLURBS,
+                    'organizer': organizer.pk, 'rows': rows,
+                },
+            )
+            cursor.execute(f"ANALYZE {Tournament._meta.db_table}")
+        self.stdout.write(f"  done in {time.perf_counter() - started:.1f}s")
+
+    def _old_page(self, term):
+        # What DRF SearchFilter on name/discipline plus PageNumberPagination used to run.
+        matches = Tournament.objects.filter(Q(name__icontains=term) | Q(discipline__icontains=term))
+        return matches.count(), matches.order_by('-created_at', '-id')[:10]
+
+    def _new_page(self, term):
+        request = Request(APIRequestFactory().get('/api/tournaments/', {'search': term}))
+        queryset = TournamentSearchFilter().filter_queryset(request, Tournament.objects.defer('search_vector'), TournamentViewSet)
+        return None, queryset[:11]
+
+    def _compare(self, terms, repeat, explain):
+        self.stdout.write(f"{'term':<20} {'old ms':>9} {'new ms':>9} {'speedup':>8} {'old hits':>9} {'top result (new)':<40}")
+        for term in terms:
+            old_ms, old_count, _ = self._time(self._old_page, term, repeat)
+            new_ms, _, top = self._time(self._new_page, term, repeat)
+            self.stdout.write(
+                f"{term:<20} {old_ms:>9.1f} {new_ms:>9.1f} {old_ms / new_ms if new_ms else 0:>7.1f}x "
+                f"{old_count:>9} {top[0].name if top else '-':<40}"
+            )
+            if explain:
+                for label, page in (('old', self._old_page), ('new', self._new_page)):
+                    self.stdout.write(f"-- {label}: {term}")
+                    self.stdout.write(page(term)[1].explain(analyze=True))
+
+    def _time(self, page, term, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            count, rows = page(term)
+            rows = list(rows)
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), count, rows
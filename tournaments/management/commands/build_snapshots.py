@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from tournaments.snapshots import backfill
+
+
+class Command(BaseCommand):
+    help = (
+        'Renders the stored detail snapshot of finished tournaments that have none or an outdated one '
+        '(backfill after deploying snapshots, or after changing what the detail renders).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Tournaments rendered per pass.')
+        parser.add_argument('--force', action='store_true', help='Re-render every finished tournament.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        started = time.perf_counter()
+        log = (lambda line: self.stdout.write(f"   - {line}")) if options['verbosity'] > 1 else None
+        rendered = backfill(options['batch_size'], force=options['force'], log=log)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered {rendered} snapshots in {time.perf_counter() - started:.1f}s."
+        ))
@@ -0,0 +1,75 @@
+import signal
+import threading
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from tournaments.notifications import Worker, config
+
+
+class Command(BaseCommand):
+    help = 'Delivers queued notifications (email, webhooks, in-app feed) from the outbox with a pool of workers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Threads claiming and delivering batches.')
+        parser.add_argument('--batch-size', type=int, default=None, help="Rows per claim (default NOTIFICATIONS['BATCH_SIZE']).")
+        parser.add_argument('--once', action='store_true', help='Exit when nothing is due instead of polling.')
+        parser.add_argument('--idle-sleep', type=float, default=1.0, help='Seconds to wait when nothing is due.')
+
+    def handle(self, *args, **options):
+        self.conf = config()
+        if options['batch_size']:
+            self.conf['BATCH_SIZE'] = options['batch_size']
+        self.once = options['once']
+        self.idle_sleep = options['idle_sleep']
+        self.handled = 0
+        self._lock = threading.Lock()
+        workers = max(1, options['workers'])
+        if workers > 1 and not connection.features.has_select_for_update_skip_locked:
+            self.stdout.write(self.style.WARNING("Database has no SKIP LOCKED support; running with 1 worker."))
+            workers = 1
+
+        # Set on Ctrl-C / SIGTERM or when a worker dies; workers finish their batch and return.
+        self.stop = threading.Event()
+        previous_handler = signal.signal(signal.SIGTERM, lambda signum, frame: self.stop.set())
+        started = time.perf_counter()
+        try:
+            if workers == 1:
+                self._work()
+            else:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    futures = [pool.submit(self._threaded_work) for _ in range(workers)]
+                    try:
+                        done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+                    finally:
+                        self.stop.set()
+                    for future in done:
+                        if future.exception() is not None:
+                            raise CommandError(f"A worker crashed: {future.exception()!r}") from future.exception()
+        except KeyboardInterrupt:
+            self.stop.set()
+        finally:
+            signal.signal(signal.SIGTERM, previous_handler)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"Handled {self.handled} outbox rows in {elapsed:.2f}s with {workers} workers.")
+
+    def _threaded_work(self):
+        try:
+            self._work()
+        finally:
+            connection.close()
+
+    def _work(self):
+        worker = Worker(self.conf)
+        try:
+            while not self.stop.is_set():
+                handled = worker.run_once()
+                with self._lock:
+                    self.handled += handled
+                if not handled:
+                    if self.once:
+                        return
+                    self.stop.wait(self.idle_sleep)
+        finally:
+            worker.close()
@@ -0,0 +1,44 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+from tournaments.models import Tournament, Participant, Match
+
+
+class Command(BaseCommand):
+    help = 'Prints EXPLAIN plans for the hot tournament queries so index regressions are visible.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--analyze', action='store_true', help='EXPLAIN ANALYZE (PostgreSQL only; runs the queries).')
+
+    def handle(self, *args, **options):
+        tournament = Tournament.objects.order_by('-id').first()
+        tournament_id = tournament.id if tournament else 0
+        user = get_user_model().objects.order_by('-id').first()
+        user_id = user.id if user else 0
+        match = Match.objects.order_by('-id').first()
+        match_id = match.id if match else 0
+
+        queries = {
+            # A cursor page: keyset condition instead of OFFSET, one extra row to detect the next page.
+            'tournament list': Tournament.objects.filter(created_at__lte=timezone.now()).order_by('-created_at', '-id')[:11],
+            'autostart due tournaments': Tournament.objects.filter(status='open', deadline__lte=timezone.now()),
+            'history (active)': Tournament.objects.filter(
+                participants__user_id=user_id, status__in=['open', 'ongoing'],
+            ).order_by('start_time', 'id')[:10],
+            'history (past)': Tournament.objects.filter(
+                participants__user_id=user_id, status='finished',
+            ).order_by('-start_time', '-id')[:10],
+            'seeding': Participant.objects.filter(tournament_id=tournament_id).order_by('-ranking_points').values('user_id'),
+            'bracket': Match.objects.filter(tournament_id=tournament_id),
+            'report_match lookup': Match.objects.filter(id=match_id, tournament_id=tournament_id),
+        }
+
+        explain_options = {}
+        if options['analyze'] and connection.vendor == 'postgresql':
+            explain_options = {'analyze': True, 'buffers': True}
+
+        for name, queryset in queries.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"== {name}"))
+            self.stdout.write(queryset.explain(**explain_options))
+            self.stdout.write("")
@@ -0,0 +1,35 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from tournaments.transfer import ArchiveError, import_archive
+from tournaments.management.commands.export_tournaments import open_archive
+
+
+class Command(BaseCommand):
+    help = (
+        'Loads an export_tournaments archive under new ids, all or nothing. Players are matched by email; '
+        'unknown ones are created without a usable password. Sponsor image files are not in the archive.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help="Archive path ('.gz' is decompressed, '-' reads stdin).")
+        parser.add_argument('--batch-size', type=int, default=500, help='Tournaments inserted per batch.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        started = time.perf_counter()
+        source = open_archive(options['input'], 'r')
+        try:
+            counts = import_archive(source or sys.stdin, batch_size=options['batch_size'])
+        except ArchiveError as e:
+            raise CommandError(f"Import failed, nothing was written: {e}")
+        finally:
+            if source is not None:
+                source.close()
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {counts['tournament']} tournaments, {counts['participant']} participants, "
+            f"{counts['match']} matches, {counts['sponsor']} sponsors and {counts['user']} new users "
+            f"in {time.perf_counter() - started:.1f}s. Run rebuild_player_stats to include them in the leaderboard."
+        ))
@@ -0,0 +1,72 @@
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from tournaments.models import Tournament
+from tournaments.views import TournamentViewSet
+
+
+class Command(BaseCommand):
+    help = 'Fires concurrent join requests at one tournament and checks that it never overfills. Needs PostgreSQL for real concurrency.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--joins', type=int, default=2000)
+        parser.add_argument('--slots', type=int, default=16)
+        parser.add_argument('--workers', type=int, default=64)
+        parser.add_argument('--keep', action='store_true', help="Don't delete the generated users and tournament.")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        prefix = f"loadtest_{int(time.time())}"
+        users = User.objects.bulk_create([
+            User(username=f"{prefix}_{i}", email=f"{prefix}_{i}@loadtest.local", password='!')
+            for i in range(options['joins'])
+        ])
+        tournament = Tournament.objects.create(
+            name=prefix,
+            organizer=users[0],
+            start_time=timezone.now() + timedelta(days=1),
+            deadline=timezone.now() + timedelta(hours=1),
+            max_participants=options['slots'],
+        )
+
+        factory = APIRequestFactory()
+        view = TournamentViewSet.as_view({'post': 'join'})
+
+        def join(user):
+            request = factory.post(f'/api/tournaments/{tournament.id}/join/', {
+                'team_name': user.username,
+                'license_number': user.username,
+                'ranking_points': 0,
+                'teammates_names': '',
+            }, format='json')
+            force_authenticate(request, user=user)
+            try:
+                return view(request, pk=tournament.id).status_code
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            statuses = Counter(pool.map(join, users))
+        elapsed = time.perf_counter() - started
+
+        tournament.refresh_from_db()
+        registered = tournament.participants.count()
+        self.stdout.write(f"{options['joins']} joins in {elapsed:.2f}s ({options['joins'] / elapsed:.0f}/s), statuses: {dict(statuses)}")
+        self.stdout.write(f"participants: {registered}, participant_count: {tournament.participant_count}, slots: {tournament.max_participants}")
+
+        if not options['keep']:
+            tournament.delete()
+            User.objects.filter(username__startswith=prefix).delete()
+
+        expected = min(options['joins'], tournament.max_participants)
+        if registered != expected or tournament.participant_count != expected or statuses[201] != expected:
+            raise CommandError("Tournament overfilled or seat counter out of sync.")
+        self.stdout.write(self.style.SUCCESS("No overfill."))
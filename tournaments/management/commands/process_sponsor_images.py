@@ -0,0 +1,35 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from tournaments.images import content_hash, render_variants
+from tournaments.models import Sponsor
+
+
+class Command(BaseCommand):
+    help = 'Hashes legacy sponsor logos and renders missing WebP variants (e.g. after a restart dropped queued work).'
+
+    def handle(self, *args, **options):
+        hashed = 0
+        for sponsor in Sponsor.objects.filter(content_hash='').only('id', 'image').iterator():
+            try:
+                with default_storage.open(sponsor.image.name) as f:
+                    digest = content_hash(f)
+            except FileNotFoundError:
+                self.stdout.write(self.style.WARNING(f"Sponsor {sponsor.id}: {sponsor.image.name} is missing."))
+                continue
+            Sponsor.objects.filter(pk=sponsor.pk).update(content_hash=digest)
+            hashed += 1
+
+        pending = list(
+            Sponsor.objects.filter(variants=[]).exclude(content_hash='')
+            .order_by().values_list('content_hash', flat=True).distinct()
+        )
+        failed = 0
+        for digest in pending:
+            try:
+                render_variants(digest)
+            except Exception as e:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f"{digest}: {e}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Hashed {hashed} legacy logos, rendered {len(pending) - failed} of {len(pending)} pending."
+        ))
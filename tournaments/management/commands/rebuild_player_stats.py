@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from tournaments.stats import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        'Recomputes player statistics and ratings from match history (backfill, or after changing the rating rules). '
+        'Results reported while it reads history are not picked up; run it when reporting is quiet.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Tournaments replayed per pass.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        started = time.perf_counter()
+        log = (lambda line: self.stdout.write(f"   - {line}")) if options['verbosity'] > 1 else None
+        players = rebuild(options['batch_size'], log=log)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt stats for {players} players in {time.perf_counter() - started:.1f}s."
+        ))
@@ -1,15 +1,37 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
 from django.utils import timezone
-from tournaments.models import Tournament, Participant, Match
+from tournaments.bracket import play_out
+from tournaments.formats import FORMATS
+from tournaments.models import BULK_BATCH_SIZE, Tournament, Participant, Match, OutboxMessage
+from tournaments.stats import rebuild as rebuild_player_stats
 from datetime import timedelta
 
+# Generated tournaments are written in chunks of this many, one chunk per worker task.
+TOURNAMENT_CHUNK = 50
+
+
 class Command(BaseCommand):
     help = 'Wipes database and seeds demo data with a complete finished tournament history'
 
+    def add_arguments(self, parser):
+        # Scale mode: on top of the demo data, bulk-generate a dataset big enough to size hardware with.
+        parser.add_argument('--users', type=int, default=0, help='Extra generated players.')
+        parser.add_argument('--tournaments', type=int, default=0,
+                            help='Extra generated tournaments (a third each open, ongoing and finished).')
+        parser.add_argument('--bracket-size', type=int, default=16, help='Seats per generated tournament.')
+        parser.add_argument('--random-seed', type=int, default=0)
+        parser.add_argument('--workers', type=int, default=4, help='Threads writing generated chunks in parallel.')
+
     def handle(self, *args, **kwargs):
         self.stdout.write("🌱 Starting Database Seed...")
-        
+
         # 1. WIPE DATA
         self.stdout.write("   - Deleting old data...")
         Match.objects.all().delete()
@@ -17,29 +39,30 @@ class Command(BaseCommand):
         Tournament.objects.all().delete()
         User = get_user_model()
         # Filter deletes all standard users but keeps your superuser/admin
-        User.objects.filter(is_superuser=False).delete() 
-        
+        User.objects.filter(is_superuser=False).delete()
+
         # 2. CREATE USERS
         self.stdout.write("   - Creating Users...")
-        pw = "passwood12345" 
-        
+        pw = "passwood12345"
+        # Hashing is deliberately slow; every seeded account shares one hash instead of paying it per user.
+        self.password_hash = make_password(pw)
+
         names = [
             "Faker", "Zeus", "Oner", "Gumayusi", "Keria",      # T1
             "Caps", "Mikyx", "HansSama", "Yike", "BrokenBlade",# G2
             "Chovy", "Canyon", "ShowMaker", "Deft", "BeryL",   # LCK Stars
             "Rekkles", "Jankos", "Perkz", "Elyoya", "Humanoid" # LEC Stars
         ]
-        
-        users = []
-        for name in names:
-            email = f"{name.lower()}@hextech.gg"
-            user = User.objects.create_user(username=name, email=email, password=pw)
-            users.append(user)
-            
-        organizer = users[0] 
+
+        users = User.objects.bulk_create([
+            User(username=name, email=f"{name.lower()}@hextech.gg", password=self.password_hash)
+            for name in names
+        ])
+
+        organizer = users[0]
 
         # 3. CREATE TOURNAMENTS
-        
+
         # --- A. OPEN TOURNAMENT (Status: OPEN) ---
         self.stdout.write("   - Creating 'Open' Tournament...")
         t_open = Tournament.objects.create(
@@ -52,8 +75,10 @@ class Command(BaseCommand):
             deadline=timezone.now() + timedelta(days=2),
             max_participants=8,
         )
-        self._add_participant(t_open, users[1], "T1 Academy", "Zeus#KR1", 1000)
-        self._add_participant(t_open, users[2], "G2 Esports", "Yike#EUW", 950)
+        self._add_participants(t_open, [
+            (users[1], "T1 Academy", "Zeus#KR1", 1000),
+            (users[2], "G2 Esports", "Yike#EUW", 950),
+        ])
 
 
         # --- B. ONGOING TOURNAMENT (Status: ONGOING) ---
@@ -68,14 +93,16 @@ class Command(BaseCommand):
             deadline=timezone.now() - timedelta(hours=4),
             max_participants=8
         )
-        
+
         # Add 8 participants
-        for i in range(1, 9):
-            self._add_participant(t_ongoing, users[i], f"Team {users[i].username}", f"{users[i].username}#RIOT", 1200 + (i*10))
-            
+        self._add_participants(t_ongoing, [
+            (users[i], f"Team {users[i].username}", f"{users[i].username}#RIOT", 1200 + (i*10))
+            for i in range(1, 9)
+        ])
+
         # Generate Bracket
         try:
-            t_ongoing.start_tournament() 
+            t_ongoing.start_tournament()
             self.stdout.write("     -> Ongoing bracket generated.")
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"     -> Failed to start ongoing: {e}"))
@@ -93,57 +120,150 @@ class Command(BaseCommand):
             deadline=timezone.now() - timedelta(days=370),
             max_participants=4
         )
+        self._add_participants(t_finished, [
+            (users[0], "T1", "Faker#GOAT", 3000),
+            (users[5], "G2", "Caps#EUW", 2800),
+            (users[13], "KT Rolster", "Deft#LLAMA", 2700),
+            (users[17], "Heretics", "Perkz#C9", 2600),
+        ])
+        # The better-seeded side wins every match: Faker takes it.
+        self._write_finished_bracket(t_finished, lambda player1, player2: player1)
 
-        # 1. Add Participants
-        p_faker = self._add_participant(t_finished, users[0], "T1", "Faker#GOAT", 3000)
-        p_caps  = self._add_participant(t_finished, users[5], "G2", "Caps#EUW", 2800)
-        p_deft  = self._add_participant(t_finished, users[13], "KT Rolster", "Deft#LLAMA", 2700)
-        p_perkz = self._add_participant(t_finished, users[17], "Heretics", "Perkz#C9", 2600)
-
-        # 2. Create The Final Match (Round 2)
-        match_final = Match.objects.create(
-            tournament=t_finished,
-            round_number=2,      # CHANGED: 'round' -> 'round_number'
-            match_number=0,      # ADDED: Required by your model
-            player1=p_faker.user,
-            player2=p_deft.user,
-            winner=p_faker.user
-            # REMOVED: score1, score2, status (Not in your model)
-        )
-
-        # 3. Create Semifinals (Round 1)
-        # Semi A: Faker vs Caps
-        Match.objects.create(
-            tournament=t_finished,
-            round_number=1,      # CHANGED: 'round' -> 'round_number'
-            match_number=0,      # ADDED: Match 0 of Round 1
-            next_match=match_final,
-            player1=p_faker.user,
-            player2=p_caps.user,
-            winner=p_faker.user
-        )
+        if kwargs['users'] or kwargs['tournaments']:
+            self._seed_scale(organizer, kwargs['users'], kwargs['tournaments'], kwargs['bracket_size'],
+                             kwargs['random_seed'], kwargs['workers'])
 
-        # Semi B: Deft vs Perkz
-        Match.objects.create(
-            tournament=t_finished,
-            round_number=1,      # CHANGED: 'round' -> 'round_number'
-            match_number=1,      # ADDED: Match 1 of Round 1
-            next_match=match_final,
-            player1=p_deft.user,
-            player2=p_perkz.user,
-            winner=p_deft.user
-        )
+        # Brackets above are written directly rather than reported, so derive stats from them in one pass.
+        self.stdout.write("   - Computing player stats...")
+        rebuild_player_stats()
+        # Starting the seeded brackets queued "match ready" notices for made-up players; don't send them.
+        OutboxMessage.objects.all().delete()
 
-        self.stdout.write(self.style.SUCCESS(f"✅ DONE! Database seeded with {len(users)} users and 3 tournaments."))
+        # Everything but the kept superusers was wiped above, so the tables hold exactly what was seeded.
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ DONE! Database seeded with {User.objects.filter(is_superuser=False).count()} users "
+            f"and {Tournament.objects.count()} tournaments."
+        ))
         self.stdout.write(self.style.SUCCESS(f"ℹ️  Login as: {organizer.email} / {pw}"))
-    def _add_participant(self, tournament, user, team_name, ign, mmr):
-        """Creates and returns a Participant object"""
-        p = Participant.objects.create(
-            user=user,
-            tournament=tournament,
-            team_name=team_name,
-            license_number=ign,
-            ranking_points=mmr,
-            teammates_names="Zeus, Oner, Guma, Keria" if tournament.discipline == '5v5_summoners_rift' else ""
-        )
-        return p
\ No newline at end of file
+
+    def _add_participants(self, tournament, entries):
+        """Bulk-creates (user, team_name, ign, mmr) entries and keeps participant_count in step."""
+        teammates = "Zeus, Oner, Guma, Keria" if tournament.discipline == '5v5_summoners_rift' else ""
+        participants = Participant.objects.bulk_create([
+            Participant(user=user, tournament=tournament, team_name=team_name, license_number=ign,
+                        ranking_points=mmr, teammates_names=teammates)
+            for user, team_name, ign, mmr in entries
+        ], batch_size=BULK_BATCH_SIZE)
+        Tournament.objects.filter(pk=tournament.pk).update(participant_count=len(participants))
+        return participants
+
+    def _write_finished_bracket(self, tournament, pick):
+        """Lays out the bracket start_tournament would build and plays it to the end in memory."""
+        specs = FORMATS[tournament.format].build(tournament._seeds(), tournament)
+        return tournament._write_bracket(play_out(specs, pick))
+
+    def _seed_scale(self, organizer, user_count, tournament_count, bracket_size, random_seed, workers):
+        """
+        Bulk-generates `user_count` players and `tournament_count` tournaments of
+        `bracket_size` seats. Tournaments rotate through open and half full (join
+        targets), ongoing (started, bracket built) and finished (bracket played
+        out with the better seed usually winning). Work is split into chunks that
+        run on `workers` threads, each with its own connection and transaction.
+        """
+        User = get_user_model()
+        if workers > 1 and connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING("SQLite allows one writer at a time; running with 1 worker."))
+            workers = 1
+        started = time.perf_counter()
+
+        self.stdout.write(f"   - Generating {user_count} users...")
+        user_chunks = [range(offset, min(offset + BULK_BATCH_SIZE * 10, user_count))
+                       for offset in range(0, user_count, BULK_BATCH_SIZE * 10)]
+        self._run_chunks(workers, self._create_users, user_chunks)
+        user_ids = list(User.objects.filter(is_superuser=False).values_list('id', flat=True))
+        if len(user_ids) < bracket_size:
+            self.stdout.write(self.style.ERROR(f"     -> Need at least {bracket_size} users for --bracket-size {bracket_size}."))
+            return
+
+        self.stdout.write(f"   - Generating {tournament_count} tournaments of {bracket_size}...")
+        tournament_chunks = [
+            (range(offset, min(offset + TOURNAMENT_CHUNK, tournament_count)), organizer, user_ids, bracket_size, random_seed)
+            for offset in range(0, tournament_count, TOURNAMENT_CHUNK)
+        ]
+        self._run_chunks(workers, self._create_tournaments, tournament_chunks)
+
+        self.stdout.write(f"     -> Generated in {time.perf_counter() - started:.1f}s.")
+
+    def _run_chunks(self, workers, task, chunks):
+        if workers == 1:
+            for chunk in chunks:
+                task(chunk)
+            return
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for future in [pool.submit(self._threaded, task, chunk) for chunk in chunks]:
+                future.result()
+
+    def _threaded(self, task, chunk):
+        try:
+            task(chunk)
+        finally:
+            connection.close()
+
+    def _create_users(self, numbers):
+        User = get_user_model()
+        User.objects.bulk_create([
+            User(username=f"gen{i:07d}", email=f"gen{i:07d}@seed.local", password=self.password_hash)
+            for i in numbers
+        ], batch_size=BULK_BATCH_SIZE)
+
+    def _create_tournaments(self, chunk):
+        numbers, organizer, user_ids, bracket_size, random_seed = chunk
+        rng = random.Random(f"{random_seed}-{numbers.start}")
+        now = timezone.now()
+        kinds = [('open', 'ongoing', 'finished')[i % 3] for i in numbers]
+        fills = [bracket_size // 2 if kind == 'open' else bracket_size for kind in kinds]
+
+        with transaction.atomic():
+            tournaments = Tournament.objects.bulk_create([
+                Tournament(
+                    name=f"Generated Cup #{i}",
+                    organizer=organizer,
+                    format='double_elimination' if kind == 'finished' and i % 2 else 'single_elimination',
+                    status='finished' if kind == 'finished' else 'open',
+                    start_time={
+                        'open': now + timedelta(days=7),
+                        'ongoing': now - timedelta(hours=1),
+                        'finished': now - timedelta(days=30 + i % 300),
+                    }[kind],
+                    deadline={
+                        'open': now + timedelta(days=5),
+                        'ongoing': now - timedelta(hours=2),
+                        'finished': now - timedelta(days=31 + i % 300),
+                    }[kind],
+                    max_participants=bracket_size,
+                    participant_count=fill,
+                )
+                for i, kind, fill in zip(numbers, kinds, fills)
+            ], batch_size=BULK_BATCH_SIZE)
+
+            points = {}
+            participants = []
+            for tournament, fill in zip(tournaments, fills):
+                for user_id in rng.sample(user_ids, fill):
+                    points[tournament.pk, user_id] = rng.randint(0, 3000)
+                    participants.append(Participant(
+                        tournament=tournament, user_id=user_id,
+                        team_name=f"Team {user_id}", license_number=f"{user_id}#GEN",
+                        ranking_points=points[tournament.pk, user_id],
+                    ))
+            Participant.objects.bulk_create(participants, batch_size=BULK_BATCH_SIZE)
+
+            for tournament, kind in zip(tournaments, kinds):
+                if kind == 'ongoing':
+                    tournament.start_tournament()
+                elif kind == 'finished':
+                    def pick(player1, player2, tournament=tournament):
+                        # The higher-rated player wins two times out of three.
+                        favourite, underdog = sorted((player1, player2), key=lambda p: -points[tournament.pk, p])
+                        return favourite if rng.random() < 2 / 3 else underdog
+                    self._write_finished_bracket(tournament, pick)
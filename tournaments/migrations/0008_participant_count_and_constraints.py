@@ -0,0 +1,45 @@
+# Generated by Django 6.0.1 on 2026-10-17 12:14
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_participant_count(apps, schema_editor):
+    Tournament = apps.get_model('tournaments', 'Tournament')
+    Participant = apps.get_model('tournaments', 'Participant')
+    counts = (
+        Participant.objects.filter(tournament=models.OuterRef('pk'))
+        .order_by()
+        .values('tournament')
+        .annotate(total=models.Count('pk'))
+        .values('total')
+    )
+    Tournament.objects.update(
+        participant_count=Coalesce(models.Subquery(counts), models.Value(0))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0007_alter_match_options'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='participant_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_participant_count, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='participant',
+            constraint=models.UniqueConstraint(condition=models.Q(('team_name', ''), _negated=True), fields=('tournament', 'team_name'), name='unique_team_name_per_tournament'),
+        ),
+        migrations.AddConstraint(
+            model_name='participant',
+            constraint=models.UniqueConstraint(condition=models.Q(('license_number', ''), _negated=True), fields=('tournament', 'license_number'), name='unique_license_per_tournament'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0.1 on 2026-10-17 12:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0008_participant_count_and_constraints'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['tournament', 'round_number', 'match_number'], name='match_bracket_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(fields=['tournament', '-ranking_points'], name='participant_seeding_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tournament',
+            index=models.Index(fields=['-created_at', '-id'], name='tournament_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tournament',
+            index=models.Index(condition=models.Q(('status', 'open')), fields=['deadline'], name='tournament_open_deadline_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tournament',
+            index=models.Index(fields=['status', 'start_time'], name='tournament_status_start_idx'),
+        ),
+    ]
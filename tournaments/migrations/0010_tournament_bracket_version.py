@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-17 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0009_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='bracket_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tournament',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
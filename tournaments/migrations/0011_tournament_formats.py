@@ -0,0 +1,50 @@
+# Generated by Django 6.0.1 on 2026-10-17 14:10
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0010_tournament_bracket_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='group',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='loser_next_match',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='previous_losers', to='tournaments.match'),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='loser_next_slot',
+            field=models.CharField(blank=True, max_length=7),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='next_match_slot',
+            field=models.CharField(blank=True, max_length=7),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='stage',
+            field=models.CharField(choices=[('bracket', 'Bracket'), ('losers', 'Losers Bracket'), ('grand_final', 'Grand Final'), ('swiss', 'Swiss'), ('group', 'Group')], default='bracket', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='tournament',
+            name='format',
+            field=models.CharField(choices=[('single_elimination', 'Single Elimination'), ('double_elimination', 'Double Elimination'), ('swiss', 'Swiss'), ('round_robin', 'Round Robin Groups')], default='single_elimination', max_length=30),
+        ),
+        migrations.AddField(
+            model_name='tournament',
+            name='group_size',
+            field=models.PositiveIntegerField(default=4, help_text='Players per group (round robin only)', validators=[django.core.validators.MinValueValidator(2)]),
+        ),
+    ]
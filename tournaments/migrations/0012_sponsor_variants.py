@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-17 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0011_tournament_formats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sponsor',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='sponsor',
+            name='variants',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 6.0.1 on 2026-10-17 12:50
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# Weighted document: name (A), discipline with underscores as spaces (B), description (C).
+DOCUMENT = """
+    setweight(to_tsvector('english', coalesce({row}.name, '')), 'A') ||
+    setweight(to_tsvector('english', replace(coalesce({row}.discipline, ''), '_', ' ')), 'B') ||
+    setweight(to_tsvector('english', coalesce({row}.description, '')), 'C')
+"""
+
+CREATE = f"""
+CREATE FUNCTION tournaments_tournament_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := {DOCUMENT.format(row='NEW')};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER tournaments_tournament_search_vector
+    BEFORE INSERT OR UPDATE OF name, discipline, description ON tournaments_tournament
+    FOR EACH ROW EXECUTE FUNCTION tournaments_tournament_search_vector();
+
+UPDATE tournaments_tournament SET search_vector = {DOCUMENT.format(row='tournaments_tournament')};
+
+CREATE INDEX tournament_search_idx ON tournaments_tournament USING gin (search_vector);
+CREATE INDEX tournament_name_trgm_idx ON tournaments_tournament USING gin (name gin_trgm_ops);
+"""
+
+DROP = """
+DROP INDEX IF EXISTS tournament_name_trgm_idx;
+DROP INDEX IF EXISTS tournament_search_idx;
+DROP TRIGGER IF EXISTS tournaments_tournament_search_vector ON tournaments_tournament;
+DROP FUNCTION IF EXISTS tournaments_tournament_search_vector();
+"""
+
+
+def create_search_index(apps, schema_editor):
+    # Trigger and GIN indexes are PostgreSQL-only; other databases keep the icontains fallback.
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0012_sponsor_variants'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='tournament',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
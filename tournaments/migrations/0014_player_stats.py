@@ -0,0 +1,30 @@
+# Generated by Django 6.0.1 on 2026-10-17 14:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0013_tournament_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='player_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('matches_played', models.PositiveIntegerField(default=0)),
+                ('matches_won', models.PositiveIntegerField(default=0)),
+                ('titles', models.PositiveIntegerField(default=0)),
+                ('current_streak', models.IntegerField(default=0)),
+                ('rating', models.IntegerField(default=1500)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-rating', 'user'], name='player_stats_rating_idx')],
+            },
+        ),
+    ]
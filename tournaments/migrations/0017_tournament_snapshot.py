@@ -0,0 +1,25 @@
+# Generated by Django 6.0.1 on 2026-10-17 17:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0016_tournament_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TournamentSnapshot',
+            fields=[
+                ('tournament', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='snapshot', serialize=False, to='tournaments.tournament')),
+                ('version', models.PositiveIntegerField()),
+                ('body', models.BinaryField()),
+                ('body_gzip', models.BinaryField(null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -1,12 +1,95 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
 from django.db import models, transaction
+from django.db.models import Case, Count, IntegerField, Max, OuterRef, Prefetch, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
+from django.core.validators import MinValueValidator
 from django.utils import timezone
-import math
+from .formats import FORMATS
+from .exceptions import TournamentNotOpen, NotEnoughParticipants
+
+BULK_BATCH_SIZE = 1000
 
 class Sponsor(models.Model):
     tournament = models.ForeignKey('Tournament', related_name='sponsors', on_delete=models.CASCADE)
     image = models.ImageField(upload_to='sponsor_logos/')
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    # sha256 of the original; identical logos share one stored file (see tournaments.images).
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    # [{"name": storage path, "width": ..., "height": ...}] WebP renditions, smallest first; empty until rendered.
+    variants = models.JSONField(default=list, blank=True)
+
+def _aggregate_per_tournament(model, aggregate, *conditions, **filters):
+    """Correlated aggregate over `model` rows of the outer tournament, 0 when there are none."""
+    rows = (
+        model.objects.filter(*conditions, tournament=OuterRef('pk'), **filters)
+        .order_by()
+        .values('tournament')
+        .annotate(total=aggregate)
+        .values('total')
+    )
+    return Coalesce(Subquery(rows, output_field=IntegerField()), Value(0))
+
+
+def _count_per_tournament(model, *conditions, **filters):
+    return _aggregate_per_tournament(model, Count('pk'), *conditions, **filters)
+
+
+class TournamentQuerySet(models.QuerySet):
+    def with_counts(self, *names):
+        """
+        Annotates match/sponsor counts in SQL (no joins, so no row fan-out); participant_count is a column.
+        `names` limits it to some of 'match_count' / 'sponsor_count'.
+        """
+        counted = {'match_count': Match, 'sponsor_count': Sponsor}
+        return self.annotate(**{name: _count_per_tournament(counted[name]) for name in names or counted})
+
+    def with_relations(self, *names):
+        """
+        Prefetches the named nested relations ('matches', 'participants', 'sponsors') with what their serializers read.
+        Archived tournaments render matches and participants from their ArchivedBracket, which is joined in.
+        """
+        prefetches = {
+            'matches': Prefetch('matches', queryset=Match.objects.select_related('player1', 'player2', 'winner')),
+            'participants': Prefetch('participants', queryset=Participant.objects.select_related('user')),
+            'sponsors': 'sponsors',
+        }
+        queryset = self.prefetch_related(*(prefetches[name] for name in names))
+        if {'matches', 'participants'} & set(names):
+            queryset = queryset.select_related('archived_bracket')
+        return queryset
+
+    def with_bracket(self):
+        """Loads everything TournamentSerializer touches in a fixed number of queries."""
+        return self.select_related('organizer').with_relations('matches', 'participants', 'sponsors')
+
+    def with_player_stats(self, user):
+        """
+        Annotates how `user` did in each tournament: rounds in the bracket, the
+        furthest round played, and wins/losses (byes are not counted).
+        """
+        played = Q(player1=user) | Q(player2=user)
+        contested = Q(player1__isnull=False, player2__isnull=False, winner__isnull=False)
+        live = {
+            'rounds': _aggregate_per_tournament(Match, Max('round_number')),
+            'final_round': _aggregate_per_tournament(Match, Max('round_number'), played),
+            'wins': _count_per_tournament(Match, contested, winner=user),
+            'losses': _count_per_tournament(Match, played & contested & ~Q(winner=user)),
+        }
+        # Archived tournaments have no Match rows; their figures were stored when they were archived.
+        archived = ArchivedParticipation.objects.filter(tournament=OuterRef('pk'), user=user)
+        return self.annotate(**{
+            name: Case(
+                When(archived_at__isnull=False, then=Coalesce(Subquery(archived.values(name)), Value(0))),
+                default=aggregate,
+                output_field=IntegerField(),
+            )
+            for name, aggregate in live.items()
+        })
+
 
 class Tournament(models.Model):
     STATUS_CHOICES = [
@@ -21,83 +104,203 @@ class Tournament(models.Model):
         ('1v1_howling_abyss', '1v1 Howling Abyss'),
     ]
 
+    FORMAT_CHOICES = [
+        ('single_elimination', 'Single Elimination'),
+        ('double_elimination', 'Double Elimination'),
+        ('swiss', 'Swiss'),
+        ('round_robin', 'Round Robin Groups'),
+    ]
+
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     discipline = models.CharField(max_length=50, choices=DISCIPLINE_CHOICES, default='5v5_summoners_rift')
+    format = models.CharField(max_length=30, choices=FORMAT_CHOICES, default='single_elimination')
+    group_size = models.PositiveIntegerField(default=4, validators=[MinValueValidator(2)], help_text="Players per group (round robin only)")
     organizer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='organized_tournaments')
     
     start_time = models.DateTimeField()
     deadline = models.DateTimeField()
     max_participants = models.IntegerField(default=16)
+    # Denormalized seat counter; reserve_seat() and release_seat() are its only writers during registration.
+    participant_count = models.IntegerField(default=0)
     location_url = models.TextField(blank=True, null=True)
     
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Bumped whenever the rendered detail changes; keys the snapshot cache and the ETag.
+    bracket_version = models.PositiveIntegerField(default=0)
+    # Full-text document for tournaments.filters (name A, discipline B, description C). A PostgreSQL
+    # trigger keeps it current and it is GIN-indexed; both live in migration 0013. NULL elsewhere.
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Set when tournaments.archival has moved the matches and participants to ArchivedBracket.
+    archived_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = TournamentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Listing: ORDER BY -created_at (id breaks ties for keyset paging).
+            models.Index(fields=['-created_at', '-id'], name='tournament_created_idx'),
+            # autostart_tournaments: status='open' AND deadline <= now.
+            models.Index(fields=['deadline'], condition=models.Q(status='open'), name='tournament_open_deadline_idx'),
+            # user_history: status IN (...) ORDER BY start_time.
+            models.Index(fields=['status', 'start_time'], name='tournament_status_start_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def reserve_seat(cls, tournament_id):
+        """
+        Atomically takes one registration seat. The capacity check lives in the
+        UPDATE's WHERE clause, so concurrent joins can never overfill a bracket.
+        Returns False when the tournament is full, closed or past its deadline.
+        """
+        return cls.objects.filter(
+            pk=tournament_id,
+            status='open',
+            deadline__gte=timezone.now(),
+            participant_count__lt=models.F('max_participants'),
+        ).update(
+            participant_count=models.F('participant_count') + 1,
+            bracket_version=models.F('bracket_version') + 1,
+            updated_at=timezone.now(),
+        ) == 1
+
+    @classmethod
+    def release_seat(cls, tournament_id):
+        """Gives back a seat taken by reserve_seat(). Only open tournaments count seats; later the count is history."""
+        return cls.objects.filter(pk=tournament_id, status='open', participant_count__gt=0).update(
+            participant_count=models.F('participant_count') - 1,
+            bracket_version=models.F('bracket_version') + 1,
+            updated_at=timezone.now(),
+        ) == 1
+
+    @classmethod
+    def bump_version(cls, tournament_id, expected_status=None, **changes):
+        """
+        Applies `changes` and bumps bracket_version in one UPDATE, so cached snapshots go stale.
+        With `expected_status` the UPDATE only matches in that status; returns the number of rows changed.
+        """
+        rows = cls.objects.filter(pk=tournament_id)
+        if expected_status is not None:
+            rows = rows.filter(status=expected_status)
+        return rows.update(
+            bracket_version=models.F('bracket_version') + 1,
+            updated_at=timezone.now(),
+            **changes,
+        )
+
     def start_tournament(self):
         """
         Generates the bracket and starts the tournament.
-        Raises ValueError if conditions aren't met.
+        Raises TournamentNotOpen / NotEnoughParticipants (both ValueErrors) if conditions aren't met.
         """
         if self.status != 'open':
-            raise ValueError("Tournament is not open.")
+            raise TournamentNotOpen("Tournament is not open.")
+
+        with transaction.atomic():
+            # The status check is repeated in the UPDATE so two concurrent starts can't both build a bracket.
+            # It also closes registration first: joins and seat releases only touch open tournaments and wait
+            # on this row lock, so the seeds read below are the final field. Raising rolls the status back.
+            if not Tournament.bump_version(self.pk, expected_status='open', status='ongoing'):
+                raise TournamentNotOpen("Tournament is not open.")
+            seeds = self._seeds()
+            if len(seeds) < 2:
+                raise NotEnoughParticipants("Need at least 2 teams to start.")
+            specs = FORMATS[self.format].build(seeds, self)
+            self.status = 'ongoing'
+            OutboxMessage.matches_ready(self._write_bracket(specs))
+
+    def champion(self):
+        """
+        The winner of a finished tournament: the winner of the last match for
+        elimination formats, the standings leader (ties to the better seed) otherwise.
+        """
+        engine = FORMATS[self.format]
+        columns = ('round_number', 'player1_id', 'player2_id', 'winner_id', 'next_match_id')
+        if self.archived_at is not None:
+            bracket = self.archived_bracket
+            return engine.champion(bracket.seeds if engine.round_based else [], list(bracket.values('match', *columns)))
+        history = list(self.matches.values_list(*columns))
+        return engine.champion(self._seeds() if engine.round_based else [], history)
 
-        participants = list(self.participants.all().order_by('-ranking_points'))
-        count = len(participants)
+    def _seeds(self):
+        return list(self.participants.order_by('-ranking_points', 'registered_at', 'id').values_list('user_id', flat=True))
 
-        if count < 2:
-            raise ValueError("Need at least 2 teams to start.")
+    def complete_stage(self):
+        """
+        Called inside the reporting transaction after a match with no successor gets
+        its winner. Elimination formats are over at that point; round-based formats
+        wait for the rest of the round, then pair the next one or finish.
+        Returns 'finished', 'round_started' or 'waiting'.
+        """
+        engine = FORMATS[self.format]
+        if engine.round_based:
+            # Serializes reports finishing the round's last matches: without the lock each could still see
+            # the other's match as open (READ COMMITTED) and both would wait. Once it's held, the check
+            # below sees every result committed before ours.
+            list(Tournament.objects.select_for_update().filter(pk=self.pk).values_list('pk'))
+            if self.matches.filter(winner__isnull=True).exists():
+                Tournament.bump_version(self.pk)
+                return 'waiting'
+            history = list(self.matches.values_list('round_number', 'player1_id', 'player2_id', 'winner_id'))
+            specs = engine.next_round(self._seeds(), history)
+            if specs:
+                OutboxMessage.matches_ready(self._write_bracket(specs))
+                Tournament.bump_version(self.pk)
+                return 'round_started'
+        Tournament.bump_version(self.pk, status='finished')
+        self.status = 'finished'
+        OutboxMessage.enqueue([('tournament_finished', {'tournament': self.pk}, self._seeds())])
+        return 'finished'
 
-        bracket_size = 2 ** math.ceil(math.log2(count))
-        num_byes = bracket_size - count
-        seeded_participants = participants + [None] * num_byes
-        rounds = int(math.log2(bracket_size))
+    def _write_bracket(self, specs):
+        """
+        Persists a list of bracket.MatchSpec, skipping void ones. Matches are
+        inserted level by level starting from the final, so every next_match /
+        loser_next_match id is already known when a row is written: one bulk
+        insert per level and no follow-up updates. Specs must only point forward.
+        """
+        def target(index):
+            return None if index is None or specs[index].void else index
 
-        with transaction.atomic():
-            self.status = 'ongoing'
-            self.save()
-
-            matches_by_round = {}
-
-            for round_num in range(1, rounds + 1):
-                matches_in_round = bracket_size // (2 ** round_num)
-                matches_by_round[round_num] = []
-                for i in range(matches_in_round):
-                    match = Match.objects.create(
-                        tournament=self,
-                        round_number=round_num,
-                        match_number=i
-                    )
-                    matches_by_round[round_num].append(match)
-
-            for round_num in range(1, rounds):
-                current_round = matches_by_round[round_num]
-                next_round = matches_by_round[round_num + 1]
-                for i, match in enumerate(current_round):
-                    match.next_match = next_round[i // 2]
-                    match.save()
-
-            round_1_matches = matches_by_round[1]
-            for i, match in enumerate(round_1_matches):
-                p1 = seeded_participants[i * 2]
-                p2 = seeded_participants[i * 2 + 1]
-
-                if p1: match.player1 = p1.user
-                if p2: match.player2 = p2.user
-
-                if p2 is None and p1 is not None:
-                    match.winner = p1.user
-                    if match.next_match:
-                        if match.match_number % 2 == 0:
-                            match.next_match.player1 = p1.user
-                        else:
-                            match.next_match.player2 = p1.user
-                        match.next_match.save()
-                
-                match.save()
+        depth = [0] * len(specs)
+        for i in range(len(specs) - 1, -1, -1):
+            targets = [t for t in (target(specs[i].next_index), target(specs[i].loser_index)) if t is not None]
+            if targets:
+                depth[i] = 1 + max(depth[t] for t in targets)
+
+        levels = {}
+        for i, d in enumerate(depth):
+            if not specs[i].void:
+                levels.setdefault(d, []).append(i)
+
+        matches = [None] * len(specs)
+        for d in sorted(levels):
+            batch = []
+            for i in levels[d]:
+                spec = specs[i]
+                next_index, loser_index = target(spec.next_index), target(spec.loser_index)
+                matches[i] = Match(
+                    tournament=self,
+                    round_number=spec.round_number,
+                    match_number=spec.match_number,
+                    stage=spec.stage,
+                    group=spec.group,
+                    player1_id=spec.player1,
+                    player2_id=spec.player2,
+                    winner_id=spec.winner,
+                    next_match_id=matches[next_index].pk if next_index is not None else None,
+                    next_match_slot=spec.next_slot if next_index is not None else '',
+                    loser_next_match_id=matches[loser_index].pk if loser_index is not None else None,
+                    loser_next_slot=spec.loser_slot if loser_index is not None else '',
+                )
+                batch.append(matches[i])
+            Match.objects.bulk_create(batch, batch_size=BULK_BATCH_SIZE)
+        return [match for match in matches if match is not None]
 
 class Participant(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -112,13 +315,62 @@ class Participant(models.Model):
 
     class Meta:
         unique_together = ('tournament', 'user')
+        indexes = [
+            # Seeding in start_tournament: ORDER BY -ranking_points within a tournament.
+            models.Index(fields=['tournament', '-ranking_points'], name='participant_seeding_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tournament', 'team_name'],
+                condition=~models.Q(team_name=''),
+                name='unique_team_name_per_tournament',
+            ),
+            models.UniqueConstraint(
+                fields=['tournament', 'license_number'],
+                condition=~models.Q(license_number=''),
+                name='unique_license_per_tournament',
+            ),
+        ]
+
+_seats_kept = ContextVar('seats_kept', default=False)
+
+
+@contextmanager
+def seats_kept():
+    """Deletes of Participant rows inside the block leave participant_count alone (archival moves them, not removes)."""
+    token = _seats_kept.set(True)
+    try:
+        yield
+    finally:
+        _seats_kept.reset(token)
+
+
+def release_seat(sender, instance, **kwargs):
+    """post_delete receiver for Participant: a withdrawn player (or a deleted account) frees the seat."""
+    if not _seats_kept.get():
+        Tournament.release_seat(instance.tournament_id)
+
 
 class Match(models.Model):
+    STAGE_CHOICES = [
+        ('bracket', 'Bracket'),
+        ('losers', 'Losers Bracket'),
+        ('grand_final', 'Grand Final'),
+        ('swiss', 'Swiss'),
+        ('group', 'Group'),
+    ]
+
     tournament = models.ForeignKey(Tournament, related_name='matches', on_delete=models.CASCADE)
     round_number = models.IntegerField()
     match_number = models.IntegerField()
+    stage = models.CharField(max_length=20, choices=STAGE_CHOICES, default='bracket')
+    group = models.PositiveIntegerField(null=True, blank=True)
     class Meta:
         ordering = ['round_number', 'match_number']
+        indexes = [
+            # Bracket reads and report_match: tournament_id = ? in bracket order.
+            models.Index(fields=['tournament', 'round_number', 'match_number'], name='match_bracket_idx'),
+        ]
 
         
     player1 = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='matches_as_p1', on_delete=models.SET_NULL, null=True, blank=True)
@@ -126,10 +378,190 @@ class Match(models.Model):
     
     winner = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='matches_won', on_delete=models.SET_NULL, null=True, blank=True)
     next_match = models.ForeignKey('self', related_name='previous_matches', on_delete=models.SET_NULL, null=True, blank=True)
+    next_match_slot = models.CharField(max_length=7, blank=True)
+    # Double elimination: where the loser drops to.
+    loser_next_match = models.ForeignKey('self', related_name='previous_losers', on_delete=models.SET_NULL, null=True, blank=True)
+    loser_next_slot = models.CharField(max_length=7, blank=True)
     
     # Voting System
     player1_vote = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='votes_as_p1', on_delete=models.SET_NULL, null=True, blank=True)
     player2_vote = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='votes_as_p2', on_delete=models.SET_NULL, null=True, blank=True)
 
     def __str__(self):
-        return f"{self.tournament} - R{self.round_number} M{self.match_number}"
\ No newline at end of file
+        return f"{self.tournament} - R{self.round_number} M{self.match_number}"
+
+    @property
+    def next_slot(self):
+        """Which side of next_match this match's winner plays on (older rows infer it from match_number)."""
+        return self.next_match_slot or ('player1' if self.match_number % 2 == 0 else 'player2')
+
+    @property
+    def loser_id(self):
+        if self.winner_id is None or self.player1_id is None or self.player2_id is None:
+            return None
+        return self.player2_id if self.winner_id == self.player1_id else self.player1_id
+
+
+class PlayerStats(models.Model):
+    """
+    Running totals per player, kept current by tournaments.stats as results are
+    reported so profiles and the leaderboard never walk Match history. Only
+    contested matches count (byes don't). current_streak is signed: +3 is three
+    wins in a row, -2 two losses.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, primary_key=True, related_name='player_stats', on_delete=models.CASCADE)
+    matches_played = models.PositiveIntegerField(default=0)
+    matches_won = models.PositiveIntegerField(default=0)
+    titles = models.PositiveIntegerField(default=0)
+    current_streak = models.IntegerField(default=0)
+    rating = models.IntegerField(default=1500)
+
+    class Meta:
+        indexes = [
+            # Leaderboard: ORDER BY rating DESC, user_id.
+            models.Index(fields=['-rating', 'user'], name='player_stats_rating_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.rating}"
+
+    @property
+    def win_rate(self):
+        return self.matches_won / self.matches_played if self.matches_played else 0.0
+
+
+class OutboxMessage(models.Model):
+    """
+    A notification waiting to be delivered by tournaments.notifications. Rows
+    are inserted in the transaction that makes the change they announce, so a
+    rolled-back report sends nothing and a crash loses nothing; the
+    deliver_notifications workers drain them and delete what was delivered.
+    Rows that keep failing end up 'dead' for inspection.
+    """
+    CHANNEL_CHOICES = [
+        ('email', 'Email'),
+        ('webhook', 'Webhook'),
+        ('feed', 'In-app feed'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('dead', 'Dead'),
+    ]
+
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    event = models.CharField(max_length=40)
+    # Recipient for feed and email rows; raw emails (djoser, see OutboxEmailBackend) carry their own addresses.
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.CASCADE, related_name='+')
+    # Webhook URL.
+    target = models.CharField(max_length=500, blank=True)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    # Earliest next delivery; pushed forward while a worker holds the row and by retry backoff.
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers: status='pending' AND next_attempt_at <= now ORDER BY next_attempt_at.
+            models.Index(fields=['next_attempt_at', 'id'], condition=models.Q(status='pending'), name='outbox_pending_idx'),
+        ]
+
+    @classmethod
+    def enqueue(cls, events):
+        """
+        Queues (event, payload, user_ids) notifications with one INSERT: a feed
+        and an email row per user, plus one row per configured webhook.
+        """
+        webhooks = getattr(settings, 'NOTIFICATIONS', {}).get('WEBHOOK_URLS', ())
+        rows = []
+        for event, payload, user_ids in events:
+            for user_id in user_ids:
+                rows.append(cls(channel='feed', event=event, user_id=user_id, payload=payload))
+                rows.append(cls(channel='email', event=event, user_id=user_id, payload=payload))
+            rows += [cls(channel='webhook', event=event, target=url, payload=payload) for url in webhooks]
+        cls.objects.bulk_create(rows, batch_size=BULK_BATCH_SIZE)
+
+    @classmethod
+    def matches_ready(cls, matches):
+        """Tells both players of every match that has just become playable."""
+        cls.enqueue([
+            ('match_ready',
+             {'tournament': match.tournament_id, 'match': match.id, 'round': match.round_number,
+              'players': [match.player1_id, match.player2_id]},
+             (match.player1_id, match.player2_id))
+            for match in matches
+            if match.player1_id and match.player2_id and not match.winner_id
+        ])
+
+
+class Notification(models.Model):
+    """An in-app feed entry, written by the notification workers from a 'feed' OutboxMessage."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notifications')
+    event = models.CharField(max_length=40)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    read_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Feed: user_id = ? ORDER BY -created_at.
+            models.Index(fields=['user', '-created_at', '-id'], name='notification_feed_idx'),
+        ]
+
+
+class ArchivedBracket(models.Model):
+    """
+    The matches and participants of an archived tournament, moved out of the
+    live tables by tournaments.archival. `payload` holds the `matches` and
+    `participants` TournamentSerializer rendered at archival time and is
+    served in their place; `rows` keeps the raw column values for exports and
+    stats rebuilds, and `seeds` the seeding order.
+    """
+    tournament = models.OneToOneField(Tournament, primary_key=True, related_name='archived_bracket', on_delete=models.CASCADE)
+    payload = models.JSONField()
+    # {"columns": {"match": [...], "participant": [...]}, "match": [[...], ...], "participant": [[...], ...]}
+    rows = models.JSONField()
+    seeds = models.JSONField(default=list)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def values(self, kind, *columns):
+        """Yields the archived `kind` rows ('match' / 'participant') as tuples of `columns`."""
+        positions = {column: i for i, column in enumerate(self.rows['columns'][kind])}
+        picked = [positions.get(column) for column in columns]
+        for row in self.rows[kind]:
+            yield tuple(None if i is None else row[i] for i in picked)
+
+
+class ArchivedParticipation(models.Model):
+    """
+    One player's entry in an archived tournament, with the figures
+    with_player_stats() computes from Match rows for live ones. Keeps
+    user_history working once the Participant rows are gone.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    tournament = models.ForeignKey(Tournament, related_name='archived_participations', on_delete=models.CASCADE)
+    rounds = models.PositiveIntegerField(default=0)
+    final_round = models.PositiveIntegerField(default=0)
+    wins = models.PositiveIntegerField(default=0)
+    losses = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # user_history: user_id = ? (and the tournament's rows in with_player_stats).
+            models.UniqueConstraint(fields=['user', 'tournament'], name='archived_participation_user_uniq'),
+        ]
+
+
+class TournamentSnapshot(models.Model):
+    """
+    The rendered detail response of a finished tournament at `version`
+    (bracket_version), stored by tournaments.snapshots and served byte for byte.
+    """
+    tournament = models.OneToOneField(Tournament, primary_key=True, related_name='snapshot', on_delete=models.CASCADE)
+    version = models.PositiveIntegerField()
+    body = models.BinaryField()
+    # gzip of `body`, for clients that accept it; NULL when SNAPSHOTS['COMPRESS'] is off.
+    body_gzip = models.BinaryField(null=True)
+    created_at = models.DateTimeField(default=timezone.now)
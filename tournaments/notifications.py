@@ -0,0 +1,277 @@
+"""
+Notification delivery from the OutboxMessage table.
+
+Producers only insert outbox rows, in the transaction of the change they
+announce (OutboxMessage.enqueue, and OutboxEmailBackend for djoser's account
+emails), so reporting a result never waits on SMTP or HTTP. deliver_notifications
+runs a pool of workers that each claim a batch of due rows with SKIP LOCKED,
+lease them by pushing next_attempt_at forward, and deliver them outside any
+transaction: emails over one SMTP connection the worker keeps open, one webhook
+POST per URL carrying the whole batch, and one INSERT for in-app feed entries.
+Delivered rows are deleted; failures are retried with exponential backoff
+until MAX_ATTEMPTS, then left 'dead'. A worker that dies mid-batch loses
+nothing: its lease runs out and another worker picks the rows up again, so
+delivery is at least once.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import random
+import urllib.request
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMessage, EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.utils import timezone
+
+from .models import BULK_BATCH_SIZE, Notification, OutboxMessage, Tournament
+
+DEFAULTS = {
+    # The backend that actually sends; EMAIL_BACKEND itself points at OutboxEmailBackend.
+    'EMAIL_BACKEND': 'django.core.mail.backends.console.EmailBackend',
+    'WEBHOOK_URLS': (),
+    # Signs webhook bodies (X-Signature: sha256=<hmac>) when set.
+    'WEBHOOK_SECRET': '',
+    'WEBHOOK_TIMEOUT': 5,
+    'BATCH_SIZE': 100,
+    # How long a claimed batch stays invisible to other workers.
+    'LEASE_SECONDS': 60,
+    'MAX_ATTEMPTS': 8,
+    'RETRY_BASE_SECONDS': 30,
+    'RETRY_MAX_SECONDS': 3600,
+}
+
+SUBJECTS = {
+    'match_ready': "Your match in {tournament} is ready",
+    'tournament_finished': "{tournament} has finished",
+}
+
+BODIES = {
+    'match_ready': "Hi {username},\n\nRound {round} of {tournament} is ready: you play {opponent}.\n\n{url}\n",
+    'tournament_finished': "Hi {username},\n\n{tournament} has finished. The final bracket is up:\n\n{url}\n",
+}
+
+
+def config():
+    return {**DEFAULTS, **getattr(settings, 'NOTIFICATIONS', {})}
+
+
+class OutboxEmailBackend(BaseEmailBackend):
+    """
+    EMAIL_BACKEND that queues instead of sending, so djoser's activation and
+    password emails are durable and off the request path like everything else.
+    Messages are stored as outbox rows and sent by the workers through
+    NOTIFICATIONS['EMAIL_BACKEND'].
+    """
+
+    def send_messages(self, email_messages):
+        OutboxMessage.objects.bulk_create([
+            OutboxMessage(channel='email', event='email', payload={'message': serialize_email(message)})
+            for message in email_messages
+        ], batch_size=BULK_BATCH_SIZE)
+        return len(email_messages)
+
+
+def serialize_email(message):
+    return {
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': list(message.to),
+        'cc': list(message.cc),
+        'bcc': list(message.bcc),
+        'reply_to': list(message.reply_to),
+        'headers': dict(message.extra_headers),
+        'alternatives': [list(alternative) for alternative in getattr(message, 'alternatives', [])],
+        'attachments': [
+            [name, base64.b64encode(content if isinstance(content, bytes) else content.encode()).decode(), mimetype]
+            for name, content, mimetype in message.attachments
+        ],
+    }
+
+
+def deserialize_email(data):
+    message = EmailMultiAlternatives(
+        subject=data['subject'], body=data['body'], from_email=data['from_email'],
+        to=data['to'], cc=data['cc'], bcc=data['bcc'], reply_to=data['reply_to'], headers=data['headers'],
+    )
+    for content, mimetype in data['alternatives']:
+        message.attach_alternative(content, mimetype)
+    for name, content, mimetype in data['attachments']:
+        message.attach(name, base64.b64decode(content), mimetype)
+    return message
+
+
+def claim(batch_size, lease_seconds):
+    """Leases up to `batch_size` due rows, oldest first, skipping rows other workers hold."""
+    now = timezone.now()
+    with transaction.atomic():
+        rows = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        for row in rows:
+            row.attempts += 1
+            row.next_attempt_at = now + timedelta(seconds=lease_seconds)
+        OutboxMessage.objects.bulk_update(rows, ['attempts', 'next_attempt_at'])
+    return rows
+
+
+def backoff(attempts, conf):
+    """Seconds before retry number `attempts`: doubling from RETRY_BASE_SECONDS, capped, with jitter."""
+    delay = min(conf['RETRY_MAX_SECONDS'], conf['RETRY_BASE_SECONDS'] * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+class Worker:
+    """
+    Delivers claimed batches for one worker thread. The email connection is
+    opened when the worker starts and kept across batches; it is reopened
+    after an error.
+    """
+
+    def __init__(self, conf=None):
+        self.conf = conf or config()
+        self.mail = get_connection(self.conf['EMAIL_BACKEND'])
+        self._open_mail()
+
+    def _open_mail(self):
+        # An unopened SMTP backend connects and disconnects around every send_messages() call.
+        try:
+            self.mail.open()
+        except Exception:
+            # The server is down: sends fail and get retried, and the next batch tries to connect again.
+            self.mail_open = False
+        else:
+            self.mail_open = True
+
+    def close(self):
+        self.mail.close()
+
+    def run_once(self):
+        """Claims and delivers one batch; returns how many rows it handled."""
+        rows = claim(self.conf['BATCH_SIZE'], self.conf['LEASE_SECONDS'])
+        if not rows:
+            return 0
+        failures = {}
+        by_channel = defaultdict(list)
+        for row in rows:
+            by_channel[row.channel].append(row)
+        context = _Context(rows)
+        for channel, channel_rows in by_channel.items():
+            failures.update(getattr(self, f'_deliver_{channel}')(channel_rows, context))
+        self._settle(rows, failures)
+        return len(rows)
+
+    def _settle(self, rows, failures):
+        delivered = [row.pk for row in rows if row.pk not in failures]
+        retried = []
+        for row in rows:
+            if row.pk not in failures:
+                continue
+            row.last_error = failures[row.pk][:2000]
+            if row.attempts >= self.conf['MAX_ATTEMPTS']:
+                row.status = 'dead'
+            else:
+                row.next_attempt_at = timezone.now() + timedelta(seconds=backoff(row.attempts, self.conf))
+            retried.append(row)
+        OutboxMessage.objects.filter(pk__in=delivered).delete()
+        OutboxMessage.objects.bulk_update(retried, ['status', 'next_attempt_at', 'last_error'])
+
+    def _deliver_feed(self, rows, context):
+        try:
+            Notification.objects.bulk_create([
+                Notification(user_id=row.user_id, event=row.event, payload=row.payload) for row in rows
+            ], batch_size=BULK_BATCH_SIZE)
+        except Exception as e:
+            return {row.pk: repr(e) for row in rows}
+        return {}
+
+    def _deliver_email(self, rows, context):
+        failures = {}
+        if not self.mail_open:
+            self._open_mail()
+        for row in rows:
+            if 'message' in row.payload:
+                message = deserialize_email(row.payload['message'])
+            else:
+                message = context.email(row)
+                if message is None:
+                    # No address (or the user is gone): nothing to send.
+                    continue
+            try:
+                sent = self.mail.send_messages([message])
+            except Exception as e:
+                failures[row.pk] = repr(e)
+                # Drop a connection the server may have closed and open a fresh one for the rest of the batch.
+                try:
+                    self.mail.close()
+                except Exception:
+                    pass
+                self._open_mail()
+                continue
+            if not sent:
+                # Backends report messages they didn't send (e.g. with fail_silently) by returning 0.
+                failures[row.pk] = "The email backend did not send the message."
+        return failures
+
+    def _deliver_webhook(self, rows, context):
+        failures = {}
+        by_url = defaultdict(list)
+        for row in rows:
+            by_url[row.target].append(row)
+        for url, url_rows in by_url.items():
+            body = json.dumps({'events': [
+                {'id': row.pk, 'event': row.event, 'created_at': row.created_at.isoformat(), **row.payload}
+                for row in url_rows
+            ]}).encode()
+            headers = {'Content-Type': 'application/json'}
+            if self.conf['WEBHOOK_SECRET']:
+                digest = hmac.new(self.conf['WEBHOOK_SECRET'].encode(), body, hashlib.sha256).hexdigest()
+                headers['X-Signature'] = f'sha256={digest}'
+            try:
+                request = urllib.request.Request(url, data=body, headers=headers, method='POST')
+                with urllib.request.urlopen(request, timeout=self.conf['WEBHOOK_TIMEOUT']):
+                    pass
+            except Exception as e:
+                failures.update({row.pk: repr(e) for row in url_rows})
+        return failures
+
+
+class _Context:
+    """Names and addresses a batch's emails need, loaded with one query per model."""
+
+    def __init__(self, rows):
+        user_ids, tournament_ids = set(), set()
+        for row in rows:
+            if row.channel == 'email' and row.user_id:
+                user_ids.add(row.user_id)
+                user_ids.update(row.payload.get('players', ()))
+                tournament_ids.add(row.payload.get('tournament'))
+        self.users = get_user_model().objects.only('id', 'username', 'email').in_bulk(user_ids)
+        self.tournaments = Tournament.objects.only('id', 'name').in_bulk(tournament_ids - {None})
+
+    def email(self, row):
+        user = self.users.get(row.user_id)
+        tournament = self.tournaments.get(row.payload.get('tournament'))
+        if user is None or not user.email or tournament is None or row.event not in SUBJECTS:
+            return None
+        opponents = [self.users.get(player) for player in row.payload.get('players', ()) if player != user.pk]
+        fields = {
+            'username': user.username,
+            'tournament': tournament.name,
+            'round': row.payload.get('round'),
+            'opponent': opponents[0].username if opponents and opponents[0] else 'TBD',
+            'url': f"{settings.DJOSER['PROTOCOL']}://{settings.DJOSER['DOMAIN']}/tournament/{tournament.pk}",
+        }
+        return EmailMessage(
+            subject=SUBJECTS[row.event].format(**fields),
+            body=BODIES[row.event].format(**fields),
+            to=[user.email],
+        )
@@ -0,0 +1,55 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class HistoryCursorPagination(CursorPagination):
+    """
+    Cursor pagination for one bucket of a player's history. Each bucket gets its
+    own query parameter so `active` and `past` can be paged independently.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def __init__(self, bucket, ordering):
+        self.cursor_query_param = f'{bucket}_cursor'
+        self.ordering = ordering
+
+    def get_ordering(self, request, queryset, view):
+        # Always the bucket's own order: the view's filter backends (search ranking) don't apply to history.
+        return self.ordering
+
+
+class TournamentCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the tournament list, newest first. The cursor carries
+    the position, so pages cost neither a COUNT(*) nor an OFFSET scan however
+    deep they are (served by tournament_created_idx). Requests with ?page=N still
+    get the old page-number pages, count included.
+    """
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.legacy = PageNumberPagination() if 'page' in request.query_params else None
+        if self.legacy is not None:
+            return self.legacy.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.legacy is not None:
+            return self.legacy.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class LeaderboardCursorPagination(CursorPagination):
+    """Highest rating first, walked with player_stats_rating_idx."""
+    ordering = ('-rating', 'user_id')
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class NotificationCursorPagination(CursorPagination):
+    """A user's feed, newest first (notification_feed_idx)."""
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -0,0 +1,283 @@
+"""
+Per-request cost profiling.
+
+ProfilingMiddleware samples a fraction of requests (settings.PROFILING
+['SAMPLE_RATE']) and records, per endpoint, the query count, time spent in the
+database, time spent in serializers and total latency. Requests that run the
+same SQL several times are flagged as N+1 suspects and logged.
+
+Queries are observed through one execute wrapper installed on every database
+connection. It only looks at a context variable, so with sampling off the
+cost is a dictionary lookup per query and a float comparison per request.
+
+Histograms live in-process (one registry per worker) and are exposed in the
+Prometheus text format by the admin-only metrics view.
+"""
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'SAMPLE_RATE': 0.0,
+    # A statement run this many times in one request is reported as an N+1 suspect.
+    'DUPLICATE_THRESHOLD': 3,
+    'MAX_SIGNATURES': 200,
+}
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+_current = ContextVar('profiling_sample', default=None)
+
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+_VALUES = re.compile(r'VALUES (?:\((?:%s, )*%s\)(?:, )?)+')
+
+
+def config():
+    return {**DEFAULTS, **getattr(settings, 'PROFILING', {})}
+
+
+def signature(sql):
+    """SQL with variable-length parameter lists collapsed, so the same statement always matches."""
+    return _VALUES.sub('VALUES (...)', _IN_LIST.sub('IN (...)', sql))
+
+
+class Sample:
+    __slots__ = ('queries', 'db_time', 'serialize_time', 'statements', 'serializing')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.statements = Counter()
+        self.serializing = False
+
+    def add_query(self, sql, elapsed):
+        self.queries += 1
+        self.db_time += elapsed
+        self.statements[signature(sql)] += 1
+
+    def duplicates(self, threshold):
+        return {sql: count for sql, count in self.statements.items() if count >= threshold}
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper; installed on every connection by install_query_hook."""
+    sample = _current.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        sample.add_query(sql, time.perf_counter() - started)
+
+
+def install_query_hook(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class TimedRepresentationMixin:
+    """
+    Adds serializer time to the current sample. Only the outermost
+    to_representation call is timed, so nested serializers are not counted twice;
+    queries they trigger lazily count towards both database and serializer time.
+    """
+
+    def to_representation(self, instance):
+        sample = _current.get()
+        if sample is None or sample.serializing:
+            return super().to_representation(instance)
+        sample.serializing = True
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            sample.serialize_time += time.perf_counter() - started
+            sample.serializing = False
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.total += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self):
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            yield bound, running
+
+
+class EndpointStats:
+    __slots__ = ('latency', 'db', 'serialize', 'queries', 'flagged')
+
+    def __init__(self):
+        self.latency = Histogram(SECONDS_BUCKETS)
+        self.db = Histogram(SECONDS_BUCKETS)
+        self.serialize = Histogram(SECONDS_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.flagged = 0
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = defaultdict(EndpointStats)
+        self._signatures = Counter()
+
+    def record(self, endpoint, sample, latency, duplicates, max_signatures):
+        with self._lock:
+            stats = self._endpoints[endpoint]
+            stats.latency.observe(latency)
+            stats.db.observe(sample.db_time)
+            stats.serialize.observe(sample.serialize_time)
+            stats.queries.observe(sample.queries)
+            if duplicates:
+                stats.flagged += 1
+                for sql in duplicates:
+                    key = (*endpoint, sql)
+                    # Bounded so a bad endpoint cannot grow the registry forever.
+                    if key in self._signatures or len(self._signatures) < max_signatures:
+                        self._signatures[key] += 1
+
+    def endpoint(self, method, view):
+        with self._lock:
+            return self._endpoints.get((method, view))
+
+    def signatures(self):
+        with self._lock:
+            return dict(self._signatures)
+
+    def clear(self):
+        with self._lock:
+            self._endpoints.clear()
+            self._signatures.clear()
+
+    def prometheus(self):
+        """Renders every endpoint's histograms in the Prometheus text exposition format."""
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            signatures = sorted(self._signatures.items())
+            lines = []
+            for name, attr, help_text in (
+                ('tournament_request_seconds', 'latency', 'Total request latency.'),
+                ('tournament_request_db_seconds', 'db', 'Time spent executing SQL per request.'),
+                ('tournament_request_serialize_seconds', 'serialize', 'Time spent in serializers per request.'),
+                ('tournament_request_queries', 'queries', 'SQL statements per request.'),
+            ):
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+                for (method, view), stats in endpoints:
+                    histogram = getattr(stats, attr)
+                    labels = f'method="{method}",view="{_escape(view)}"'
+                    for bound, count in histogram.cumulative():
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                    lines.append(f'{name}_sum{{{labels}}} {histogram.total}')
+                    lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+
+            lines += [
+                '# HELP tournament_request_duplicate_sql_total Sampled requests that repeated a statement (N+1 suspects).',
+                '# TYPE tournament_request_duplicate_sql_total counter',
+            ]
+            for (method, view), stats in endpoints:
+                lines.append(f'tournament_request_duplicate_sql_total{{method="{method}",view="{_escape(view)}"}} {stats.flagged}')
+
+            lines += [
+                '# HELP tournament_duplicate_sql_total Requests in which this statement was repeated.',
+                '# TYPE tournament_duplicate_sql_total counter',
+            ]
+            for (method, view, sql), count in signatures:
+                lines.append(
+                    f'tournament_duplicate_sql_total{{method="{method}",view="{_escape(view)}",sql="{_escape(sql)}"}} {count}'
+                )
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+
+registry = Registry()
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        options = config()
+        self.sample_rate = options['SAMPLE_RATE']
+        self.duplicate_threshold = options['DUPLICATE_THRESHOLD']
+        self.max_signatures = options['MAX_SIGNATURES']
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.sample_rate or random.random() >= self.sample_rate:
+            return self.get_response(request)
+        sample = Sample()
+        token = _current.set(sample)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, sample, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        if not self.sample_rate or random.random() >= self.sample_rate:
+            return await self.get_response(request)
+        sample = Sample()
+        # Sync views run through sync_to_async, which copies this context, so their queries land in `sample`.
+        token = _current.set(sample)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, sample, time.perf_counter() - started)
+
+    def _finish(self, request, response, sample, latency):
+        match = request.resolver_match
+        if match is None or response.streaming:
+            # Unrouted requests would be unbounded labels; streams have no meaningful latency.
+            return response
+        endpoint = (request.method, match.view_name or match.route)
+        duplicates = sample.duplicates(self.duplicate_threshold)
+        registry.record(endpoint, sample, latency, duplicates, self.max_signatures)
+        for sql, count in duplicates.items():
+            logger.warning("%s %s ran the same SQL %d times (N+1?): %s", *endpoint, count, sql)
+
+        response['Server-Timing'] = (
+            f'db;dur={sample.db_time * 1000:.1f}, serialize;dur={sample.serialize_time * 1000:.1f}, '
+            f'total;dur={latency * 1000:.1f}'
+        )
+        response['X-Query-Count'] = str(sample.queries)
+        return response
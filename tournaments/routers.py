@@ -0,0 +1,84 @@
+"""
+Read-replica routing.
+
+Replicas are the DATABASES aliases listed in settings.DATABASE_REPLICAS['ALIASES'].
+Nothing reads from them by default: a view opts in with ReplicaReadsMixin,
+which sends the reads of its safe (GET/HEAD/OPTIONS) requests to a random
+replica for the duration of the request. Writes, and every read of a write
+request, go to the primary, so row locks taken by report_match never wait on
+spectators. A user who has just written is pinned to the primary for
+PIN_SECONDS so their next reads see the result despite replication lag.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.permissions import SAFE_METHODS
+
+DEFAULTS = {
+    'ALIASES': [],
+    'PIN_SECONDS': 5,
+    'PIN_CACHE': 'default',
+}
+
+# Alias the current request reads from; None means the primary.
+_read_alias = ContextVar('tournaments_read_alias', default=None)
+
+
+def config():
+    return {**DEFAULTS, **getattr(settings, 'DATABASE_REPLICAS', {})}
+
+
+def _pin_key(user_id):
+    return f'replica-pin:{user_id}'
+
+
+def pin_to_primary(user):
+    conf = config()
+    if conf['ALIASES'] and user.is_authenticated:
+        caches[conf['PIN_CACHE']].set(_pin_key(user.pk), True, conf['PIN_SECONDS'])
+
+
+def pinned_to_primary(user):
+    return user.is_authenticated and bool(caches[config()['PIN_CACHE']].get(_pin_key(user.pk)))
+
+
+class ReplicaRouter:
+    """Reads go wherever the current request was routed (the primary unless a view chose a replica)."""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive schema changes through replication.
+        return False if db in config()['ALIASES'] else None
+
+
+class ReplicaReadsMixin:
+    """
+    For DRF views: serves safe requests from a replica unless the user wrote
+    within PIN_SECONDS, and pins users after successful writes.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        aliases = config()['ALIASES']
+        if aliases and request.method in SAFE_METHODS and not pinned_to_primary(request.user):
+            self._replica_token = _read_alias.set(random.choice(aliases))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            _read_alias.reset(token)
+            self._replica_token = None
+        elif request.method not in SAFE_METHODS and response.status_code < 400:
+            pin_to_primary(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
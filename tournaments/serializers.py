@@ -1,12 +1,35 @@
 from rest_framework import serializers
-from .models import Tournament, Participant, Match,Sponsor
+from .models import Tournament, Participant, Match, Notification, PlayerStats, Sponsor
+from django.core.files.storage import default_storage
 from django.utils import timezone
+from .profiling import TimedRepresentationMixin
+
+class SponsorSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
+    """`image` is the original; `variants`/`srcset` list the WebP renditions once tournaments.images has made them."""
+    variants = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
 
-class SponsorSerializer(serializers.ModelSerializer):
     class Meta:
         model = Sponsor
-        fields = ['id', 'image']
-class ParticipantSerializer(serializers.ModelSerializer):
+        fields = ['id', 'image', 'variants', 'srcset']
+
+    def _url(self, name):
+        url = default_storage.url(name)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def get_variants(self, obj):
+        return [
+            {'width': variant['width'], 'height': variant['height'], 'url': self._url(variant['name'])}
+            for variant in obj.variants
+        ]
+
+    def get_srcset(self, obj):
+        if not obj.variants:
+            return ''
+        base = obj.variants[0]['height']
+        return ', '.join(f"{self._url(variant['name'])} {variant['height'] / base:g}x" for variant in obj.variants)
+class ParticipantSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     user_email = serializers.ReadOnlyField(source='user.email')
     class Meta:
         model = Participant
@@ -15,18 +38,12 @@ class ParticipantSerializer(serializers.ModelSerializer):
             'team_name', 'license_number', 'ranking_points', 'teammates_names', 
             'registered_at'
         ]
-        read_only_fields = ['user', 'registered_at']
+        read_only_fields = ['user', 'tournament', 'registered_at']
+        # Uniqueness (user, team name, summoner name per tournament) is enforced by
+        # DB constraints and reported by TournamentViewSet.join on IntegrityError.
+        validators = []
 
-    def validate(self, data):
-        if Participant.objects.filter(tournament=data['tournament'], license_number=data['license_number']).exists():
-            raise serializers.ValidationError("This Summoner Name is already registered in this tournament.")
-            
-        if Participant.objects.filter(tournament=data['tournament'], team_name=data['team_name']).exists():
-            raise serializers.ValidationError("This Team Name is already taken.")
-            
-        return data
-
-class MatchSerializer(serializers.ModelSerializer):
+class MatchSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     player1_email = serializers.ReadOnlyField(source='player1.email')
     player2_email = serializers.ReadOnlyField(source='player2.email')
     winner_email = serializers.ReadOnlyField(source='winner.email')
@@ -35,7 +52,74 @@ class MatchSerializer(serializers.ModelSerializer):
         model = Match
         fields = '__all__'
 
-class TournamentSerializer(serializers.ModelSerializer):
+class TournamentListSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
+    """
+    Flat representation for listings; match/sponsor counts come from TournamentQuerySet.with_counts().
+    `fields` keeps only the named fields and `expand` adds nested relations (see TournamentViewSet.list).
+    """
+    organizer_email = serializers.ReadOnlyField(source='organizer.email')
+    match_count = serializers.IntegerField(read_only=True)
+    sponsor_count = serializers.IntegerField(read_only=True)
+
+    EXPANDABLE = {
+        'matches': MatchSerializer,
+        'participants': ParticipantSerializer,
+        'sponsors': SponsorSerializer,
+    }
+
+    class Meta:
+        model = Tournament
+        fields = [
+            'id', 'name', 'description', 'discipline', 'format', 'organizer', 'organizer_email',
+            'start_time', 'deadline', 'max_participants', 'location_url', 'status', 'created_at',
+            'participant_count', 'match_count', 'sponsor_count',
+        ]
+        read_only_fields = fields
+
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        for name in expand:
+            self.fields[name] = self.EXPANDABLE[name](many=True, read_only=True)
+
+    def to_representation(self, instance):
+        return with_archived_bracket(instance, super().to_representation(instance))
+
+
+def with_archived_bracket(instance, data):
+    """Replaces the (empty) matches / participants of an archived tournament with what was rendered when it was archived."""
+    names = [name for name in ('matches', 'participants') if name in data]
+    if names and instance.archived_at is not None:
+        payload = instance.archived_bracket.payload
+        data.update((name, payload[name]) for name in names)
+    return data
+
+class TournamentSummarySerializer(TimedRepresentationMixin, serializers.ModelSerializer):
+    """Per-player result line; expects TournamentQuerySet.with_player_stats()."""
+    rounds = serializers.IntegerField(read_only=True)
+    final_round = serializers.IntegerField(read_only=True)
+    wins = serializers.IntegerField(read_only=True)
+    losses = serializers.IntegerField(read_only=True)
+    placement = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Tournament
+        fields = ['id', 'name', 'discipline', 'format', 'status', 'start_time', 'rounds', 'final_round', 'wins', 'losses', 'placement']
+
+    def get_placement(self, obj):
+        # Champion is 1st; losing in round r of an n-round bracket ties for 2^(n-r) + 1.
+        # Only meaningful for single elimination.
+        if obj.format != 'single_elimination' or not obj.rounds or not obj.final_round:
+            return None
+        if obj.final_round == obj.rounds and obj.status == 'finished' and obj.losses == 0:
+            return 1
+        if obj.losses == 0:
+            return None
+        return 2 ** (obj.rounds - obj.final_round) + 1
+
+class TournamentSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     organizer_email = serializers.ReadOnlyField(source='organizer.email')
     matches = MatchSerializer(many=True, read_only=True)
     participants = ParticipantSerializer(many=True, read_only=True)
@@ -43,8 +127,11 @@ class TournamentSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Tournament
-        fields = '__all__'
-        read_only_fields = ['organizer', 'status', 'created_at','sponsors']
+        exclude = ['search_vector']
+        read_only_fields = ['organizer', 'status', 'created_at','sponsors', 'participant_count', 'bracket_version']
+
+    def to_representation(self, instance):
+        return with_archived_bracket(instance, super().to_representation(instance))
 
     # --- NEW VALIDATION ---
     def validate_start_time(self, value):
@@ -56,6 +143,11 @@ class TournamentSerializer(serializers.ModelSerializer):
         
         return value
 
+    def validate_format(self, value):
+        if self.instance and self.instance.status != 'open' and value != self.instance.format:
+            raise serializers.ValidationError("The format can't change once the tournament has started.")
+        return value
+
     def validate(self, data):
         start = data.get('start_time')
         deadline = data.get('deadline')
@@ -69,4 +161,51 @@ class TournamentSerializer(serializers.ModelSerializer):
                 "deadline": "Registration deadline must be before the start time."
             })
             
-        return data
\ No newline at end of file
+        return data
+
+def normalize_bracket(data):
+    """
+    TournamentSerializer data with each user listed once: `users` maps ids to
+    emails, the organizer, participants and matches keep only the ids, and
+    nested rows drop their `tournament` id. Used by ?normalized=1 on the detail.
+    """
+    users = {}
+
+    def take(row, id_field, email_field):
+        email = row.pop(email_field, None)
+        if row.get(id_field) is not None:
+            users[str(row[id_field])] = {'email': email}
+        return row
+
+    normalized = take(dict(data), 'organizer', 'organizer_email')
+    normalized['participants'] = [
+        take({key: value for key, value in row.items() if key != 'tournament'}, 'user', 'user_email')
+        for row in data['participants']
+    ]
+    matches = []
+    for row in data['matches']:
+        row = {key: value for key, value in row.items() if key != 'tournament'}
+        for slot in ('player1', 'player2', 'winner'):
+            take(row, slot, f'{slot}_email')
+        matches.append(row)
+    normalized['matches'] = matches
+    normalized['users'] = users
+    return normalized
+
+
+class PlayerStatsSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
+    username = serializers.ReadOnlyField(source='user.username')
+    win_rate = serializers.SerializerMethodField()
+
+    class Meta:
+        model = PlayerStats
+        fields = ['user', 'username', 'rating', 'matches_played', 'matches_won', 'win_rate', 'titles', 'current_streak']
+
+    def get_win_rate(self, obj):
+        return round(obj.win_rate, 4)
+
+
+class NotificationSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Notification
+        fields = ['id', 'event', 'payload', 'created_at', 'read_at']
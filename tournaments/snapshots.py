@@ -0,0 +1,103 @@
+"""
+Pre-rendered detail responses for finished tournaments.
+
+A finished bracket only changes when the organizer edits the tournament or it
+gets archived, and both bump bracket_version. So its detail is rendered once
+into a TournamentSnapshot: the JSON bytes plus a gzip copy, written right
+after the report that finished it commits. TournamentViewSet.retrieve then
+returns those bytes as they are, with no serializer, renderer or compression
+on the request path, and with Cache-Control headers that let browsers and
+CDNs keep them. A snapshot whose version no longer matches is rendered again
+on the next request. manage.py build_snapshots backfills tournaments that
+finished before snapshots existed.
+"""
+import gzip
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.db.models import F, Q
+
+from .models import BULK_BATCH_SIZE, Tournament, TournamentSnapshot
+from .renderers import FastJSONRenderer
+from .serializers import TournamentSerializer
+
+DEFAULTS = {
+    'BASE_URL': '',
+    'COMPRESS': True,
+    'COMPRESS_LEVEL': 9,
+    'MAX_AGE': 86400,
+}
+
+
+def config():
+    return {**DEFAULTS, **getattr(settings, 'SNAPSHOTS', {})}
+
+
+class _Origin:
+    """Takes the request's place in the serializer context: media URLs are made absolute against BASE_URL."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+
+    def build_absolute_uri(self, location):
+        return urljoin(self.base_url, location)
+
+
+def render(tournaments, request=None):
+    """Unsaved TournamentSnapshots for `tournaments`, which should be loaded with with_bracket()."""
+    conf = config()
+    if conf['BASE_URL']:
+        context = {'request': _Origin(conf['BASE_URL'])}
+    else:
+        context = {'request': request} if request is not None else {}
+    renderer = FastJSONRenderer()
+    snapshots = []
+    for tournament in tournaments:
+        body = renderer.render(TournamentSerializer(tournament, context=context).data)
+        snapshots.append(TournamentSnapshot(
+            tournament_id=tournament.pk,
+            version=tournament.bracket_version,
+            body=body,
+            # mtime=0 keeps the bytes identical across renders of the same data.
+            body_gzip=gzip.compress(body, conf['COMPRESS_LEVEL'], mtime=0) if conf['COMPRESS'] else None,
+        ))
+    return snapshots
+
+
+def store(snapshots):
+    """Upserts snapshots in one statement, so concurrent renders of the same tournament can't conflict."""
+    TournamentSnapshot.objects.bulk_create(
+        snapshots, update_conflicts=True, unique_fields=['tournament'],
+        update_fields=['version', 'body', 'body_gzip', 'created_at'], batch_size=BULK_BATCH_SIZE,
+    )
+
+
+def refresh(tournament_id, request=None):
+    """Renders and stores the snapshot of a finished tournament; returns it, or None if it isn't finished."""
+    tournaments = Tournament.objects.filter(pk=tournament_id, status='finished').defer('search_vector').with_bracket()
+    snapshots = render(tournaments, request)
+    store(snapshots)
+    return snapshots[0] if snapshots else None
+
+
+def stale():
+    """Finished tournaments without a snapshot of their current version."""
+    return Tournament.objects.filter(status='finished').filter(
+        Q(snapshot__isnull=True) | ~Q(snapshot__version=F('bracket_version'))
+    )
+
+
+def backfill(batch_size=100, force=False, log=None):
+    """Renders snapshots for stale() tournaments (every finished one with `force`), by id keyset. Returns the count."""
+    tournaments = Tournament.objects.filter(status='finished') if force else stale()
+    rendered = 0
+    last_id = 0
+    while True:
+        ids = list(tournaments.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return rendered
+        last_id = ids[-1]
+        store(render(Tournament.objects.filter(pk__in=ids).defer('search_vector').with_bracket()))
+        rendered += len(ids)
+        if log:
+            log(f"{rendered} snapshots rendered")
@@ -0,0 +1,152 @@
+"""
+Per-player statistics maintained as results come in.
+
+report_match / report_batch call record_results() inside their transaction for
+every contested match they decide, and record_title() when the tournament ends,
+so a PlayerStats row is always current and the leaderboard is a plain index
+scan. rebuild() recomputes every row from match history for backfills
+(manage.py rebuild_player_stats), replaying tournaments one after another in
+start order and each in play order. Matches don't record when they were
+decided, so that is only an approximation of the order the reports came in:
+counts and titles come out exact, but a player whose tournaments overlapped
+gets their matches interleaved differently, and so a slightly different
+rating and current streak than the incremental updates gave them.
+"""
+from django.db import transaction
+from django.db.models import F, Q
+
+from .formats import FORMATS
+from .models import BULK_BATCH_SIZE, ArchivedBracket, Match, Participant, PlayerStats, Tournament
+
+# Elo K-factor: the most rating points one match can move.
+K_FACTOR = 32
+
+FIELDS = ['matches_played', 'matches_won', 'current_streak', 'rating']
+
+
+def expected_score(rating, opponent_rating):
+    return 1 / (1 + 10 ** ((opponent_rating - rating) / 400))
+
+
+def apply_result(winner, loser):
+    """Updates two PlayerStats in memory for one decided match."""
+    change = round(K_FACTOR * (1 - expected_score(winner.rating, loser.rating)))
+    winner.rating += change
+    loser.rating -= change
+    winner.matches_played += 1
+    loser.matches_played += 1
+    winner.matches_won += 1
+    winner.current_streak = max(winner.current_streak, 0) + 1
+    loser.current_streak = min(loser.current_streak, 0) - 1
+
+
+def record_results(results):
+    """
+    Applies (winner_id, loser_id) pairs in order. Missing rows are created, the
+    affected rows are locked in user id order (so concurrent reports can't
+    deadlock) and written back with one UPDATE: three queries however many pairs.
+    """
+    if not results:
+        return
+    user_ids = sorted({user_id for pair in results for user_id in pair})
+    PlayerStats.objects.bulk_create([PlayerStats(user_id=user_id) for user_id in user_ids], ignore_conflicts=True)
+    stats = {row.user_id: row for row in PlayerStats.objects.select_for_update().filter(user_id__in=user_ids).order_by('user_id')}
+    for winner_id, loser_id in results:
+        apply_result(stats[winner_id], stats[loser_id])
+    PlayerStats.objects.bulk_update(list(stats.values()), FIELDS)
+
+
+def record_title(tournament):
+    """Credits the champion of a tournament that has just finished."""
+    champion = tournament.champion()
+    if champion is not None:
+        credited = PlayerStats.objects.filter(user_id=champion).update(titles=F('titles') + 1)
+        if not credited:
+            # A champion who only ever got byes has no row yet.
+            PlayerStats.objects.bulk_create([PlayerStats(user_id=champion)], ignore_conflicts=True)
+            PlayerStats.objects.filter(user_id=champion).update(titles=F('titles') + 1)
+
+
+def _play_order(match):
+    # (stage, round_number, match_number): losers round n needs winners round n's losers,
+    # and the grand final (stored as round 1) comes last.
+    stage, round_number, match_number = match[:3]
+    return stage == 'grand_final', round_number, stage == 'losers', match_number
+
+
+def _contested(rows):
+    """(winner_id, loser_id) for decided matches with two players; byes are left out."""
+    return [
+        (winner, player2 if winner == player1 else player1)
+        for player1, player2, winner in rows
+        if player1 is not None and player2 is not None and winner is not None
+    ]
+
+
+def rebuild(batch_size=500, log=None):
+    """
+    Recomputes every PlayerStats row from match history. Tournaments are read
+    in start order, `batch_size` at a time by keyset, with one query per batch
+    for their matches, one for the seeds of round-based ones and one for
+    archived brackets; totals are accumulated in memory. The old rows are then replaced in one
+    transaction. Ratings and streaks of players in overlapping tournaments may
+    differ from the incremental ones (see the module docstring). Results reported while the history is being read are not
+    picked up, so run it when reporting is quiet. Returns the number of players.
+    """
+    stats = {}
+
+    def row(user_id):
+        if user_id not in stats:
+            stats[user_id] = PlayerStats(user_id=user_id)
+        return stats[user_id]
+
+    tournaments = Tournament.objects.filter(status__in=('ongoing', 'finished')).order_by('start_time', 'id')
+    position = None
+    processed = 0
+    while True:
+        page = tournaments
+        if position is not None:
+            page = page.filter(Q(start_time__gt=position[0]) | Q(start_time=position[0], id__gt=position[1]))
+        batch = list(page.values_list('id', 'start_time', 'format', 'status')[:batch_size])
+        if not batch:
+            break
+        position = (batch[-1][1], batch[-1][0])
+        ids = [tournament_id for tournament_id, *_ in batch]
+
+        columns = ('stage', 'round_number', 'match_number', 'player1_id', 'player2_id', 'winner_id', 'next_match_id')
+        matches = {tournament_id: [] for tournament_id in ids}
+        for tournament_id, *match in Match.objects.filter(tournament_id__in=ids).values_list('tournament_id', *columns):
+            matches[tournament_id].append(match)
+
+        seeds = {tournament_id: [] for tournament_id in ids}
+        round_based = [tournament_id for tournament_id, _, format, _ in batch if FORMATS[format].round_based]
+        for tournament_id, user_id in (
+            Participant.objects.filter(tournament_id__in=round_based)
+            .order_by('tournament_id', '-ranking_points', 'registered_at', 'id')
+            .values_list('tournament_id', 'user_id')
+        ):
+            seeds[tournament_id].append(user_id)
+
+        # Archived tournaments have no live rows; their history is read back from ArchivedBracket.
+        for bracket in ArchivedBracket.objects.filter(tournament_id__in=ids).defer('payload'):
+            matches[bracket.tournament_id] = list(bracket.values('match', *columns))
+            seeds[bracket.tournament_id] = bracket.seeds
+
+        for tournament_id, _, format, status in batch:
+            played = sorted(matches[tournament_id], key=_play_order)
+            for winner_id, loser_id in _contested(match[3:6] for match in played):
+                apply_result(row(winner_id), row(loser_id))
+            if status == 'finished':
+                history = [(round_number, *rest) for _, round_number, _, *rest in played]
+                champion = FORMATS[format].champion(seeds[tournament_id], history)
+                if champion is not None:
+                    row(champion).titles += 1
+
+        processed += len(batch)
+        if log:
+            log(f"{processed} tournaments replayed, {len(stats)} players")
+
+    with transaction.atomic():
+        PlayerStats.objects.all().delete()
+        PlayerStats.objects.bulk_create(stats.values(), batch_size=BULK_BATCH_SIZE)
+    return len(stats)
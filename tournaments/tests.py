@@ -1,3 +1,1699 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import io
+import json
+import math
+import tempfile
+import time
+from collections import Counter
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail import EmailMultiAlternatives
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from . import compression, stats
+from .bracket import first_round_slots, single_elimination, swiss_round, swiss_standings
+from .cache import bracket_cache
+from .events import broker
+from .exceptions import TournamentNotOpen
+from .models import ArchivedBracket, Tournament, TournamentSnapshot, Participant, Match, Notification, OutboxMessage, PlayerStats, Sponsor
+from .notifications import Worker
+from .profiling import Sample, registry as profiling_registry
+from .renderers import FastJSONRenderer
+from .routers import ReplicaRouter, _read_alias
+from .serializers import TournamentSerializer
+
+User = get_user_model()
+
+
+def make_users(count, prefix='player'):
+    return User.objects.bulk_create([
+        User(username=f"{prefix}{i}", email=f"{prefix}{i}@test.gg", password='!')
+        for i in range(count)
+    ])
+
+
+def make_tournament(organizer, **kwargs):
+    defaults = {
+        'name': 'Test Cup',
+        'organizer': organizer,
+        'start_time': timezone.now() + timedelta(days=2),
+        'deadline': timezone.now() + timedelta(days=1),
+    }
+    defaults.update(kwargs)
+    return Tournament.objects.create(**defaults)
+
+
+def add_participants(tournament, users):
+    participants = Participant.objects.bulk_create([
+        Participant(tournament=tournament, user=user, team_name=f"Team {user.username}",
+                    license_number=f"{user.username}#EUW", ranking_points=1000 - i)
+        for i, user in enumerate(users)
+    ])
+    Tournament.objects.filter(pk=tournament.pk).update(participant_count=F('participant_count') + len(users))
+    return participants
+
+
+class SingleEliminationLayoutTests(TestCase):
+    def test_links_every_match_to_the_next_round(self):
+        specs = single_elimination(list(range(1, 9)))
+        self.assertEqual(len(specs), 7)
+        for spec in specs[:-1]:
+            target = specs[spec.next_index]
+            self.assertEqual(target.round_number, spec.round_number + 1)
+            self.assertEqual(target.match_number, spec.match_number // 2)
+        self.assertIsNone(specs[-1].next_index)
+
+    def test_byes_advance_in_memory(self):
+        specs = single_elimination([1, 2, 3])
+        bye = specs[0]
+        self.assertEqual((bye.player1, bye.player2, bye.winner), (1, None, 1))
+        self.assertEqual((specs[1].player1, specs[1].player2), (2, 3))
+        self.assertEqual(specs[2].player1, 1)
+
+    def test_standard_seed_order(self):
+        specs = single_elimination(list(range(1, 9)))
+        self.assertEqual(
+            [(spec.player1, spec.player2) for spec in specs[:4]],
+            [(1, 8), (4, 5), (2, 7), (3, 6)],
+        )
+
+
+class SeedingPropertyTests(TestCase):
+    def test_layout_for_every_size(self):
+        for count in range(2, 4097):
+            seeds = list(range(count))
+            slots = first_round_slots(seeds)
+            size = len(slots)
+            self.assertEqual(sorted(seed for seed in slots if seed is not None), seeds, count)
+
+            byes = []
+            for a, b in zip(slots[::2], slots[1::2]):
+                self.assertIsNotNone(a, count)
+                if b is None:
+                    byes.append(a)
+                else:
+                    # 1 v N, 2 v N-1, ...
+                    self.assertEqual(a + b, size - 1, count)
+            self.assertEqual(sorted(byes), seeds[:size - count], count)
+            self.assertLess(slots.index(0), size // 2, count)
+            self.assertGreaterEqual(slots.index(1), size // 2, count)
+
+    def test_byes_are_resolved_in_memory(self):
+        # Full layouts are slower to build, so every small size plus the edges of each power of two.
+        sizes = set(range(2, 513)) | {2 ** k + d for k in range(10, 13) for d in (-1, 0, 1)} | {4096}
+        for count in sorted(sizes):
+            specs = single_elimination(list(range(count)))
+            undecided_feeders = Counter(spec.next_index for spec in specs if spec.winner is None)
+            bye_wins = 0
+            for i, spec in enumerate(specs):
+                self.assertFalse(spec.void, count)
+                players = (spec.player1 is not None) + (spec.player2 is not None)
+                if spec.winner is not None:
+                    self.assertEqual((spec.round_number, players), (1, 1), count)
+                    bye_wins += 1
+                else:
+                    # Every open match is waiting on real players or real matches, never on a bye.
+                    self.assertEqual(players + undecided_feeders[i], 2, count)
+            self.assertEqual(bye_wins, 2 ** math.ceil(math.log2(count)) - count, count)
+
+
+class StartTournamentTests(TestCase):
+    def setUp(self):
+        self.users = make_users(64)
+        self.tournament = make_tournament(self.users[0], max_participants=64)
+
+    def bracket_queries(self, tournament):
+        # The "match ready" outbox rows are one bulk insert, split only by the backend's parameter limit.
+        with CaptureQueriesContext(connection) as ctx:
+            tournament.start_tournament()
+        return [q for q in ctx.captured_queries if OutboxMessage._meta.db_table not in q['sql']]
+
+    def test_query_count_depends_on_rounds_not_matches(self):
+        add_participants(self.tournament, self.users[:37])
+        small = len(self.bracket_queries(self.tournament))
+
+        other = make_tournament(self.users[0], max_participants=64)
+        add_participants(other, self.users)
+        # 37 and 64 entrants both produce a 6-round bracket.
+        self.assertEqual(len(self.bracket_queries(other)), small)
+        self.assertEqual(other.matches.count(), 63)
+        self.assertLess(small, 16)
+        # All 64 first-round players hear their match is ready.
+        ready = OutboxMessage.objects.filter(event='match_ready', channel='feed', payload__tournament=other.id)
+        self.assertEqual(ready.count(), 64)
+
+    def test_persisted_links_and_byes(self):
+        add_participants(self.tournament, self.users[:3])
+        self.tournament.start_tournament()
+
+        self.tournament.refresh_from_db()
+        self.assertEqual(self.tournament.status, 'ongoing')
+        semi_a, semi_b, final = Match.objects.filter(tournament=self.tournament)
+        self.assertEqual(semi_a.next_match_id, final.id)
+        self.assertEqual(semi_b.next_match_id, final.id)
+        # The top seed gets the bye.
+        self.assertEqual(semi_a.winner_id, self.users[0].id)
+        self.assertEqual(final.player1_id, self.users[0].id)
+        self.assertEqual((semi_b.player1_id, semi_b.player2_id), (self.users[1].id, self.users[2].id))
+
+    def test_needs_two_participants(self):
+        add_participants(self.tournament, self.users[:1])
+        with self.assertRaises(ValueError):
+            self.tournament.start_tournament()
+        # The failed start leaves registration open.
+        self.assertEqual(Tournament.objects.get(pk=self.tournament.pk).status, 'open')
+
+    def test_seeds_are_read_after_registration_closes(self):
+        add_participants(self.tournament, self.users[:4])
+        seeds = Tournament._seeds
+        statuses = []
+
+        def read_seeds(tournament):
+            statuses.append(Tournament.objects.get(pk=tournament.pk).status)
+            return seeds(tournament)
+
+        with mock.patch.object(Tournament, '_seeds', read_seeds):
+            self.tournament.start_tournament()
+        # A join or a seat release can no longer change the field being seeded.
+        self.assertEqual(statuses, ['ongoing'])
+
+
+class TournamentEndpointQueryTests(TestCase):
+    def setUp(self):
+        bracket_cache.clear()
+        self.users = make_users(16)
+        self.client = APIClient()
+
+    def make_started(self, size, **kwargs):
+        tournament = make_tournament(self.users[0], max_participants=16, **kwargs)
+        add_participants(tournament, self.users[:size])
+        tournament.start_tournament()
+        return tournament
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def test_list_query_count_is_fixed_per_page(self):
+        self.make_started(4)
+        few, _ = self.count_queries('/api/tournaments/')
+
+        for _ in range(8):
+            self.make_started(16)
+        many, response = self.count_queries('/api/tournaments/')
+
+        self.assertEqual(few, many)
+        row = response.data['results'][0]
+        self.assertEqual((row['participant_count'], row['match_count'], row['sponsor_count']), (16, 15, 0))
+        self.assertNotIn('matches', row)
+
+    def test_detail_query_count_is_fixed_per_bracket(self):
+        small = self.make_started(2)
+        large = self.make_started(16)
+
+        small_count, _ = self.count_queries(f'/api/tournaments/{small.id}/')
+        large_count, response = self.count_queries(f'/api/tournaments/{large.id}/')
+
+        self.assertEqual(small_count, large_count)
+        self.assertEqual(len(response.data['matches']), 15)
+        self.assertEqual(response.data['matches'][0]['player1_email'], self.users[0].email)
+
+
+class TournamentListPaginationTests(TestCase):
+    def setUp(self):
+        self.users = make_users(4)
+        self.client = APIClient()
+        now = timezone.now()
+        self.tournaments = [make_tournament(self.users[0], name=f"Cup {i}") for i in range(25)]
+        # Several share a created_at so ties have to be broken by id.
+        for i, tournament in enumerate(self.tournaments):
+            Tournament.objects.filter(pk=tournament.pk).update(created_at=now - timedelta(minutes=i // 3))
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response, [query['sql'] for query in ctx.captured_queries]
+
+    def test_cursor_pages_cover_everything_without_counting(self):
+        url, seen = '/api/tournaments/?page_size=4', []
+        while url:
+            response, queries = self.get(url)
+            self.assertEqual(len(queries), 1)
+            self.assertNotIn('count', response.data)
+            seen += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(sorted(seen), sorted(t.id for t in self.tournaments))
+        # Newest first, ties by id descending.
+        minutes_old = {t.id: i // 3 for i, t in enumerate(self.tournaments)}
+        self.assertEqual(seen, sorted(minutes_old, key=lambda pk: (minutes_old[pk], -pk)))
+
+    def test_page_numbers_still_work(self):
+        response, _ = self.get('/api/tournaments/?page=2')
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_fields_limit_columns_and_subqueries(self):
+        response, queries = self.get('/api/tournaments/?fields=id,name,status')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'name', 'status'})
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"description"', queries[0])
+        self.assertNotIn('tournaments_match', queries[0])
+        self.assertNotIn('users_user', queries[0])
+
+    def test_expand_prefetches_only_requested_relations(self):
+        tournament = self.tournaments[0]
+        add_participants(tournament, self.users)
+        tournament.start_tournament()
+
+        response, queries = self.get('/api/tournaments/?fields=id,name&expand=participants')
+        self.assertEqual(len(queries), 2)
+        row = next(row for row in response.data['results'] if row['id'] == tournament.id)
+        self.assertEqual(set(row), {'id', 'name', 'participants'})
+        self.assertEqual(len(row['participants']), 4)
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get('/api/tournaments/?fields=id,password')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('fields', response.data)
+
+
+class TournamentSearchTests(TestCase):
+    def setUp(self):
+        self.organizer = make_users(1)[0]
+        self.client = APIClient()
+        now = timezone.now()
+        self.worlds = make_tournament(self.organizer, name='Worlds Championship', status='finished',
+                                      start_time=now - timedelta(days=40), deadline=now - timedelta(days=41))
+        self.clash = make_tournament(self.organizer, name='Winter Clash', description='Weekly championship qualifier',
+                                     start_time=now + timedelta(days=3))
+        self.aram = make_tournament(self.organizer, name='Bridge Brawl', discipline='1v1_howling_abyss',
+                                    start_time=now + timedelta(days=10))
+
+    def ids(self, query):
+        response = self.client.get(f'/api/tournaments/?fields=id&{query}')
+        self.assertEqual(response.status_code, 200, response.data)
+        return [row['id'] for row in response.data['results']]
+
+    def test_filters_by_status_discipline_and_start_range(self):
+        self.assertEqual(self.ids('status=finished'), [self.worlds.id])
+        self.assertEqual(set(self.ids('status=open,finished')), {self.worlds.id, self.clash.id, self.aram.id})
+        self.assertEqual(self.ids('discipline=1v1_howling_abyss'), [self.aram.id])
+        start_after = (timezone.now() + timedelta(days=1)).date().isoformat()
+        self.assertEqual(set(self.ids(f'start_after={start_after}')), {self.clash.id, self.aram.id})
+        self.assertEqual(self.ids(f'start_after={start_after}&start_before={self.aram.start_time.date().isoformat()}'), [self.clash.id])
+
+    def test_bad_date_is_a_400(self):
+        response = self.client.get('/api/tournaments/?start_after=next-week')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('start_after', response.data)
+
+    def test_impossible_date_is_a_400(self):
+        response = self.client.get('/api/tournaments/?start_before=2026-02-30')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('start_before', response.data)
+
+    def test_search_combines_with_filters(self):
+        self.assertEqual(self.ids('search=clash&status=open'), [self.clash.id])
+        self.assertEqual(self.ids('search=clash&status=finished'), [])
+
+    @skipUnless(connection.vendor == 'postgresql', "full-text search needs PostgreSQL")
+    def test_ranked_full_text_search_with_typo_fallback(self):
+        # Name matches (weight A) outrank description matches (weight C).
+        self.assertEqual(self.ids('search=championship'), [self.worlds.id, self.clash.id])
+        self.assertEqual(self.ids('search=howling abyss'), [self.aram.id])
+        self.assertEqual(self.ids('search=champoinship')[0], self.worlds.id)
+
+    @skipUnless(connection.vendor == 'postgresql', "full-text search needs PostgreSQL")
+    def test_search_pages_through_equal_ranks(self):
+        twins = [make_tournament(self.organizer, name='Spring Cup') for _ in range(5)]
+        seen, url = [], '/api/tournaments/?fields=id&search=spring cup&page_size=2'
+        while url:
+            response = self.client.get(url)
+            seen += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(seen, sorted((t.id for t in twins), reverse=True))
+
+
+class UserHistoryTests(TestCase):
+    def setUp(self):
+        self.users = make_users(8)
+        self.client = APIClient()
+
+    def make_finished(self, winner_first=True):
+        """Four players: semis are users[0] v users[3] and users[1] v users[2]; player1 always wins."""
+        tournament = make_tournament(self.users[0], max_participants=4)
+        add_participants(tournament, self.users[:4])
+        tournament.start_tournament()
+        semi_a, semi_b, final = Match.objects.filter(tournament=tournament)
+        Match.objects.filter(pk=semi_a.pk).update(winner=semi_a.player1)
+        Match.objects.filter(pk=semi_b.pk).update(winner=semi_b.player1)
+        final_winner = semi_a.player1_id if winner_first else semi_b.player1_id
+        Match.objects.filter(pk=final.pk).update(
+            player1=semi_a.player1, player2=semi_b.player1, winner_id=final_winner,
+        )
+        Tournament.objects.filter(pk=tournament.pk).update(status='finished')
+        return tournament
+
+    def history(self, query):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(f'/api/tournaments/history/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response.data
+
+    def test_query_count_is_fixed(self):
+        self.make_finished()
+        few, _ = self.history(f'username={self.users[0].username}')
+        for _ in range(5):
+            self.make_finished()
+        many, data = self.history(f'username={self.users[0].username}')
+
+        self.assertEqual(few, many)
+        self.assertEqual(len(data['past']), 6)
+        self.assertIsNone(data['past_next'])
+
+    def test_buckets_keep_their_order_while_searching(self):
+        now = timezone.now()
+        # Newest-created first (the list's order) would put each bucket the wrong way round.
+        soon = make_tournament(self.users[0], name='Soon Cup', start_time=now + timedelta(days=3))
+        late = make_tournament(self.users[0], name='Late Cup', start_time=now + timedelta(days=9))
+        for tournament in (soon, late):
+            add_participants(tournament, self.users[:1])
+        newer, older = self.make_finished(), self.make_finished()
+        Tournament.objects.filter(pk=older.pk).update(start_time=now - timedelta(days=9))
+        Tournament.objects.filter(pk=newer.pk).update(start_time=now - timedelta(days=3))
+
+        for query in ('', '&search=cup'):
+            _, data = self.history(f'username={self.users[0].username}{query}')
+            self.assertEqual([row['id'] for row in data['active']], [soon.id, late.id])
+            self.assertEqual([row['id'] for row in data['past']], [newer.id, older.id])
+
+    def test_buckets_are_cursor_paginated(self):
+        for _ in range(3):
+            self.make_finished()
+        _, data = self.history(f'username={self.users[0].username}&bucket=past&page_size=2')
+
+        self.assertNotIn('active', data)
+        self.assertEqual(len(data['past']), 2)
+        self.assertIn('past_cursor=', data['past_next'])
+
+        response = self.client.get(data['past_next'])
+        self.assertEqual(len(response.data['past']), 1)
+
+    def test_summary_reports_placement_and_record(self):
+        self.make_finished(winner_first=False)
+        users = self.users
+
+        _, champion = self.history(f'username={users[1].username}&summary=1')
+        _, runner_up = self.history(f'username={users[0].username}&summary=1')
+        _, semifinalist = self.history(f'username={users[2].username}&summary=1')
+
+        self.assertEqual(
+            {k: champion['past'][0][k] for k in ('placement', 'final_round', 'wins', 'losses')},
+            {'placement': 1, 'final_round': 2, 'wins': 2, 'losses': 0},
+        )
+        self.assertEqual(runner_up['past'][0]['placement'], 2)
+        self.assertEqual(runner_up['past'][0]['losses'], 1)
+        self.assertEqual(semifinalist['past'][0]['placement'], 3)
+        self.assertNotIn('matches', champion['past'][0])
+
+
+class JoinTests(TestCase):
+    def setUp(self):
+        self.users = make_users(6)
+        self.tournament = make_tournament(self.users[0], max_participants=4)
+        self.client = APIClient()
+
+    def join(self, user, team_name=None, license_number=None):
+        self.client.force_authenticate(user)
+        return self.client.post(f'/api/tournaments/{self.tournament.id}/join/', {
+            'team_name': team_name or f"Team {user.username}",
+            'license_number': license_number or f"{user.username}#EUW",
+            'ranking_points': 100,
+            'teammates_names': '',
+        }, format='json')
+
+    def test_join_stops_at_capacity(self):
+        statuses = [self.join(user).status_code for user in self.users]
+
+        self.assertEqual(statuses, [201, 201, 201, 201, 400, 400])
+        self.tournament.refresh_from_db()
+        self.assertEqual(self.tournament.participant_count, 4)
+        self.assertEqual(self.tournament.participants.count(), 4)
+        self.assertEqual(self.join(self.users[5]).data['error'], "Tournament is full")
+
+    def test_successful_join_is_one_update_and_one_insert(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.join(self.users[0]).status_code, 201)
+        statements = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith(('UPDATE', 'INSERT', 'SELECT'))]
+        self.assertEqual([sql.split()[0] for sql in statements], ['UPDATE', 'INSERT'])
+
+    def test_duplicates_are_rejected_and_release_the_seat(self):
+        self.join(self.users[0], team_name='T1', license_number='Faker#KR1')
+
+        self.assertEqual(self.join(self.users[1], team_name='T1').data['error'], "This Team Name is already taken.")
+        self.assertEqual(
+            self.join(self.users[2], license_number='Faker#KR1').data['error'],
+            "This Summoner Name is already registered in this tournament.",
+        )
+        self.assertEqual(self.join(self.users[0]).data['error'], "You have already joined this tournament.")
+
+        self.tournament.refresh_from_db()
+        self.assertEqual(self.tournament.participant_count, 1)
+
+    def test_non_numeric_id_is_not_found(self):
+        self.client.force_authenticate(self.users[0])
+        self.assertEqual(self.client.post('/api/tournaments/abc/join/', {}, format='json').status_code, 404)
+
+    def test_leaving_frees_the_seat(self):
+        for user in self.users[:4]:
+            self.join(user)
+        Participant.objects.get(tournament=self.tournament, user=self.users[1]).delete()
+        # A deleted account takes its registrations with it.
+        self.users[2].delete()
+
+        self.tournament.refresh_from_db()
+        self.assertEqual(self.tournament.participant_count, 2)
+        self.assertEqual(self.join(self.users[4]).status_code, 201)
+
+    def test_deadline_passed(self):
+        Tournament.objects.filter(pk=self.tournament.pk).update(deadline=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(self.join(self.users[0]).data['error'], "Registration deadline passed")
+
+
+@skipUnless(connection.vendor == 'postgresql', "needs a database with real row-level concurrency")
+class ConcurrentJoinTests(TransactionTestCase):
+    def test_concurrent_joins_never_overfill(self):
+        users = make_users(400, prefix='rush')
+        tournament = make_tournament(users[0], max_participants=16)
+
+        def join(user):
+            client = APIClient()
+            client.force_authenticate(user)
+            try:
+                return client.post(f'/api/tournaments/{tournament.id}/join/', {
+                    'team_name': user.username, 'license_number': user.username,
+                    'ranking_points': 0, 'teammates_names': '',
+                }, format='json').status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            statuses = list(pool.map(join, users))
+
+        tournament.refresh_from_db()
+        self.assertEqual(statuses.count(201), 16)
+        self.assertEqual(tournament.participants.count(), 16)
+        self.assertEqual(tournament.participant_count, 16)
+
+
+@skipUnless(connection.vendor == 'postgresql', "needs a database with real row-level concurrency")
+class ConcurrentRoundCompletionTests(TransactionTestCase):
+    def test_last_two_reports_of_a_round_pair_the_next_one(self):
+        users = make_users(4)
+        tournament = make_tournament(users[0], format='swiss', max_participants=4)
+        add_participants(tournament, users)
+        tournament.start_tournament()
+        matches = list(Match.objects.filter(tournament=tournament).select_related('player1', 'player2'))
+        url = f'/api/tournaments/{tournament.id}/matches/{{}}/report/'
+
+        def vote(match, voter):
+            client = APIClient()
+            client.force_authenticate(voter)
+            try:
+                return client.post(url.format(match.id), {'winner_slot': 'player1'}, format='json').status_code
+            finally:
+                connection.close()
+
+        for match in matches:
+            vote(match, match.player1)
+        # Both deciding votes at once: whichever commits second must see the round complete.
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            statuses = list(pool.map(vote, matches, [match.player2 for match in matches]))
+
+        self.assertEqual(statuses, [200, 200])
+        self.assertEqual(Match.objects.filter(tournament=tournament, round_number=2).count(), 2)
+
+
+class DetailCacheTests(TestCase):
+    def setUp(self):
+        bracket_cache.clear()
+        self.users = make_users(4)
+        self.tournament = make_tournament(self.users[0], max_participants=4)
+        add_participants(self.tournament, self.users)
+        self.tournament.start_tournament()
+        self.url = f'/api/tournaments/{self.tournament.id}/'
+        self.client = APIClient()
+
+    def test_repeat_polls_only_read_the_version(self):
+        first = self.client.get(self.url)
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.get(self.url)
+
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first['ETag'], second['ETag'])
+        self.assertIn('Last-Modified', second)
+
+    def test_matching_etag_gets_304(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_report_invalidates_snapshot(self):
+        before = self.client.get(self.url)
+        match = Match.objects.filter(tournament=self.tournament).first()
+
+        self.client.force_authenticate(self.users[0])
+        self.client.post(f'{self.url}matches/{match.id}/report/', {'winner_email': self.users[0].email}, format='json')
+
+        after = self.client.get(self.url, HTTP_IF_NONE_MATCH=before['ETag'])
+        self.assertEqual(after.status_code, 200)
+        self.assertNotEqual(after['ETag'], before['ETag'])
+        self.assertEqual(after.data['matches'][0]['player1_vote'], self.users[0].id)
+
+
+class SnapshotTests(TestCase):
+    def setUp(self):
+        bracket_cache.clear()
+        self.users = make_users(2)
+        self.tournament = make_tournament(self.users[0], max_participants=2)
+        add_participants(self.tournament, self.users)
+        self.tournament.start_tournament()
+        self.url = f'/api/tournaments/{self.tournament.id}/'
+        self.client = APIClient()
+
+    def finish(self):
+        match = Match.objects.get(tournament=self.tournament)
+        with self.captureOnCommitCallbacks(execute=True):
+            for user in self.users:
+                self.client.force_authenticate(user)
+                self.client.post(f'{self.url}matches/{match.id}/report/', {'winner_slot': 'player1'}, format='json')
+        self.client.force_authenticate(None)
+
+    def test_finished_detail_is_served_from_stored_bytes(self):
+        self.finish()
+        snapshot = TournamentSnapshot.objects.get(tournament=self.tournament)
+        self.assertEqual(snapshot.version, Tournament.objects.get(pk=self.tournament.pk).bracket_version)
+
+        with CaptureQueriesContext(connection) as ctx, mock.patch.object(TournamentSerializer, 'to_representation') as render:
+            response = self.client.get(self.url)
+            gzipped = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, br')
+        render.assert_not_called()
+        self.assertEqual(len(ctx.captured_queries), 4)
+        self.assertEqual(response.content, bytes(snapshot.body))
+        self.assertEqual(json.loads(response.content)['status'], 'finished')
+        self.assertIn('max-age=', response['Cache-Control'])
+        self.assertEqual(gzipped['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(gzipped.content), response.content)
+        self.assertTrue(response['ETag'].startswith('W/'))
+        self.assertEqual(gzipped['ETag'], response['ETag'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=gzipped['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertIn('Accept-Encoding', not_modified['Vary'])
+
+    def test_outdated_snapshot_is_rendered_again(self):
+        self.finish()
+        self.client.force_authenticate(self.users[0])
+        self.client.patch(self.url, {'name': 'Renamed Cup'}, format='json')
+        self.client.force_authenticate(None)
+
+        self.assertEqual(json.loads(self.client.get(self.url).content)['name'], 'Renamed Cup')
+        snapshot = TournamentSnapshot.objects.get(tournament=self.tournament)
+        self.assertEqual(snapshot.version, Tournament.objects.get(pk=self.tournament.pk).bracket_version)
+
+    def test_backfill_renders_missing_snapshots(self):
+        self.finish()
+        TournamentSnapshot.objects.all().delete()
+        out = StringIO()
+        call_command('build_snapshots', stdout=out)
+        self.assertIn('Rendered 1 snapshots', out.getvalue())
+        call_command('build_snapshots', stdout=out)
+        self.assertIn('Rendered 0 snapshots', out.getvalue())
+        self.assertEqual(json.loads(TournamentSnapshot.objects.get().body)['id'], self.tournament.id)
+
+
+class ResponseEncodingTests(TestCase):
+    def setUp(self):
+        bracket_cache.clear()
+        self.users = make_users(16)
+        self.tournament = make_tournament(self.users[0], max_participants=16)
+        add_participants(self.tournament, self.users)
+        self.tournament.start_tournament()
+        self.url = f'/api/tournaments/{self.tournament.id}/'
+        self.client = APIClient()
+
+    def test_fast_renderer_matches_the_stock_one(self):
+        data = {
+            **self.client.get(self.url).data,
+            'when': timezone.now(), 'amount': Decimal('1.50'), 'name': 'Zürich \u2028 Cup', 3: None,
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_large_json_is_compressed_when_accepted(self):
+        plain = self.client.get(self.url)
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        gzipped = self.client.get(self.url, HTTP_ACCEPT_ENCODING='br;q=0, gzip')
+        self.assertEqual(gzipped['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(gzipped.content), plain.content)
+        self.assertLess(len(gzipped.content), len(plain.content) / 4)
+        self.assertEqual(gzipped['ETag'], f'W/{plain["ETag"]}')
+
+        small = self.client.get('/api/tournaments/history/?username=nobody', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', small)
+
+    @skipUnless(compression.brotli, "brotli is not installed")
+    def test_brotli_is_preferred(self):
+        plain = self.client.get(self.url)
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(compression.brotli.decompress(response.content), plain.content)
+
+    def test_negotiation(self):
+        self.assertEqual(compression.negotiate('gzip;q=0.5, identity'), 'gzip')
+        self.assertIsNone(compression.negotiate('gzip;q=0, identity'))
+        self.assertIsNone(compression.negotiate(''))
+        self.assertEqual(compression.negotiate('*', ('gzip',)), 'gzip')
+
+    def test_normalized_bracket_lists_users_once(self):
+        standard = json.loads(self.client.get(self.url).content)
+        normalized = json.loads(self.client.get(f'{self.url}?normalized=1').content)
+
+        self.assertEqual(set(normalized['users']), {str(user.id) for user in self.users})
+        emails = {int(user_id): user['email'] for user_id, user in normalized['users'].items()}
+        for before, after in zip(standard['matches'], normalized['matches']):
+            self.assertFalse({key for key in after if key.endswith('_email')})
+            self.assertNotIn('tournament', after)
+            for slot in ('player1', 'player2', 'winner'):
+                self.assertEqual(emails.get(after[slot]), before.get(f'{slot}_email'))
+        self.assertEqual([emails[row['user']] for row in normalized['participants']],
+                         [row['user_email'] for row in standard['participants']])
+        self.assertEqual(emails[normalized['organizer']], standard['organizer_email'])
+        self.assertLess(len(json.dumps(normalized)), len(json.dumps(standard)))
+
+
+class LiveEventsTests(TestCase):
+    def setUp(self):
+        self.users = make_users(4)
+        self.tournament = make_tournament(self.users[0], max_participants=4)
+        add_participants(self.tournament, self.users)
+        self.tournament.start_tournament()
+
+    async def test_stream_delivers_published_events(self):
+        response = await self.async_client.get(f'/api/tournaments/{self.tournament.id}/events/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b"retry: 3000\n\n")
+
+        broker.publish(self.tournament.id, [{"type": "match_finished", "match": 1, "winner": 2}])
+        frame = await asyncio.wait_for(anext(stream), 1)
+        self.assertEqual(frame, b'event: match_finished\ndata: {"type":"match_finished","match":1,"winner":2}\n\n')
+        await stream.aclose()
+
+    async def test_publish_fans_out_without_per_viewer_work(self):
+        subscriptions = [broker.subscribe(self.tournament.id) for _ in range(2000)]
+        try:
+            self.assertEqual(broker.publish(self.tournament.id, [{"type": "tournament_finished"}]), 2000)
+            await asyncio.sleep(0)
+            frames = {s.queue.get_nowait() for s in subscriptions}
+            self.assertEqual(len(frames), 1)
+        finally:
+            for subscription in subscriptions:
+                subscription.close()
+
+    def test_report_publishes_after_commit(self):
+        match = Match.objects.filter(tournament=self.tournament).first()
+        url = f'/api/tournaments/{self.tournament.id}/matches/{match.id}/report/'
+        client = APIClient()
+
+        with mock.patch.object(broker, 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                for voter in (match.player1, match.player2):
+                    client.force_authenticate(voter)
+                    client.post(url, {'winner_email': match.player1.email}, format='json')
+
+        publish.assert_called_once()
+        tournament_id, events = publish.call_args.args
+        final = Match.objects.get(tournament=self.tournament, round_number=2)
+        self.assertEqual(tournament_id, self.tournament.id)
+        self.assertEqual(events, [
+            {"type": "match_finished", "match": match.id, "winner": match.player1_id},
+            {"type": "player_advanced", "match": final.id, "slot": "player1", "player": match.player1_id},
+        ])
+
+
+class AutostartTests(TestCase):
+    def test_starts_due_tournaments_and_cancels_empty_ones(self):
+        users = make_users(4)
+        past = {'deadline': timezone.now() - timedelta(minutes=5)}
+        due = make_tournament(users[0], **past)
+        add_participants(due, users)
+        lonely = make_tournament(users[0], **past)
+        add_participants(lonely, users[:1])
+        not_due = make_tournament(users[0])
+        add_participants(not_due, users)
+
+        out = StringIO()
+        call_command('autostart_tournaments', workers=1, stdout=out)
+
+        statuses = dict(Tournament.objects.values_list('id', 'status'))
+        self.assertEqual(statuses, {due.id: 'ongoing', lonely.id: 'cancelled', not_due.id: 'open'})
+        self.assertIn("Claimed 2 tournaments", out.getvalue())
+        self.assertEqual(due.matches.count(), 3)
+
+    def test_a_broken_tournament_is_skipped(self):
+        users = make_users(4)
+        past = {'deadline': timezone.now() - timedelta(minutes=5)}
+        broken, due = make_tournament(users[0], **past), make_tournament(users[0], **past)
+        add_participants(broken, users)
+        add_participants(due, users)
+        start = Tournament.start_tournament
+
+        def start_tournament(tournament):
+            if tournament.pk == broken.pk:
+                raise RuntimeError("corrupt row")
+            return start(tournament)
+
+        out = StringIO()
+        with mock.patch.object(Tournament, 'start_tournament', start_tournament), \
+                self.assertLogs('tournaments.management.commands.autostart_tournaments', 'ERROR'):
+            call_command('autostart_tournaments', workers=1, stdout=out)
+
+        statuses = dict(Tournament.objects.values_list('id', 'status'))
+        self.assertEqual(statuses, {broken.id: 'open', due.id: 'ongoing'})
+        self.assertIn("1 started, 0 cancelled, 1 failed", out.getvalue())
+
+    def test_second_start_is_rejected(self):
+        users = make_users(2)
+        tournament = make_tournament(users[0])
+        add_participants(tournament, users)
+        stale_copy = Tournament.objects.get(pk=tournament.pk)
+
+        tournament.start_tournament()
+        with self.assertRaises(TournamentNotOpen):
+            stale_copy.start_tournament()
+        self.assertEqual(tournament.matches.count(), 1)
+
+
+class LoadToolingTests(TestCase):
+    def test_seed_data_scale_mode(self):
+        out = StringIO()
+        call_command('seed_data', users=40, tournaments=4, bracket_size=8, stdout=out)
+        self.assertIn("seeded with 60 users and 7 tournaments", out.getvalue())
+
+        generated = Tournament.objects.filter(name__startswith='Generated Cup')
+        self.assertEqual(sorted(generated.values_list('status', flat=True)), ['finished', 'ongoing', 'open', 'open'])
+        for tournament in generated:
+            self.assertEqual(tournament.participants.count(), tournament.participant_count)
+        self.assertEqual(Match.objects.filter(tournament__in=generated).count(), 14)
+
+        finished = generated.get(status='finished')
+        self.assertFalse(finished.matches.filter(winner__isnull=True).exists())
+        self.assertEqual(User.objects.get(username='gen0000000').password, User.objects.get(username='Faker').password)
+
+    def test_seeded_demo_history_has_a_complete_bracket(self):
+        call_command('seed_data', stdout=StringIO())
+
+        worlds = Tournament.objects.get(name='Worlds 2024')
+        final = worlds.matches.get(next_match__isnull=True)
+        self.assertEqual(final.winner.username, 'Faker')
+        self.assertEqual(worlds.matches.filter(next_match=final).count(), 2)
+        self.assertTrue(User.objects.get(username='Faker').check_password('passwood12345'))
+
+    def test_finished_double_elimination_is_played_out(self):
+        call_command('seed_data', users=40, tournaments=6, bracket_size=8, stdout=StringIO())
+
+        finished = Tournament.objects.get(name='Generated Cup #5')
+        self.assertEqual(finished.format, 'double_elimination')
+        matches = list(finished.matches.all())
+        self.assertTrue(all(match.winner_id for match in matches))
+        champion = next(match.winner_id for match in matches if match.stage == 'grand_final')
+        losses = Counter(match.loser_id for match in matches)
+        self.assertLessEqual(losses[champion], 1)
+        # Everyone else is out on two losses, except a winners-bracket finalist beaten in the grand final.
+        others = sorted(count for user_id, count in losses.items() if user_id != champion)
+        self.assertIn(others, ([2] * 7, [1] + [2] * 6))
+
+    def test_benchmark_api_writes_comparable_json(self):
+        before = Tournament.objects.count()
+        with tempfile.NamedTemporaryFile(suffix='.json') as output:
+            call_command('benchmark_api', iterations=4, bracket_size=4, output=output.name, stdout=StringIO())
+            report = json.load(output)
+
+        self.assertEqual(set(report['endpoints']), {'list', 'detail', 'join', 'start', 'report', 'history'})
+        for row in report['endpoints'].values():
+            self.assertEqual(row['requests'], 4)
+            self.assertLessEqual(row['p50_ms'], row['p99_ms'])
+        # Fixtures are rolled back.
+        self.assertEqual(Tournament.objects.count(), before)
+
+
+class ReportMatchTests(TestCase):
+    def setUp(self):
+        self.users = make_users(16)
+        self.client = APIClient()
+
+    def started(self, size):
+        tournament = make_tournament(self.users[0], max_participants=16)
+        add_participants(tournament, self.users[:size])
+        tournament.start_tournament()
+        return tournament
+
+    def report(self, match, voter, **payload):
+        self.client.force_authenticate(voter)
+        return self.client.post(
+            f'/api/tournaments/{match.tournament_id}/matches/{match.id}/report/', payload, format='json',
+        )
+
+    def statements(self, match, voter, **payload):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.report(match, voter, **payload)
+        return response, [q['sql'].split()[0] for q in ctx.captured_queries if q['sql'].startswith(('SELECT', 'UPDATE', 'INSERT'))]
+
+    def test_query_budget_is_constant(self):
+        for size in (2, 4, 16):
+            tournament = self.started(size)
+            match = Match.objects.filter(tournament=tournament).first()
+
+            response, waiting = self.statements(match, match.player1, winner_slot='player1')
+            self.assertEqual(response.data['status'], 'waiting')
+            self.assertEqual(waiting, ['SELECT', 'UPDATE', 'UPDATE'])
+
+            response, finishing = self.statements(match, match.player2, winner_id=match.player1_id)
+            self.assertEqual(response.data['status'], 'finished')
+            # Player stats add an upsert, a locking read and one UPDATE. Ending the tournament queues the
+            # players' notices (seeds read, one outbox INSERT), then reads the champion and credits the title.
+            stats = ['INSERT', 'SELECT', 'UPDATE']
+            if size > 2:
+                self.assertEqual(finishing, ['SELECT', 'UPDATE', 'UPDATE', *stats, 'UPDATE'])
+            else:
+                self.assertEqual(finishing, ['SELECT', 'UPDATE', *stats, 'UPDATE', 'SELECT', 'INSERT', 'SELECT', 'UPDATE'])
+
+    def test_winner_advances_and_final_finishes_tournament(self):
+        tournament = self.started(4)
+        semi_a, semi_b, final = Match.objects.filter(tournament=tournament)
+
+        for semi in (semi_a, semi_b):
+            self.report(semi, semi.player1, winner_email=semi.player2.email)
+            self.report(semi, semi.player2, winner_slot='player2')
+        final.refresh_from_db()
+        self.assertEqual((final.player1_id, final.player2_id), (semi_a.player2_id, semi_b.player2_id))
+
+        self.report(final, final.player1, winner_slot='player1')
+        response = self.report(final, final.player2, winner_slot='player1')
+        self.assertEqual(response.data, {"status": "finished", "winner": final.player1.email, "winner_id": final.player1_id})
+        tournament.refresh_from_db()
+        self.assertEqual(tournament.status, 'finished')
+
+    def test_conflicting_votes_reset(self):
+        tournament = self.started(2)
+        match = Match.objects.get(tournament=tournament)
+        self.report(match, match.player1, winner_slot='player1')
+        response = self.report(match, match.player2, winner_slot='player2')
+
+        self.assertEqual(response.data['status'], 'conflict')
+        match.refresh_from_db()
+        self.assertEqual((match.player1_vote_id, match.player2_vote_id, match.winner_id), (None, None, None))
+
+    def test_rejects_outsiders_and_unknown_winners(self):
+        tournament = self.started(4)
+        match = Match.objects.filter(tournament=tournament).first()
+
+        self.assertEqual(self.report(match, match.player1, winner_id=self.users[9].id).status_code, 400)
+        self.assertEqual(self.report(match, self.users[9], winner_slot='player1').status_code, 403)
+        self.client.force_authenticate(match.player1)
+        missing = self.client.post(f'/api/tournaments/{tournament.id}/matches/999999/report/', {}, format='json')
+        self.assertEqual(missing.status_code, 404)
+
+
+class ReportBatchTests(TestCase):
+    def setUp(self):
+        self.users = make_users(8)
+        self.tournament = make_tournament(self.users[0], max_participants=8)
+        add_participants(self.tournament, self.users)
+        self.tournament.start_tournament()
+        self.matches = list(Match.objects.filter(tournament=self.tournament))
+        self.url = f'/api/tournaments/{self.tournament.id}/matches/report-batch/'
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[0])
+
+    def test_whole_bracket_in_one_request(self):
+        # Entries deliberately out of round order; later rounds use players advanced earlier in the batch.
+        results = [{"match": m.id, "winner_slot": "player1"} for m in reversed(self.matches)]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(self.url, {"results": results}, format='json')
+
+        self.assertEqual((response.data['applied'], response.data['failed']), (7, 0))
+        writes = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE')]
+        # Matches, player stats, the tournament row and the champion's title.
+        self.assertEqual(len(writes), 4)
+        final = Match.objects.get(tournament=self.tournament, round_number=3)
+        self.assertEqual(final.winner_id, self.users[0].id)
+        self.tournament.refresh_from_db()
+        self.assertEqual(self.tournament.status, 'finished')
+
+    def test_partial_failures_are_reported(self):
+        first, second = self.matches[0], self.matches[1]
+        final = self.matches[-1]
+        response = self.client.post(self.url, {"results": [
+            {"match": first.id, "winner_email": first.player2.email},
+            {"match": second.id, "winner_id": self.users[0].id},
+            {"match": final.id, "winner_slot": "player1"},
+            {"match": 999999, "winner_slot": "player1"},
+            {"match": first.id, "winner_slot": "player1"},
+        ]}, format='json')
+
+        self.assertEqual(response.data['applied'], 1)
+        self.assertEqual([r['status'] for r in response.data['results']], ['finished', 'error', 'error', 'error', 'error'])
+        self.assertEqual(response.data['results'][4]['error'], "Match already finished")
+        first.refresh_from_db()
+        self.assertEqual(first.winner_id, first.player2_id)
+
+    def test_whole_double_elimination_bracket_in_one_request(self):
+        tournament = make_tournament(self.users[0], format='double_elimination', max_participants=4)
+        add_participants(tournament, self.users[:4])
+        tournament.start_tournament()
+        # Losers rounds and the grand final reuse low round numbers; they still need their feeders applied first.
+        matches = Match.objects.filter(tournament=tournament).order_by('round_number', '-stage')
+        response = self.client.post(f'/api/tournaments/{tournament.id}/matches/report-batch/', {"results": [
+            {"match": m.id, "winner_slot": "player1"} for m in matches
+        ]}, format='json')
+
+        self.assertEqual((response.data['applied'], response.data['failed']), (6, 0))
+        tournament.refresh_from_db()
+        self.assertEqual(tournament.status, 'finished')
+        self.assertFalse(Match.objects.filter(tournament=tournament, winner__isnull=True).exists())
+
+    def test_only_the_organizer(self):
+        self.client.force_authenticate(self.users[1])
+        response = self.client.post(self.url, {"results": [{"match": self.matches[0].id, "winner_slot": "player1"}]}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+class FormatEngineTests(TestCase):
+    def setUp(self):
+        self.users = make_users(16)
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[0])
+
+    def play_out(self, tournament, pick='player1'):
+        """Reports every playable match through report-batch until nothing is left to play."""
+        url = f'/api/tournaments/{tournament.id}/matches/report-batch/'
+        for _ in range(100):
+            ready = Match.objects.filter(
+                tournament=tournament, winner__isnull=True, player1__isnull=False, player2__isnull=False,
+            )
+            if not ready.exists():
+                break
+            response = self.client.post(url, {"results": [{"match": m.id, "winner_slot": pick} for m in ready]}, format='json')
+            self.assertEqual(response.data['failed'], 0)
+        tournament.refresh_from_db()
+        return tournament
+
+    def started(self, size, format, **kwargs):
+        tournament = make_tournament(self.users[0], max_participants=16, format=format, **kwargs)
+        add_participants(tournament, self.users[:size])
+        tournament.start_tournament()
+        return tournament
+
+    def losses(self, tournament):
+        counts = {}
+        for match in Match.objects.filter(tournament=tournament, winner__isnull=False, player2__isnull=False):
+            counts[match.loser_id] = counts.get(match.loser_id, 0) + 1
+        return counts
+
+    def test_double_elimination_layout(self):
+        from .bracket import double_elimination
+        specs = double_elimination(list(range(1, 9)))
+        stages = [spec.stage for spec in specs if not spec.void]
+        self.assertEqual((stages.count('bracket'), stages.count('losers'), stages.count('grand_final')), (7, 6, 1))
+
+    def test_double_elimination_plays_out_for_every_size(self):
+        for size in range(2, 17):
+            for pick in ('player1', 'player2'):
+                with self.subTest(size=size, pick=pick):
+                    tournament = self.play_out(self.started(size, 'double_elimination'), pick)
+                    self.assertEqual(tournament.status, 'finished')
+                    final = Match.objects.get(tournament=tournament, stage='grand_final')
+                    losses = self.losses(tournament)
+                    # Everyone but the champion goes out on their second loss, except the
+                    # unbeaten winners-bracket finalist (player1) losing the grand final.
+                    for user in self.users[:size]:
+                        if user.id == final.winner_id:
+                            expected = 0 if user.id == final.player1_id else 1
+                        elif user.id == final.player1_id:
+                            expected = 1
+                        else:
+                            expected = 2
+                        self.assertEqual(losses.get(user.id, 0), expected)
+                    Tournament.objects.filter(pk=tournament.pk).delete()
+
+    def test_swiss_has_no_rematches_and_ends_after_log2_rounds(self):
+        for size in (7, 8, 13):
+            with self.subTest(size=size):
+                tournament = self.play_out(self.started(size, 'swiss'))
+                self.assertEqual(tournament.status, 'finished')
+                matches = Match.objects.filter(tournament=tournament)
+                self.assertEqual(max(m.round_number for m in matches), math.ceil(math.log2(size)))
+                pairs = [frozenset((m.player1_id, m.player2_id)) for m in matches if m.player2_id]
+                self.assertEqual(len(pairs), len(set(pairs)))
+                byes = [m.player1_id for m in matches if m.player2_id is None]
+                self.assertEqual(len(byes), len(set(byes)))
+
+    def test_round_robin_groups(self):
+        tournament = self.started(8, 'round_robin', group_size=4)
+        matches = Match.objects.filter(tournament=tournament)
+        self.assertEqual(matches.count(), 12)
+        self.assertEqual(sorted({m.group for m in matches}), [1, 2])
+
+        tournament = self.play_out(tournament)
+        self.assertEqual(tournament.status, 'finished')
+
+    def test_swiss_pairing_scales(self):
+        seeds = list(range(1, 513))
+        history = []
+        for round_number in range(1, 10):
+            started = time.perf_counter()
+            specs = swiss_round(seeds, history, round_number)
+            self.assertLess(time.perf_counter() - started, 0.5, f"round {round_number}")
+            history += [(s.player1, s.player2, s.winner or s.player1) for s in specs]
+        pairs = [frozenset((p1, p2)) for p1, p2, _ in history]
+        self.assertEqual(len(pairs), len(set(pairs)))
+
+    def test_swiss_falls_back_to_rematches_when_fresh_opponents_run_out(self):
+        seeds = [1, 2, 3, 4]
+        history = []
+        for round_number in range(1, 4):
+            history += [(s.player1, s.player2, s.player1) for s in swiss_round(seeds, history, round_number)]
+        # Everyone has met everyone: round 4 pairs neighbours in the standings.
+        score, _, _ = swiss_standings(seeds, history)
+        order = sorted(seeds, key=lambda seed: (-score[seed], seeds.index(seed)))
+        self.assertEqual([(s.player1, s.player2) for s in swiss_round(seeds, history, 4)],
+                         [(order[0], order[1]), (order[2], order[3])])
+
+
+class PlayerStatsTests(TestCase):
+    def setUp(self):
+        self.users = make_users(8)
+        self.client = APIClient()
+
+    def started(self, size, **kwargs):
+        tournament = make_tournament(self.users[0], max_participants=8, **kwargs)
+        add_participants(tournament, self.users[:size])
+        tournament.start_tournament()
+        return tournament
+
+    def stats(self):
+        return {
+            row.user_id: (row.matches_played, row.matches_won, row.titles, row.current_streak, row.rating)
+            for row in PlayerStats.objects.all()
+        }
+
+    def test_reports_update_stats_and_the_title(self):
+        tournament = self.started(4)
+        for round_number in (1, 2):
+            for match in Match.objects.filter(tournament=tournament, round_number=round_number):
+                for voter in (match.player1, match.player2):
+                    self.client.force_authenticate(voter)
+                    self.client.post(f'/api/tournaments/{tournament.id}/matches/{match.id}/report/',
+                                     {'winner_slot': 'player1'}, format='json')
+
+        # Semis are u0 v u3 and u1 v u2; the top seed beats u1 in the final.
+        champion, finalist, out_a, out_b = (PlayerStats.objects.get(user=self.users[i]) for i in (0, 1, 3, 2))
+        self.assertEqual((champion.matches_played, champion.matches_won, champion.titles, champion.current_streak), (2, 2, 1, 2))
+        self.assertEqual((finalist.matches_played, finalist.matches_won, finalist.titles, finalist.current_streak), (2, 1, 0, -1))
+        self.assertEqual((out_a.matches_won, out_a.current_streak), (0, -1))
+        self.assertGreater(champion.rating, finalist.rating)
+        self.assertGreater(finalist.rating, out_a.rating)
+        self.assertEqual(sum(row.rating for row in (champion, finalist, out_a, out_b)), 4 * 1500)
+
+        history = self.client.get(f'/api/tournaments/history/?username={self.users[0].username}').data
+        self.assertEqual((history['stats']['titles'], history['stats']['win_rate']), (1, 1.0))
+
+    def test_rebuild_matches_incremental_updates_of_sequential_tournaments(self):
+        # Each tournament is played out before the next one starts, so start order is report order.
+        # (Overlapping tournaments are only approximated; see tournaments.stats.)
+        self.client.force_authenticate(self.users[0])
+        for format, pick in (('double_elimination', 'player2'), ('swiss', 'player1'), ('single_elimination', 'player1')):
+            tournament = self.started(7, format=format)
+            url = f'/api/tournaments/{tournament.id}/matches/report-batch/'
+            while True:
+                ready = Match.objects.filter(tournament=tournament, winner__isnull=True, player1__isnull=False, player2__isnull=False)
+                if not ready.exists():
+                    break
+                self.client.post(url, {"results": [{"match": m.id, "winner_slot": pick} for m in ready]}, format='json')
+        # An ongoing tournament's decided matches count too.
+        ongoing = self.started(4)
+        first = Match.objects.filter(tournament=ongoing).first()
+        self.client.post(f'/api/tournaments/{ongoing.id}/matches/report-batch/',
+                         {"results": [{"match": first.id, "winner_slot": "player2"}]}, format='json')
+
+        incremental = self.stats()
+        self.assertEqual(sum(titles for _, _, titles, _, _ in incremental.values()), 3)
+        PlayerStats.objects.update(rating=0, titles=0)
+        call_command('rebuild_player_stats', batch_size=2, stdout=StringIO())
+        self.assertEqual(self.stats(), incremental)
+
+    def test_title_creates_a_missing_stats_row(self):
+        tournament = self.started(2)
+        match = Match.objects.get(tournament=tournament)
+        Match.objects.filter(pk=match.pk).update(winner=match.player1)
+        Tournament.objects.filter(pk=tournament.pk).update(status='finished')
+        stats.record_title(tournament)
+        self.assertEqual(PlayerStats.objects.get(user=match.player1).titles, 1)
+
+    def test_leaderboard_pages_by_rating(self):
+        ratings = [1620, 1500, 1710, 1500, 1480, 1500, 1555]
+        PlayerStats.objects.bulk_create([
+            PlayerStats(user=user, rating=rating, matches_played=1) for user, rating in zip(self.users, ratings)
+        ])
+        url, seen = '/api/leaderboard/?page_size=3', []
+        while url:
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+            self.assertEqual(len(ctx.captured_queries), 1)
+            seen += [(row['rating'], row['user']) for row in response.data['results']]
+            url = response.data['next']
+
+        self.assertEqual(seen, sorted(((r, u.id) for u, r in zip(self.users, ratings)), key=lambda row: (-row[0], row[1])))
+        self.assertEqual(self.client.get(f'/api/leaderboard/{self.users[2].id}/').data['username'], self.users[2].username)
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.users = make_users(4)
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[0])
+
+    def finished(self):
+        tournament = make_tournament(self.users[0], format='double_elimination', max_participants=4)
+        add_participants(tournament, self.users)
+        tournament.start_tournament()
+        url = f'/api/tournaments/{tournament.id}/matches/report-batch/'
+        while True:
+            ready = Match.objects.filter(tournament=tournament, winner__isnull=True, player1__isnull=False, player2__isnull=False)
+            if not ready.exists():
+                break
+            self.client.post(url, {"results": [{"match": m.id, "winner_slot": "player2"} for m in ready]}, format='json')
+        tournament.refresh_from_db()
+        self.assertEqual(tournament.status, 'finished')
+        return tournament
+
+    def snapshot(self, tournament):
+        """The bracket with ids replaced by positions and emails, so copies compare equal."""
+        matches = list(Match.objects.filter(tournament=tournament).order_by('stage', 'round_number', 'match_number'))
+        position = {match.id: i for i, match in enumerate(matches)}
+        email = dict(User.objects.values_list('id', 'email'))
+        return {
+            'tournament': (tournament.name, tournament.format, tournament.status, tournament.participant_count,
+                           tournament.bracket_version, tournament.created_at, email[tournament.organizer_id]),
+            'participants': sorted(
+                (email[p.user_id], p.team_name, p.ranking_points, p.registered_at)
+                for p in Participant.objects.filter(tournament=tournament)
+            ),
+            'matches': [
+                (m.stage, m.round_number, m.match_number, email.get(m.player1_id), email.get(m.player2_id), email.get(m.winner_id),
+                 position.get(m.next_match_id), m.next_match_slot, position.get(m.loser_next_match_id), m.loser_next_slot)
+                for m in matches
+            ],
+        }
+
+    def test_round_trip_under_new_ids(self):
+        tournament = self.finished()
+        make_tournament(self.users[0], name="Not finished")
+        expected = self.snapshot(tournament)
+        with tempfile.TemporaryDirectory() as directory:
+            path = f'{directory}/archive.ndjson.gz'
+            out = StringIO()
+            call_command('export_tournaments', path, stdout=out)
+            self.assertIn('Exported 1 tournaments, 4 participants, 6 matches', out.getvalue())
+
+            # The players are gone from this database, and one username has been taken since.
+            Tournament.objects.all().delete()
+            User.objects.filter(pk__in=[user.pk for user in self.users[1:]]).delete()
+            User.objects.create(username='player1', email='newcomer@test.gg', password='!')
+            call_command('import_tournaments', path, batch_size=1, stdout=StringIO())
+
+        copy = Tournament.objects.get()
+        self.assertNotEqual(copy.pk, tournament.pk)
+        self.assertEqual(self.snapshot(copy), expected)
+        self.assertEqual(copy.champion(), User.objects.get(email=self.users[3].email).pk)
+        restored = User.objects.get(email=self.users[1].email)
+        self.assertEqual(restored.username, f'player1-{self.users[1].pk}')
+        self.assertFalse(restored.has_usable_password())
+
+    def test_rejects_foreign_input_without_writing(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson') as archive:
+            archive.write('{"format": "tournament-archive", "version": 1, "columns": {"tournament": ["id", "name"], "match": ["id", "tournament_id"]}}\n')
+            archive.write('["match", 1, 99]\n')
+            archive.flush()
+            with self.assertRaisesMessage(CommandError, 'before any tournament'):
+                call_command('import_tournaments', archive.name, stdout=StringIO())
+            archive.seek(0)
+            archive.truncate()
+            archive.write('{"format": "csv"}\n')
+            archive.flush()
+            with self.assertRaisesMessage(CommandError, 'Not a tournament archive'):
+                call_command('import_tournaments', archive.name, stdout=StringIO())
+        self.assertFalse(Tournament.objects.exists())
+
+
+class ArchivalTests(TestCase):
+    def setUp(self):
+        self.users = make_users(6)
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[0])
+
+    def finished(self, format, size):
+        tournament = make_tournament(self.users[0], format=format, max_participants=8)
+        add_participants(tournament, self.users[:size])
+        tournament.start_tournament()
+        url = f'/api/tournaments/{tournament.id}/matches/report-batch/'
+        while True:
+            ready = Match.objects.filter(tournament=tournament, winner__isnull=True, player1__isnull=False, player2__isnull=False)
+            if not ready.exists():
+                break
+            self.client.post(url, {"results": [{"match": m.id, "winner_slot": "player2"} for m in ready]}, format='json')
+        return Tournament.objects.get(pk=tournament.pk)
+
+    def reads(self, tournament):
+        """Everything a client can see of `tournament`, minus the fields archiving changes."""
+        detail = json.loads(self.client.get(f'/api/tournaments/{tournament.id}/').content)
+        for name in ('archived_at', 'bracket_version', 'updated_at'):
+            detail.pop(name)
+        listed = json.loads(self.client.get('/api/tournaments/?fields=id&expand=matches,participants').content)
+        history = {}
+        for user in self.users[:5]:
+            for summary in ('0', '1'):
+                past = json.loads(self.client.get(f'/api/tournaments/history/?username={user.username}&summary={summary}').content)['past']
+                history[user.pk, summary] = [
+                    {key: value for key, value in row.items() if key not in ('archived_at', 'bracket_version', 'updated_at')}
+                    for row in past
+                ]
+        return detail, listed['results'], history
+
+    def test_archived_tournaments_read_the_same(self):
+        double = self.finished('double_elimination', 5)
+        swiss = self.finished('swiss', 4)
+        before = [self.reads(double), self.reads(swiss)]
+        stats = list(PlayerStats.objects.order_by('user_id').values_list('user_id', 'matches_won', 'titles', 'rating'))
+        champions = [double.champion(), swiss.champion()]
+
+        out = StringIO()
+        call_command('archive_tournaments', older_than=1, stdout=out)
+        self.assertIn('Archived 0 tournaments', out.getvalue())
+        call_command('archive_tournaments', older_than=0, batch_size=1, stdout=out)
+        self.assertIn('Archived 2 tournaments', out.getvalue())
+
+        self.assertFalse(Match.objects.exists())
+        self.assertFalse(Participant.objects.exists())
+        double.refresh_from_db()
+        swiss.refresh_from_db()
+        self.assertIsNotNone(double.archived_at)
+        self.assertEqual([self.reads(double), self.reads(swiss)], before)
+        self.assertEqual([double.champion(), swiss.champion()], champions)
+
+        PlayerStats.objects.update(rating=0, titles=0)
+        call_command('rebuild_player_stats', stdout=StringIO())
+        self.assertEqual(list(PlayerStats.objects.order_by('user_id').values_list('user_id', 'matches_won', 'titles', 'rating')), stats)
+
+        archive = StringIO()
+        call_command('export_tournaments', '-', stdout=archive, stderr=StringIO())
+        lines = archive.getvalue().splitlines()
+        self.assertEqual(sum(line.startswith('["match"') for line in lines), 11 + 4)
+        self.assertEqual(sum(line.startswith('["participant"') for line in lines), 5 + 4)
+
+    def test_archiving_skips_what_is_not_finished(self):
+        ongoing = make_tournament(self.users[0], max_participants=4)
+        add_participants(ongoing, self.users[:4])
+        ongoing.start_tournament()
+        call_command('archive_tournaments', older_than=0, stdout=StringIO())
+        self.assertEqual(Match.objects.filter(tournament=ongoing).count(), 3)
+        self.assertFalse(ArchivedBracket.objects.exists())
+
+
+@override_settings(NOTIFICATIONS={
+    'EMAIL_BACKEND': 'django.core.mail.backends.locmem.EmailBackend',
+    'WEBHOOK_URLS': ['https://hooks.test/bracket'],
+    'MAX_ATTEMPTS': 2,
+})
+class NotificationOutboxTests(TestCase):
+    def setUp(self):
+        self.users = make_users(4)
+        self.tournament = make_tournament(self.users[0], name="Spring Open", max_participants=4)
+        add_participants(self.tournament, self.users)
+        self.client = APIClient()
+
+    def report(self, match, slot='player1'):
+        for voter in (match.player1, match.player2):
+            self.client.force_authenticate(voter)
+            response = self.client.post(f'/api/tournaments/{self.tournament.id}/matches/{match.id}/report/',
+                                        {'winner_slot': slot}, format='json')
+        return response
+
+    def test_reports_queue_instead_of_sending(self):
+        self.tournament.start_tournament()
+        self.assertEqual(OutboxMessage.objects.filter(event='match_ready').count(), 2 * 2 * 2 + 2)
+        OutboxMessage.objects.all().delete()
+
+        semi_a, semi_b, final = Match.objects.filter(tournament=self.tournament)
+        self.report(semi_a)
+        # The final still waits for its second player.
+        self.assertFalse(OutboxMessage.objects.exists())
+        self.report(semi_b)
+        ready = OutboxMessage.objects.filter(event='match_ready')
+        self.assertEqual(sorted(ready.filter(channel='email').values_list('user_id', flat=True)),
+                         sorted([semi_a.player1_id, semi_b.player1_id]))
+        self.assertEqual(ready.get(channel='webhook').payload['match'], final.id)
+        self.assertEqual(len(mail.outbox), 0)
+
+        OutboxMessage.objects.all().delete()
+        self.report(Match.objects.get(pk=final.pk))
+        self.assertEqual(OutboxMessage.objects.filter(event='tournament_finished', channel='feed').count(), 4)
+
+    def test_two_player_double_elimination_readies_the_grand_final_once(self):
+        tournament = make_tournament(self.users[0], format='double_elimination', max_participants=2)
+        add_participants(tournament, self.users[:2])
+        tournament.start_tournament()
+        opener = Match.objects.get(tournament=tournament, stage='bracket')
+        self.assertEqual(opener.next_match_id, opener.loser_next_match_id)
+        OutboxMessage.objects.all().delete()
+
+        with mock.patch.object(broker, 'publish') as publish, self.captureOnCommitCallbacks(execute=True):
+            for voter in (opener.player1, opener.player2):
+                self.client.force_authenticate(voter)
+                self.client.post(f'/api/tournaments/{tournament.id}/matches/{opener.id}/report/',
+                                 {'winner_slot': 'player1'}, format='json')
+
+        final = Match.objects.get(pk=opener.next_match_id)
+        self.assertEqual({final.player1_id, final.player2_id}, {opener.player1_id, opener.player2_id})
+        ready = OutboxMessage.objects.filter(event='match_ready')
+        self.assertEqual(ready.filter(channel='webhook').count(), 1)
+        self.assertEqual(sorted(ready.filter(channel='email').values_list('user_id', flat=True)),
+                         sorted([opener.player1_id, opener.player2_id]))
+        advanced = [event for event in publish.call_args.args[1] if event['type'] == 'player_advanced']
+        self.assertEqual({(event['slot'], event['player']) for event in advanced},
+                         {('player1', final.player1_id), ('player2', final.player2_id)})
+
+    def test_worker_delivers_a_batch(self):
+        self.tournament.start_tournament()
+        with mock.patch('urllib.request.urlopen') as urlopen:
+            worker = Worker()
+            handled = worker.run_once()
+            worker.close()
+
+        self.assertEqual(handled, 10)
+        self.assertFalse(OutboxMessage.objects.exists())
+        # Two semis, two emails each, naming the opponent.
+        self.assertEqual(len(mail.outbox), 4)
+        first = next(m for m in mail.outbox if m.to == [self.users[0].email])
+        self.assertEqual(first.subject, "Your match in Spring Open is ready")
+        self.assertIn(f"you play {self.users[3].username}", first.body)
+        self.assertEqual(Notification.objects.filter(user=self.users[0], event='match_ready').count(), 1)
+        # One POST carries both events.
+        urlopen.assert_called_once()
+        body = json.loads(urlopen.call_args.args[0].data)
+        self.assertEqual(len(body['events']), 2)
+
+    def test_worker_keeps_one_mail_connection(self):
+        self.tournament.start_tournament()
+        with mock.patch('urllib.request.urlopen'), \
+                mock.patch('django.core.mail.backends.locmem.EmailBackend.open') as connect:
+            worker = Worker()
+            worker.run_once()
+        connect.assert_called_once()
+        self.assertEqual(len(mail.outbox), 4)
+
+    def test_a_crashed_worker_stops_the_pool(self):
+        calls = []
+
+        def run_once(worker):
+            calls.append(worker)
+            # The first worker dies; the others would poll forever.
+            if len(calls) == 1:
+                raise RuntimeError("boom")
+            return 0
+
+        with mock.patch.object(connection.features, 'has_select_for_update_skip_locked', True), \
+                mock.patch.object(Worker, 'run_once', run_once):
+            with self.assertRaisesMessage(CommandError, "A worker crashed: RuntimeError('boom')"):
+                call_command('deliver_notifications', workers=3, idle_sleep=0.01, stdout=StringIO())
+
+    def test_unsent_emails_are_retried(self):
+        self.tournament.start_tournament()
+        with mock.patch('urllib.request.urlopen'), \
+                mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', return_value=0):
+            Worker().run_once()
+        emails = OutboxMessage.objects.filter(channel='email')
+        self.assertEqual(emails.count(), 4)
+        self.assertEqual(set(emails.values_list('status', 'attempts')), {('pending', 1)})
+
+    def test_failures_back_off_then_die(self):
+        self.tournament.start_tournament()
+        with mock.patch('urllib.request.urlopen', side_effect=OSError("connection refused")):
+            Worker().run_once()
+            webhooks = OutboxMessage.objects.filter(channel='webhook')
+            # Email and feed rows went out; the webhook rows wait for a retry.
+            self.assertEqual(OutboxMessage.objects.count(), 2)
+            for row in webhooks:
+                self.assertEqual((row.status, row.attempts), ('pending', 1))
+                self.assertGreater(row.next_attempt_at, timezone.now())
+                self.assertIn("connection refused", row.last_error)
+
+            self.assertEqual(Worker().run_once(), 0)
+            webhooks.update(next_attempt_at=timezone.now())
+            Worker().run_once()
+        self.assertEqual(set(webhooks.values_list('status', flat=True)), {'dead'})
+        self.assertEqual(Worker().run_once(), 0)
+
+    def test_account_emails_go_through_the_outbox(self):
+        with override_settings(EMAIL_BACKEND='tournaments.notifications.OutboxEmailBackend'):
+            message = EmailMultiAlternatives("Activate", "Click the link", 'noreply@test.gg', ['new@test.gg'])
+            message.attach_alternative("<a>Click</a>", 'text/html')
+            message.send()
+        self.assertEqual(len(mail.outbox), 0)
+
+        call_command('deliver_notifications', once=True, workers=1, stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual((mail.outbox[0].subject, mail.outbox[0].to), ("Activate", ['new@test.gg']))
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+
+    def test_feed_endpoint(self):
+        Notification.objects.bulk_create([
+            Notification(user=self.users[i % 2], event='match_ready', payload={'match': i}) for i in range(5)
+        ])
+        self.client.force_authenticate(self.users[0])
+        feed = self.client.get('/api/notifications/').data['results']
+        self.assertEqual([row['payload']['match'] for row in feed], [4, 2, 0])
+
+        response = self.client.post('/api/notifications/read/', {'until': feed[1]['id']}, format='json')
+        self.assertEqual(response.data, {'marked': 2})
+        self.assertIsNone(self.client.get('/api/notifications/').data['results'][0]['read_at'])
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get('/api/notifications/').status_code, 401)
+
+
+# `default` doubles as the replica alias: the rows are the same, and the router's answer shows where a read was sent.
+@override_settings(DATABASE_REPLICAS={'ALIASES': ['default'], 'PIN_SECONDS': 60, 'PIN_CACHE': 'default'})
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.users = make_users(3)
+        self.tournament = make_tournament(self.users[0], max_participants=4)
+        self.client = APIClient()
+
+    def routes(self, method, url, user=None, **kwargs):
+        seen = []
+        original = ReplicaRouter.db_for_read
+
+        def spy(router, model, **hints):
+            seen.append(original(router, model, **hints))
+            return seen[-1]
+
+        self.client.force_authenticate(user)
+        with mock.patch.object(ReplicaRouter, 'db_for_read', spy):
+            response = getattr(self.client, method)(url, **kwargs)
+        self.assertLess(response.status_code, 400, getattr(response, 'data', None))
+        self.assertIsNone(_read_alias.get())
+        return set(seen)
+
+    def join(self, user):
+        return self.routes('post', f'/api/tournaments/{self.tournament.id}/join/', user, data={
+            'team_name': user.username, 'license_number': user.username, 'ranking_points': 0, 'teammates_names': '',
+        }, format='json')
+
+    def test_safe_requests_read_from_a_replica(self):
+        self.assertEqual(self.routes('get', '/api/tournaments/'), {'default'})
+        self.assertEqual(self.routes('get', f'/api/tournaments/{self.tournament.id}/', self.users[1]), {'default'})
+        self.assertEqual(self.routes('get', '/api/leaderboard/'), {'default'})
+
+    def test_writers_read_their_writes_from_the_primary(self):
+        self.assertNotIn('default', self.join(self.users[1]))
+        # The writer is pinned to the primary; everybody else keeps using replicas.
+        self.assertEqual(self.routes('get', f'/api/tournaments/{self.tournament.id}/', self.users[1]), {None})
+        self.assertEqual(self.routes('get', f'/api/tournaments/{self.tournament.id}/', self.users[2]), {'default'})
+
+        caches['default'].clear()
+        self.assertEqual(self.routes('get', f'/api/tournaments/{self.tournament.id}/', self.users[1]), {'default'})
+
+    def test_failed_writes_do_not_pin(self):
+        Tournament.objects.filter(pk=self.tournament.pk).update(status='ongoing')
+        self.client.force_authenticate(self.users[1])
+        self.client.post(f'/api/tournaments/{self.tournament.id}/join/', {}, format='json')
+        self.assertEqual(self.routes('get', '/api/tournaments/', self.users[1]), {'default'})
+
+    def test_replicas_are_not_migrated(self):
+        self.assertIs(ReplicaRouter().allow_migrate('default', 'tournaments'), False)
+        with override_settings(DATABASE_REPLICAS={'ALIASES': ['replica1']}):
+            self.assertIsNone(ReplicaRouter().allow_migrate('default', 'tournaments'))
+
+
+@override_settings(PROFILING={'SAMPLE_RATE': 1.0})
+class ProfilingTests(TestCase):
+    def setUp(self):
+        bracket_cache.clear()
+        profiling_registry.clear()
+        self.users = make_users(4)
+        self.client = APIClient()
+
+    def test_records_cost_per_endpoint(self):
+        tournament = make_tournament(self.users[0], max_participants=4)
+        add_participants(tournament, self.users)
+        tournament.start_tournament()
+
+        response = self.client.get(f'/api/tournaments/{tournament.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('db;dur=', response['Server-Timing'])
+
+        stats = profiling_registry.endpoint('GET', 'tournament-detail')
+        self.assertEqual(stats.latency.count, 1)
+        self.assertEqual(stats.queries.total, int(response['X-Query-Count']))
+        self.assertGreater(stats.queries.total, 0)
+        self.assertGreater(stats.serialize.total, 0)
+        self.assertEqual(stats.flagged, 0)
+
+    def test_repeated_statements_are_flagged(self):
+        sample = Sample()
+        for ids in ((1,), (1, 2), (1, 2, 3)):
+            placeholders = ', '.join(['%s'] * len(ids))
+            sample.add_query(f'SELECT "id" FROM "match" WHERE "id" IN ({placeholders})', 0.001)
+        sample.add_query('SELECT 1', 0.001)
+        self.assertEqual(sample.duplicates(3), {'SELECT "id" FROM "match" WHERE "id" IN (...)': 3})
+
+    def test_metrics_endpoint_is_staff_only(self):
+        self.client.get('/api/tournaments/')
+
+        self.client.force_authenticate(self.users[1])
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+
+        self.users[1].is_staff = True
+        self.users[1].save(update_fields=['is_staff'])
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('text/plain', response['Content-Type'])
+        self.assertIn(
+            'tournament_request_seconds_count{method="GET",view="tournament-list"} 1',
+            response.content.decode(),
+        )
+
+    @override_settings(PROFILING={'SAMPLE_RATE': 0})
+    def test_sampling_off_records_nothing(self):
+        response = self.client.get('/api/tournaments/')
+        self.assertNotIn('Server-Timing', response)
+        self.assertIsNone(profiling_registry.endpoint('GET', 'tournament-list'))
+
+
+def make_logo(name, color, size=(800, 200)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+@override_settings(SPONSOR_IMAGES={'HEIGHTS': (60, 120, 240), 'QUALITY': 80, 'WORKERS': 0})
+class SponsorImageTests(TestCase):
+    def setUp(self):
+        bracket_cache.clear()
+        self.media = tempfile.TemporaryDirectory()
+        self.enterContext(override_settings(MEDIA_ROOT=self.media.name))
+        self.addCleanup(self.media.cleanup)
+        self.organizer = make_users(1)[0]
+        self.client = APIClient()
+        self.client.force_authenticate(self.organizer)
+
+    def create(self, *logos):
+        return self.client.post('/api/tournaments/', {
+            'name': 'Sponsored Cup',
+            'start_time': (timezone.now() + timedelta(days=2)).isoformat(),
+            'deadline': (timezone.now() + timedelta(days=1)).isoformat(),
+            'max_participants': 8,
+            'sponsors': list(logos),
+        }, format='multipart')
+
+    def test_identical_logos_are_stored_once_and_get_variants(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.create(make_logo('a.png', 'red'), make_logo('b.png', 'red'), make_logo('c.png', 'blue'))
+        self.assertEqual(response.status_code, 201)
+
+        sponsors = list(Sponsor.objects.order_by('id'))
+        self.assertEqual(len(sponsors), 3)
+        self.assertEqual(sponsors[0].image.name, sponsors[1].image.name)
+        self.assertNotEqual(sponsors[0].image.name, sponsors[2].image.name)
+
+        detail = self.client.get(f"/api/tournaments/{response.data['id']}/").data
+        logo = detail['sponsors'][0]
+        # Heights are capped at the original's 200px; nothing is upscaled.
+        self.assertEqual([(v['width'], v['height']) for v in logo['variants']], [(240, 60), (480, 120), (800, 200)])
+        self.assertTrue(all(v['url'].endswith('.webp') for v in logo['variants']))
+        self.assertTrue(logo['srcset'].endswith(' 3.33333x'))
+        self.assertIn(' 2x, ', logo['srcset'])
+
+    def test_variants_are_rendered_after_the_request(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self.create(make_logo('a.png', 'green'))
+        detail = self.client.get(f"/api/tournaments/{response.data['id']}/").data
+        self.assertEqual(detail['sponsors'][0]['variants'], [])
+        self.assertEqual(len(callbacks), 1)
+
+        callbacks[0]()
+        detail = self.client.get(f"/api/tournaments/{response.data['id']}/").data
+        self.assertEqual(len(detail['sponsors'][0]['variants']), 3)
+
+    def test_unreadable_upload_rejects_the_whole_request(self):
+        bogus = SimpleUploadedFile('logo.png', b'not an image', content_type='image/png')
+        response = self.create(make_logo('a.png', 'red'), bogus)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('sponsors', response.data)
+        self.assertFalse(Tournament.objects.exists())
+
+    def test_backfill_command_hashes_legacy_logos(self):
+        tournament = make_tournament(self.organizer)
+        legacy = Sponsor.objects.create(tournament=tournament, image=make_logo('old.png', 'red'))
+
+        call_command('process_sponsor_images', stdout=StringIO())
+
+        legacy.refresh_from_db()
+        self.assertEqual(len(legacy.content_hash), 64)
+        self.assertEqual([v['height'] for v in legacy.variants], [60, 120, 200])
@@ -0,0 +1,298 @@
+"""
+Streaming tournament transfer between databases (export_tournaments / import_tournaments).
+
+An archive is newline-delimited JSON. The first line is a header naming the
+columns of every record type, so each following line is a compact array,
+["match", 12, 3, ...], with no repeated keys. Users come first (the people a
+tournament references, keyed by email on import), then every tournament
+immediately followed by its sponsors, participants and matches.
+
+Export reads each table once through a server-side cursor ordered by
+tournament, and merges the child streams against the tournament stream, so
+memory stays flat however many tournaments are written. All the cursors run in
+one REPEATABLE READ transaction, so they see the same snapshot even while
+tournaments are being created, edited or deleted. Import buffers
+`batch_size` tournaments with their children, inserts them with bulk_create
+under fresh ids and rewrites the foreign keys (including the next_match links
+inside each bracket). Beyond the current batch it only keeps the old-to-new
+user id map.
+"""
+import json
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import groupby
+from operator import attrgetter, itemgetter
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import BULK_BATCH_SIZE, ArchivedBracket, ArchivedParticipation, Match, Participant, Sponsor, Tournament
+
+FORMAT = 'tournament-archive'
+VERSION = 1
+
+COLUMNS = {
+    'user': ['id', 'username', 'email', 'first_name', 'last_name'],
+    'tournament': [
+        'id', 'name', 'description', 'discipline', 'format', 'group_size', 'organizer_id', 'start_time', 'deadline',
+        'max_participants', 'participant_count', 'location_url', 'status', 'created_at', 'updated_at', 'bracket_version',
+    ],
+    'sponsor': ['id', 'tournament_id', 'image', 'uploaded_at', 'content_hash', 'variants'],
+    'participant': [
+        'id', 'tournament_id', 'user_id', 'team_name', 'license_number', 'ranking_points', 'teammates_names', 'registered_at',
+    ],
+    'match': [
+        'id', 'tournament_id', 'round_number', 'match_number', 'stage', 'group', 'player1_id', 'player2_id', 'winner_id',
+        'next_match_id', 'next_match_slot', 'loser_next_match_id', 'loser_next_slot', 'player1_vote_id', 'player2_vote_id',
+    ],
+}
+
+# Child record types in the order they follow their tournament, and their models.
+CHILDREN = {'sponsor': Sponsor, 'participant': Participant, 'match': Match}
+
+# Columns whose user ids are remapped on import.
+USER_COLUMNS = {
+    'tournament': ['organizer_id'],
+    'participant': ['user_id'],
+    'match': ['player1_id', 'player2_id', 'winner_id', 'player1_vote_id', 'player2_vote_id'],
+}
+
+# auto_now / auto_now_add columns; bulk_create stamps them, so the archived values are written back after the insert.
+TIMESTAMPS = {
+    'tournament': ['created_at', 'updated_at'],
+    'sponsor': ['uploaded_at'],
+    'participant': ['registered_at'],
+}
+
+
+class ArchiveError(ValueError):
+    """The input is not an archive this version can read."""
+
+
+class _Encoder(DjangoJSONEncoder):
+    def default(self, o):
+        # DjangoJSONEncoder rounds to milliseconds; archives keep timestamps exact.
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _line(record):
+    return json.dumps(record, cls=_Encoder, separators=(',', ':')) + '\n'
+
+
+@contextmanager
+def _snapshot():
+    """A transaction whose queries all read the same snapshot of the database."""
+    outermost = not connection.in_atomic_block
+    with transaction.atomic():
+        # PostgreSQL's default READ COMMITTED takes a new snapshot per statement; SQLite's
+        # transactions are snapshots already. Inside an outer transaction it can't be changed any more.
+        if outermost and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+        yield
+
+
+def export(tournaments, out, chunk_size=2000):
+    """Writes `tournaments` (a queryset) and everything they reference to the text stream `out`. Returns the counts."""
+    with _snapshot():
+        return _export(tournaments, out, chunk_size)
+
+
+def _export(tournaments, out, chunk_size):
+    ids = tournaments.values('id')
+    counts = dict.fromkeys(COLUMNS, 0)
+    out.write(_line({'format': FORMAT, 'version': VERSION, 'columns': COLUMNS}))
+
+    users = get_user_model().objects.filter(
+        Q(id__in=Tournament.objects.filter(id__in=ids).values('organizer_id'))
+        | Q(id__in=Participant.objects.filter(tournament__in=ids).values('user_id'))
+        | Q(id__in=ArchivedParticipation.objects.filter(tournament__in=ids).values('user_id'))
+    ).order_by('id')
+    for row in users.values_list(*COLUMNS['user']).iterator(chunk_size=chunk_size):
+        out.write(_line(['user', *row]))
+        counts['user'] += 1
+
+    children = {}
+    for kind, model in CHILDREN.items():
+        rows = (
+            model.objects.filter(tournament__in=ids).order_by('tournament_id', 'id')
+            .values_list(*COLUMNS[kind]).iterator(chunk_size=chunk_size)
+        )
+        groups = groupby(rows, key=itemgetter(1))
+        children[kind] = (groups, next(groups, None))
+    # Archived tournaments (tournaments.archival) keep their matches and participants here instead.
+    archived = groupby(
+        ArchivedBracket.objects.filter(tournament__in=ids).order_by('tournament_id').iterator(chunk_size=max(1, chunk_size // 100)),
+        key=attrgetter('tournament_id'),
+    )
+    children['archived'] = (archived, next(archived, None))
+
+    for row in Tournament.objects.filter(id__in=ids).order_by('id').values_list(*COLUMNS['tournament']).iterator(chunk_size=chunk_size):
+        out.write(_line(['tournament', *row]))
+        counts['tournament'] += 1
+        for kind, (groups, group) in children.items():
+            # Skip groups whose tournament isn't in the stream, or they would block every later one.
+            while group is not None and group[0] < row[0]:
+                group = next(groups, None)
+            children[kind] = (groups, group)
+            if group is not None and group[0] == row[0]:
+                for child in group[1]:
+                    if kind == 'archived':
+                        for archived_kind in ('participant', 'match'):
+                            for values in child.values(archived_kind, *COLUMNS[archived_kind]):
+                                out.write(_line([archived_kind, *values]))
+                                counts[archived_kind] += 1
+                    else:
+                        out.write(_line([kind, *child]))
+                        counts[kind] += 1
+                children[kind] = (groups, next(groups, None))
+    return counts
+
+
+def import_archive(lines, batch_size=500):
+    """
+    Loads an archive from an iterable of lines in one transaction, under new
+    ids. Users are matched by email and created (with an unusable password)
+    when missing. Returns the counts of imported records per type.
+    """
+    lines = iter(lines)
+    try:
+        header = json.loads(next(lines))
+    except (StopIteration, ValueError):
+        raise ArchiveError("Empty or unreadable archive.")
+    if not isinstance(header, dict) or header.get('format') != FORMAT:
+        raise ArchiveError("Not a tournament archive.")
+    if header.get('version') != VERSION:
+        raise ArchiveError(f"Archive version {header.get('version')} is not supported (expected {VERSION}).")
+
+    importer = _Importer(header['columns'], batch_size)
+    with transaction.atomic():
+        for number, line in enumerate(lines, start=2):
+            if not line.strip():
+                continue
+            try:
+                kind, *values = json.loads(line)
+            except ValueError:
+                raise ArchiveError(f"Line {number} is not valid JSON.")
+            try:
+                importer.add(kind, values)
+            except KeyError as e:
+                raise ArchiveError(f"Line {number} references unknown id {e.args[0]!r}.")
+        try:
+            importer.flush()
+        except KeyError as e:
+            raise ArchiveError(f"A record references unknown id {e.args[0]!r}.")
+    return importer.counts
+
+
+class _Importer:
+    def __init__(self, columns, batch_size):
+        unknown = set(columns) - set(COLUMNS)
+        if unknown:
+            raise ArchiveError(f"Unknown record types: {', '.join(sorted(unknown))}.")
+        self.columns = columns
+        self.batch_size = batch_size
+        self.user_ids = {}
+        self.users = []
+        self.tournaments = []
+        self.counts = dict.fromkeys(COLUMNS, 0)
+
+    def add(self, kind, values):
+        if kind not in self.columns:
+            raise ArchiveError(f"Unknown record type {kind!r}.")
+        # Columns this version doesn't have are dropped, so newer archives still load.
+        row = {column: value for column, value in zip(self.columns[kind], values) if column in COLUMNS[kind]}
+        if kind == 'user':
+            self.users.append(row)
+            if len(self.users) >= BULK_BATCH_SIZE:
+                self._flush_users()
+        elif kind == 'tournament':
+            if len(self.tournaments) >= self.batch_size:
+                self._flush_tournaments()
+            self.tournaments.append((row, {child: [] for child in CHILDREN}))
+        else:
+            if not self.tournaments:
+                raise ArchiveError(f"A {kind} record comes before any tournament.")
+            self.tournaments[-1][1][kind].append(row)
+
+    def flush(self):
+        self._flush_users()
+        self._flush_tournaments()
+
+    def _flush_users(self):
+        if not self.users:
+            return
+        User = get_user_model()
+        existing = dict(User.objects.filter(email__in=[row['email'] for row in self.users]).values_list('email', 'id'))
+        missing = [row for row in self.users if row['email'] not in existing]
+        taken = set(User.objects.filter(username__in=[row['username'] for row in missing]).values_list('username', flat=True))
+        password = make_password(None)
+        created = User.objects.bulk_create([
+            User(
+                username=row['username'] if row['username'] not in taken else f"{row['username']}-{row['id']}",
+                email=row['email'], first_name=row['first_name'], last_name=row['last_name'], password=password,
+            )
+            for row in missing
+        ], batch_size=BULK_BATCH_SIZE)
+        existing.update((user.email, user.id) for user in created)
+        for row in self.users:
+            self.user_ids[row['id']] = existing[row['email']]
+        self.counts['user'] += len(created)
+        self.users = []
+
+    def _build(self, kind, model, row, **changes):
+        values = {**row, **changes}
+        for column in USER_COLUMNS.get(kind, ()):
+            if values.get(column) is not None:
+                values[column] = self.user_ids[values[column]]
+        values.pop('id')
+        return model(**values)
+
+    def _insert(self, kind, model, pairs):
+        """bulk_creates (row, instance) pairs, then restores the archived timestamps."""
+        instances = [instance for _, instance in pairs]
+        model.objects.bulk_create(instances, batch_size=BULK_BATCH_SIZE)
+        stamped = [column for column in TIMESTAMPS.get(kind, ()) if column in self.columns[kind]]
+        if stamped:
+            for row, instance in pairs:
+                for column in stamped:
+                    setattr(instance, column, model._meta.get_field(column).to_python(row[column]))
+            model.objects.bulk_update(instances, stamped, batch_size=BULK_BATCH_SIZE)
+        self.counts[kind] += len(instances)
+
+    def _flush_tournaments(self):
+        self._flush_users()
+        if not self.tournaments:
+            return
+        pairs = [(row, self._build('tournament', Tournament, row)) for row, _ in self.tournaments]
+        self._insert('tournament', Tournament, pairs)
+        tournament_ids = {row['id']: instance.id for row, instance in pairs}
+
+        for kind in ('sponsor', 'participant'):
+            model = CHILDREN[kind]
+            self._insert(kind, model, [
+                (row, self._build(kind, model, row, tournament_id=tournament_ids[row['tournament_id']]))
+                for _, children in self.tournaments for row in children[kind]
+            ])
+
+        # Brackets link to their own matches: insert without links, then point them at the new ids.
+        pairs = [
+            (row, self._build('match', Match, row, tournament_id=tournament_ids[row['tournament_id']],
+                              next_match_id=None, loser_next_match_id=None))
+            for _, children in self.tournaments for row in children['match']
+        ]
+        self._insert('match', Match, pairs)
+        match_ids = {row['id']: instance.id for row, instance in pairs}
+        linked = []
+        for row, instance in pairs:
+            if row.get('next_match_id') or row.get('loser_next_match_id'):
+                instance.next_match_id = match_ids.get(row.get('next_match_id'))
+                instance.loser_next_match_id = match_ids.get(row.get('loser_next_match_id'))
+                linked.append(instance)
+        Match.objects.bulk_update(linked, ['next_match', 'loser_next_match'], batch_size=BULK_BATCH_SIZE)
+        self.tournaments = []
@@ -1,10 +1,14 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import TournamentViewSet
+from .views import LeaderboardViewSet, NotificationViewSet, TournamentViewSet, metrics, tournament_events
 
 router = DefaultRouter()
 router.register(r'tournaments', TournamentViewSet)
+router.register(r'leaderboard', LeaderboardViewSet)
+router.register(r'notifications', NotificationViewSet, basename='notification')
 
 urlpatterns = [
+    path('tournaments/<int:pk>/events/', tournament_events, name='tournament-events'),
+    path('metrics/', metrics, name='metrics'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
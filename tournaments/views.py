@@ -1,33 +1,189 @@
-from rest_framework import viewsets, permissions, filters
-from rest_framework.decorators import action
+from rest_framework import viewsets, permissions
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from django.utils import timezone
-from django.db import transaction
-from .models import Tournament, Participant, Match, Sponsor
-from .serializers import TournamentSerializer, ParticipantSerializer, MatchSerializer
+from django.db import IntegrityError, transaction
+from django.db.models import Q, Subquery
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from .models import (
+    ArchivedParticipation, Tournament, Participant, Match, Notification, OutboxMessage, PlayerStats, TournamentSnapshot,
+)
+from .serializers import (
+    TournamentSerializer, TournamentListSerializer, TournamentSummarySerializer,
+    ParticipantSerializer, MatchSerializer, NotificationSerializer, PlayerStatsSerializer, normalize_bracket,
+)
+from .pagination import (
+    HistoryCursorPagination, LeaderboardCursorPagination, NotificationCursorPagination, TournamentCursorPagination,
+)
+from .cache import bracket_cache
+from .compression import negotiate
+from .events import broker, encode as encode_events
+from .exceptions import InvalidSponsorImage
+from .filters import TournamentFilter, TournamentSearchFilter
+from .formats import FORMATS
+from .images import add_sponsors
+from .profiling import registry as profiling_registry
+from .routers import ReplicaReadsMixin
+from .snapshots import config as snapshot_config, refresh as refresh_snapshot
+from .stats import record_results, record_title
+from functools import partial
+import asyncio
 import math
 from django.contrib.auth import get_user_model # <--- 1. ADD THIS IMPORT
  
-class TournamentViewSet(viewsets.ModelViewSet):
-    queryset = Tournament.objects.all().order_by('-created_at')
+class TournamentViewSet(ReplicaReadsMixin, viewsets.ModelViewSet):
+    queryset = Tournament.objects.all().order_by('-created_at', '-id')
     serializer_class = TournamentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = TournamentCursorPagination
+    # Non-numeric ids are 404s at the router, before they reach a query.
+    lookup_value_regex = r'\d+'
     
-    filter_backends = [filters.SearchFilter]
-    search_fields = ['name', 'discipline']
+    filter_backends = [TournamentSearchFilter, TournamentFilter]
+
+    def get_queryset(self):
+        queryset = Tournament.objects.select_related('organizer').defer('search_vector').order_by('-created_at', '-id')
+        if self.action == 'list':
+            return self._list_queryset()
+        if self.action in ('retrieve', 'update', 'partial_update'):
+            return queryset.with_bracket()
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return TournamentListSerializer
+        return TournamentSerializer
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action == 'list':
+            kwargs['fields'], kwargs['expand'] = self._fieldset()
+        return super().get_serializer(*args, **kwargs)
+
+    def _fieldset(self):
+        """
+        Parses ?fields=a,b and ?expand=sponsors,... for the list. Returns
+        (fields or None for all, expand); unknown names are a 400.
+        """
+        if not hasattr(self, '_parsed_fieldset'):
+            def names(param, allowed):
+                requested = [name for name in self.request.query_params.get(param, '').split(',') if name]
+                unknown = sorted(set(requested) - set(allowed))
+                if unknown:
+                    raise ValidationError({param: [f"Unknown: {', '.join(unknown)}. Allowed: {', '.join(allowed)}."]})
+                return requested
+
+            fields = names('fields', TournamentListSerializer.Meta.fields)
+            expand = names('expand', list(TournamentListSerializer.EXPANDABLE))
+            self._parsed_fieldset = (fields or None, expand)
+        return self._parsed_fieldset
+
+    def _list_queryset(self):
+        """
+        Fetches only what the requested fieldset renders: deferred columns,
+        count subqueries only when asked for, prefetches only for expanded relations.
+        """
+        fields, expand = self._fieldset()
+        queryset = Tournament.objects.order_by('-created_at', '-id').with_relations(*expand)
+        if fields is None:
+            return queryset.select_related('organizer').defer('search_vector').with_counts()
+
+        counts = [name for name in ('match_count', 'sponsor_count') if name in fields]
+        if counts:
+            queryset = queryset.with_counts(*counts)
+        model_fields = {field.name for field in Tournament._meta.concrete_fields}
+        # created_at/id are read back by the cursor paginator.
+        columns = {'id', 'created_at'} | (set(fields) & model_fields)
+        if {'matches', 'participants'} & set(expand):
+            # Archived tournaments render these from their ArchivedBracket.
+            columns |= {'archived_at', 'archived_bracket__payload'}
+        if 'organizer_email' in fields:
+            queryset = queryset.select_related('organizer')
+            columns |= {'organizer', 'organizer__email'}
+        return queryset.only(*columns)
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Serves the detail from the snapshot cache. Only the version row is read
+        per poll; clients that send the ETag back get a 304. Finished
+        tournaments are served from their stored TournamentSnapshot instead.
+        ?normalized=1 lists every user once (see normalize_bracket).
+        """
+        state = Tournament.objects.filter(pk=kwargs['pk']).values('bracket_version', 'updated_at', 'status').first()
+        if state is None:
+            raise Http404
+        version = state['bracket_version']
+        etag = quote_etag(f"{kwargs['pk']}-{version}")
+        last_modified = int(state['updated_at'].timestamp())
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            # The 200 this stands for varies on Accept-Encoding (compressed or a stored gzip body).
+            patch_vary_headers(not_modified, ['Accept-Encoding'])
+            return not_modified
+
+        normalized = request.query_params.get('normalized') in ('1', 'true')
+        if state['status'] == 'finished' and request.accepted_renderer.format == 'json' and not normalized:
+            return self._snapshot_response(request, kwargs['pk'], version, last_modified)
+
+        data = bracket_cache.get(kwargs['pk'], version)
+        if data is None:
+            data = self.get_serializer(self.get_object()).data
+            bracket_cache.set(kwargs['pk'], version, data)
+
+        response = Response(normalize_bracket(data) if normalized else data)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+    def _snapshot_response(self, request, pk, version, last_modified):
+        """
+        The stored bytes of a finished tournament (gzipped when the client accepts
+        it), rendered now if the snapshot is missing or older than `version`.
+        """
+        gzipped = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''), ('gzip',)) == 'gzip'
+        column = 'body_gzip' if gzipped else 'body'
+        body = TournamentSnapshot.objects.filter(tournament_id=pk, version=version).values_list(column, flat=True).first()
+        if body is None:
+            snapshot = refresh_snapshot(pk, request)
+            if snapshot is None:
+                raise Http404
+            body = getattr(snapshot, column)
+            version = snapshot.version
+        if body is None:
+            # Rendered with SNAPSHOTS['COMPRESS'] off.
+            gzipped = False
+            body = TournamentSnapshot.objects.filter(tournament_id=pk).values_list('body', flat=True).first()
+
+        response = HttpResponse(bytes(body), content_type='application/json')
+        if gzipped:
+            response['Content-Encoding'] = 'gzip'
+        # Weak: the gzip and identity bodies are different bytes for the same version.
+        response['ETag'] = 'W/' + quote_etag(f"{pk}-{version}")
+        response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = f"public, max-age={snapshot_config()['MAX_AGE']}"
+        patch_vary_headers(response, ['Accept-Encoding'])
+        return response
 
     def perform_create(self, serializer):
-        tournament = serializer.save(organizer=self.request.user)
-        
-        images = self.request.FILES.getlist('sponsors')
-        for image in images:
-            Sponsor.objects.create(tournament=tournament, image=image)
+        with transaction.atomic():
+            tournament = serializer.save(organizer=self.request.user)
+            self._add_sponsors(tournament)
+
     def perform_update(self, serializer):
-        tournament = serializer.save()
-        
-        images = self.request.FILES.getlist('sponsors')
-        for image in images:
-            Sponsor.objects.create(tournament=tournament, image=image)
+        with transaction.atomic():
+            tournament = serializer.save()
+            self._add_sponsors(tournament)
+            Tournament.bump_version(tournament.pk)
+
+    def _add_sponsors(self, tournament):
+        try:
+            add_sponsors(tournament, self.request.FILES.getlist('sponsors'))
+        except InvalidSponsorImage as e:
+            raise ValidationError({'sponsors': [str(e)]})
 
     @action(detail=False, methods=['get'], url_path='history')
     def user_history(self, request):
@@ -39,44 +195,83 @@ class TournamentViewSet(viewsets.ModelViewSet):
 
         User = get_user_model()
         try:
-            user = User.objects.get(username=username)
+            user = User.objects.select_related('player_stats').get(username=username)
         except User.DoesNotExist:
             return Response({"error": "User not found"}, status=404)
 
-        user_tournaments = Tournament.objects.filter(participants__user=user).distinct()
+        # (tournament, user) is unique on Participant, so the join needs no DISTINCT. Only finished
+        # tournaments can be archived (tournaments.archival); those are found through ArchivedParticipation.
+        active = Tournament.objects.filter(participants__user=user, status__in=['open', 'ongoing'])
+        past = Tournament.objects.filter(
+            Q(pk__in=Participant.objects.filter(user=user).values('tournament_id'))
+            | Q(pk__in=ArchivedParticipation.objects.filter(user=user).values('tournament_id')),
+            status='finished',
+        )
+        summary = request.query_params.get('summary') in ('1', 'true')
+        serializer_class = TournamentSummarySerializer if summary else TournamentSerializer
 
-        active = user_tournaments.filter(status__in=['open', 'ongoing']).order_by('start_time')
-        past = user_tournaments.filter(status='finished').order_by('-start_time')
+        def prepare(queryset):
+            queryset = queryset.defer('search_vector')
+            return queryset.with_player_stats(user) if summary else queryset.with_bracket()
 
-        return Response({
-            "username": user.username,
-            "active": TournamentSerializer(active, many=True).data,
-            "past": TournamentSerializer(past, many=True).data
-        })
+        buckets = {
+            'active': (prepare(active), ('start_time', 'id')),
+            'past': (prepare(past), ('-start_time', '-id')),
+        }
+        requested = request.query_params.get('bucket')
+
+        stats = getattr(user, 'player_stats', None)
+        data = {"username": user.username, "stats": PlayerStatsSerializer(stats).data if stats else None}
+        for bucket, (queryset, ordering) in buckets.items():
+            if requested and requested != bucket:
+                continue
+            paginator = HistoryCursorPagination(bucket, ordering)
+            page = paginator.paginate_queryset(queryset, request, view=self)
+            data[bucket] = serializer_class(page, many=True).data
+            data[f"{bucket}_next"] = paginator.get_next_link()
+            data[f"{bucket}_previous"] = paginator.get_previous_link()
+
+        return Response(data)
     
     @action(detail=True, methods=['post'])
     def join(self, request, pk=None):
-        tournament = self.get_object()
-        
-        if tournament.participants.count() >= tournament.max_participants:
-            return Response({"error": "Tournament is full"}, status=400)
-            
-        if timezone.now() > tournament.deadline:
-             return Response({"error": "Registration deadline passed"}, status=400)
-
-        
         serializer = ParticipantSerializer(data={
-            'tournament': tournament.id,
             'team_name': request.data.get('team_name'),         
             'license_number': request.data.get('license_number'),
             'ranking_points': request.data.get('ranking_points'),
             'teammates_names': request.data.get('teammates_names') 
         })
-        
-        if serializer.is_valid():
-            serializer.save(user=request.user)
-            return Response(serializer.data, status=201)
-        return Response(serializer.errors, status=400)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=400)
+
+        try:
+            with transaction.atomic():
+                reserved = Tournament.reserve_seat(pk)
+                if reserved:
+                    serializer.save(user=request.user, tournament_id=pk)
+        except IntegrityError:
+            return Response({"error": self._join_conflict(pk, serializer.validated_data, request.user)}, status=400)
+
+        if not reserved:
+            return self._join_rejected()
+        return Response(serializer.data, status=201)
+
+    def _join_rejected(self):
+        """Explains why reserve_seat() refused; only runs on the failure path."""
+        tournament = self.get_object()
+        if tournament.status != 'open':
+            return Response({"error": "Registration is closed"}, status=400)
+        if tournament.participant_count >= tournament.max_participants:
+            return Response({"error": "Tournament is full"}, status=400)
+        return Response({"error": "Registration deadline passed"}, status=400)
+
+    def _join_conflict(self, tournament_id, data, user):
+        participants = Participant.objects.filter(tournament_id=tournament_id)
+        if participants.filter(user=user).exists():
+            return "You have already joined this tournament."
+        if data['license_number'] and participants.filter(license_number=data['license_number']).exists():
+            return "This Summoner Name is already registered in this tournament."
+        return "This Team Name is already taken."
     
     
     @action(detail=True, methods=['post'])
@@ -94,36 +289,52 @@ class TournamentViewSet(viewsets.ModelViewSet):
         
     @action(detail=True, methods=['post'], url_path='matches/(?P<match_id>\d+)/report')
     def report_match(self, request, pk=None, match_id=None):
+        """
+        Records the caller's vote and, once both captains agree, the winner.
+        Accepts `winner_slot` ('player1'/'player2'), `winner_id` or `winner_email`.
+        Every outcome costs the same handful of queries: one SELECT locking the
+        match and its successor, at most three column-limited UPDATEs, the player
+        stats update and one outbox INSERT when a match becomes playable.
+        Notifications are only queued here; deliver_notifications sends them.
+        """
         with transaction.atomic():
-            match = Match.objects.select_for_update().get(id=match_id, tournament_id=pk)
-            
-            if match.winner:
+            reported = Match.objects.filter(pk=match_id)
+            locked = {
+                m.id: m for m in Match.objects.select_for_update(of=('self',))
+                .select_related('player1', 'player2', 'tournament')
+                .filter(
+                    Q(pk=match_id)
+                    | Q(pk=Subquery(reported.values('next_match_id')))
+                    | Q(pk=Subquery(reported.values('loser_next_match_id'))),
+                    tournament_id=pk,
+                )
+            }
+            match = locked.get(int(match_id))
+            if match is None:
+                return Response({"error": "Match not found"}, status=404)
+
+            if match.winner_id:
                  return Response({"error": "Match already finished"}, status=400)
 
-            winner_email = request.data.get('winner_email')
-            
-            User = get_user_model()
-            try:
-                winner_obj = User.objects.get(email=winner_email)
-            except User.DoesNotExist:
-                return Response({"error": "Winner email not found"}, status=400)
-            if winner_obj != match.player1 and winner_obj != match.player2:
+            winner_id = self._resolve_winner(match, request.data)
+            if winner_id is None:
                 return Response({
                     "error": "Invalid Winner. The winner must be one of the match participants."
                 }, status=400)
-            if match.player1 == request.user:
-                match.player1_vote = winner_obj
-            elif match.player2 == request.user:
-                match.player2_vote = winner_obj
+            if match.player1_id == request.user.id:
+                vote_field = 'player1_vote'
+            elif match.player2_id == request.user.id:
+                vote_field = 'player2_vote'
             else:
                 return Response({"error": "You are not a participant in this match"}, status=403)
-            
-            match.save()
+            setattr(match, f'{vote_field}_id', winner_id)
 
-            p1_voted = match.player1_vote
-            p2_voted = match.player2_vote
+            p1_voted = match.player1_vote_id
+            p2_voted = match.player2_vote_id
 
             if not p1_voted or not p2_voted:
+                match.save(update_fields=[vote_field])
+                Tournament.bump_version(pk)
                 return Response({
                     "status": "waiting", 
                     "message": "Vote recorded. Waiting for opponent."
@@ -132,26 +343,258 @@ class TournamentViewSet(viewsets.ModelViewSet):
             if p1_voted != p2_voted:
                 match.player1_vote = None
                 match.player2_vote = None
-                match.save()
+                match.save(update_fields=['player1_vote', 'player2_vote'])
+                Tournament.bump_version(pk)
                 
                 return Response({
                     "status": "conflict",
                     "message": "Both captains submitted different results. Votes have been reset."
                 }, status=200)
 
-            match.winner = p1_voted
-            match.save()
+            match.winner_id = p1_voted
+            match.save(update_fields=[vote_field, 'winner'])
 
-            if match.next_match:
-                next_match = Match.objects.select_for_update().get(id=match.next_match.id)
-                if match.match_number % 2 == 0:
-                    next_match.player1 = match.winner
-                else:
-                    next_match.player2 = match.winner
-                next_match.save()
+            events = [{"type": "match_finished", "match": match.id, "winner": match.winner_id}]
+            # Slots filled per match: with two players, winner and loser both go to the grand final.
+            advanced = {}
+            for next_match_id, slot, player_id in (
+                (match.next_match_id, match.next_slot, match.winner_id),
+                (match.loser_next_match_id, match.loser_next_slot, match.loser_id),
+            ):
+                if next_match_id:
+                    setattr(locked[next_match_id], f'{slot}_id', player_id)
+                    advanced.setdefault(next_match_id, []).append(slot)
+                    events.append({"type": "player_advanced", "match": next_match_id, "slot": slot, "player": player_id})
+            for next_match_id, slots in advanced.items():
+                locked[next_match_id].save(update_fields=slots)
+
+            OutboxMessage.matches_ready([locked[next_match_id] for next_match_id in advanced])
+            record_results([(match.winner_id, match.loser_id)])
+            if match.next_match_id:
+                Tournament.bump_version(pk)
             else:
-                tournament = match.tournament
-                tournament.status = 'finished'
-                tournament.save()
+                events += self._complete_stage(match.tournament, match.winner_id)
+            transaction.on_commit(partial(broker.publish, match.tournament_id, events))
+
+        winner = match.player1 if match.winner_id == match.player1_id else match.player2
+        return Response({"status": "finished", "winner": winner.email, "winner_id": winner.id})
+
+    @action(detail=True, methods=['post'], url_path='matches/report-batch')
+    def report_batch(self, request, pk=None):
+        """
+        Organizer entry of many results at once: {"results": [{"match": id, "winner_slot"|"winner_id"|"winner_email": ...}]}.
+        The bracket is loaded and locked once, results are validated and applied
+        in memory in round order (so a batch may include matches fed by earlier
+        entries), then written with one bulk UPDATE. Invalid entries are reported
+        per match and do not stop the rest.
+        """
+        tournament = self.get_object()
+        if tournament.organizer_id != request.user.id and not request.user.is_staff:
+            return Response({"error": "Only the organizer can report results in bulk"}, status=403)
+        if tournament.status != 'ongoing':
+            return Response({"error": "Tournament is not ongoing"}, status=400)
+
+        entries = request.data.get('results')
+        if not isinstance(entries, list) or not entries:
+            return Response({"error": "results must be a non-empty list"}, status=400)
+
+        with transaction.atomic():
+            matches = {
+                m.id: m for m in Match.objects.select_for_update(of=('self',))
+                .select_related('player1', 'player2')
+                .filter(tournament_id=tournament.id)
+            }
+
+            def match_of(entry):
+                try:
+                    return matches.get(int(entry.get('match')))
+                except (AttributeError, TypeError, ValueError):
+                    return None
+
+            outcomes = [None] * len(entries)
+            changed = {}
+            results = []
+            events = []
+            stage_done = None
+            # Feeders first: round numbers restart in the losers bracket and the grand final, so
+            # they can't order a double elimination batch; distance to the end of the bracket can.
+            height = self._heights(matches)
+            order = sorted(range(len(entries)), key=lambda i: -height.get(getattr(match_of(entries[i]), 'id', None), 0))
+            for i in order:
+                entry = entries[i]
+                match = match_of(entry)
+                if match is None:
+                    outcomes[i] = {"match": entry.get('match') if isinstance(entry, dict) else None, "status": "error", "error": "Match not found"}
+                    continue
+                if match.winner_id:
+                    outcomes[i] = {"match": match.id, "status": "error", "error": "Match already finished"}
+                    continue
+                winner_id = self._resolve_winner(match, entry) if match.player1_id and match.player2_id else None
+                if winner_id is None:
+                    outcomes[i] = {"match": match.id, "status": "error", "error": "Invalid Winner. The winner must be one of the match participants."}
+                    continue
+
+                match.winner = match.player1 if winner_id == match.player1_id else match.player2
+                changed[match.id] = match
+                results.append((winner_id, match.loser_id))
+                events.append({"type": "match_finished", "match": match.id, "winner": winner_id})
+                if match.next_match_id:
+                    next_match = matches[match.next_match_id]
+                    setattr(next_match, match.next_slot, match.winner)
+                    changed[next_match.id] = next_match
+                    events.append({"type": "player_advanced", "match": next_match.id, "slot": match.next_slot, "player": winner_id})
+                else:
+                    stage_done = match
+                if match.loser_next_match_id:
+                    loser_match = matches[match.loser_next_match_id]
+                    loser = match.player2 if winner_id == match.player1_id else match.player1
+                    setattr(loser_match, match.loser_next_slot, loser)
+                    changed[loser_match.id] = loser_match
+                    events.append({"type": "player_advanced", "match": loser_match.id, "slot": match.loser_next_slot, "player": loser.id})
+                outcomes[i] = {"match": match.id, "status": "finished", "winner_id": winner_id}
+
+            if changed:
+                Match.objects.bulk_update(list(changed.values()), ['winner', 'player1', 'player2'])
+                OutboxMessage.matches_ready(changed.values())
+                record_results(results)
+                if stage_done is not None:
+                    events += self._complete_stage(tournament, stage_done.winner_id)
+                else:
+                    Tournament.bump_version(tournament.id)
+                transaction.on_commit(partial(broker.publish, tournament.id, events))
+
+        applied = sum(1 for outcome in outcomes if outcome['status'] == 'finished')
+        return Response({"applied": applied, "failed": len(outcomes) - applied, "results": outcomes})
+
+    @staticmethod
+    def _heights(matches):
+        """
+        For {id: Match}, each match's longest path to a match with no successor (which has 1).
+        A match is always higher than the matches its winner and loser move on to.
+        """
+        heights = {}
+
+        def height(match_id):
+            if match_id not in heights:
+                match = matches[match_id]
+                successors = [i for i in (match.next_match_id, match.loser_next_match_id) if i in matches]
+                heights[match_id] = 1 + max((height(i) for i in successors), default=0)
+            return heights[match_id]
+
+        for match_id in matches:
+            height(match_id)
+        return heights
+
+    def _complete_stage(self, tournament, winner_id):
+        """
+        Runs complete_stage() after a final match. If that ended the tournament it
+        credits the title and schedules the detail snapshot. Returns the events.
+        """
+        outcome = tournament.complete_stage()
+        if outcome == 'finished':
+            record_title(tournament)
+            # Rendered once the result is committed; a failure here only means the first read renders it.
+            transaction.on_commit(partial(refresh_snapshot, tournament.id, self.request), robust=True)
+        return self._stage_events(tournament, outcome, winner_id)
+
+    def _stage_events(self, tournament, outcome, winner_id):
+        if outcome == 'finished':
+            # Round-based formats are decided by standings, not by the last match.
+            if FORMATS[tournament.format].round_based:
+                winner_id = None
+            return [{"type": "tournament_finished", "tournament": tournament.id, "winner": winner_id}]
+        if outcome == 'round_started':
+            return [{"type": "round_started", "tournament": tournament.id}]
+        return []
+
+    def _resolve_winner(self, match, data):
+        """Maps winner_slot / winner_id / winner_email onto one of the match's player ids, or None."""
+        players = {'player1': match.player1, 'player2': match.player2}
+        slot = data.get('winner_slot')
+        if slot is not None:
+            winner = players.get(slot)
+            return winner.id if winner else None
+
+        winner_id = data.get('winner_id')
+        email = data.get('winner_email')
+        for winner in players.values():
+            if winner is None:
+                continue
+            if winner_id is not None and str(winner.id) == str(winner_id):
+                return winner.id
+            if winner_id is None and email is not None and winner.email == email:
+                return winner.id
+        return None
+
+
+class LeaderboardViewSet(ReplicaReadsMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Players by rating, served from PlayerStats (see tournaments.stats) with
+    cursor pages over player_stats_rating_idx. /leaderboard/<user id>/ is one
+    player's stats.
+    """
+    queryset = PlayerStats.objects.select_related('user').order_by('-rating', 'user_id')
+    serializer_class = PlayerStatsSerializer
+    pagination_class = LeaderboardCursorPagination
+
+
+class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
+    """The signed-in user's in-app feed, filled by the notification workers (tournaments.notifications)."""
+    serializer_class = NotificationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NotificationCursorPagination
+
+    def get_queryset(self):
+        return Notification.objects.filter(user=self.request.user).order_by('-created_at', '-id')
+
+    @action(detail=False, methods=['post'])
+    def read(self, request):
+        """Marks the feed read, up to and including `until` (a notification id) when given."""
+        unread = self.get_queryset().filter(read_at__isnull=True)
+        until = request.data.get('until')
+        if until is not None:
+            try:
+                unread = unread.filter(id__lte=int(until))
+            except (TypeError, ValueError):
+                return Response({"error": "until must be a notification id"}, status=400)
+        return Response({"marked": unread.update(read_at=timezone.now())})
+
+
+HEARTBEAT_SECONDS = 15
+
+async def tournament_events(request, pk):
+    """
+    Server-sent events stream of live bracket changes for one tournament.
+    Needs the ASGI app (backend.asgi); viewers cost no queries after connecting.
+    """
+    if not await Tournament.objects.filter(pk=pk).aexists():
+        raise Http404
+
+    async def stream():
+        subscription = broker.subscribe(pk)
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                if subscription.lagging:
+                    subscription.lagging = False
+                    yield encode_events([{"type": "resync", "tournament": pk}])
+                try:
+                    frame = await asyncio.wait_for(subscription.queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                yield frame
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 
-        return Response({"status": "finished", "winner": winner_email})
\ No newline at end of file
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def metrics(request):
+    """Sampled per-endpoint request costs (see tournaments.profiling) in Prometheus text format."""
+    return HttpResponse(profiling_registry.prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')